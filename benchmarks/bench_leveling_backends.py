@@ -0,0 +1,86 @@
+"""Compare the JSON and SQLite leveling backends at different user counts
+
+Usage: python benchmarks/bench_leveling_backends.py [--sizes 10000 100000 1000000]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.leveling_store import JournalBackend, SqliteBackend
+
+def make_users(count: int) -> dict:
+    """Generate synthetic user rows in the leveling settings shape"""
+    rng = random.Random(count)
+    users = {}
+    for i in range(count):
+        total_xp = int(rng.paretovariate(1.2) * 100)
+        users[str(100000000000000000 + i)] = {
+            "xp": total_xp % 500,
+            "level": min(total_xp // 500, 420),
+            "last_xp_gain": 1700000000.0 + i,
+            "streak": rng.randint(0, 30),
+            "last_streak_date": 1700000000.0,
+            "highest_streak": 30,
+            "total_xp": total_xp
+        }
+    return users
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return (time.perf_counter() - start) * 1000, result
+
+def bench_json(users: dict, dirty: list, workdir: str) -> dict:
+    settings_path = os.path.join(workdir, 'leveling_settings.json')
+    backend = JournalBackend(os.path.join(workdir, 'leveling_users.journal'))
+
+    def full_save():
+        with open(settings_path, 'w') as f:
+            json.dump({'settings': {'users': users}}, f, indent=4)
+
+    def load():
+        with open(settings_path, 'r') as f:
+            return json.load(f)['settings']['users']
+
+    results = {}
+    results["full save"], _ = timed(full_save)
+    results["flush 1% dirty"], _ = timed(backend.write_rows, [(uid, users[uid]) for uid in dirty])
+    results["load"], _ = timed(load)
+    return results
+
+def bench_sqlite(users: dict, dirty: list, workdir: str) -> dict:
+    backend = SqliteBackend(os.path.join(workdir, 'leveling.db'))
+    try:
+        results = {}
+        results["full save"], _ = timed(backend.write_rows, list(users.items()))
+        results["flush 1% dirty"], _ = timed(backend.write_rows, [(uid, users[uid]) for uid in dirty])
+        results["load"], _ = timed(backend.load_into, {})
+        return results
+    finally:
+        backend.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    args = parser.parse_args()
+
+    operations = ["full save", "flush 1% dirty", "load"]
+    print(f"{'users':>9} {'operation':<16} {'json ms':>10} {'sqlite ms':>10}")
+    for size in args.sizes:
+        users = make_users(size)
+        ids = list(users)
+        dirty = random.Random(1).sample(ids, max(1, size // 100))
+        with tempfile.TemporaryDirectory() as workdir:
+            json_results = bench_json(users, dirty, workdir)
+            sqlite_results = bench_sqlite(users, dirty, workdir)
+        for operation in operations:
+            print(f"{size:>9} {operation:<16} {json_results[operation]:>10.1f} {sqlite_results[operation]:>10.1f}")
+
+if __name__ == "__main__":
+    main()
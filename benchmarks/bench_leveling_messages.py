@@ -0,0 +1,218 @@
+"""Drive the leveling cog with a synthetic message storm and report throughput
+
+Runs without a Discord connection: config, the bot, guild, channels and
+members are stubs, and message timestamps come from a simulated clock so
+cooldowns behave as they would at the requested message rate.
+
+Usage: python benchmarks/bench_leveling_messages.py [--users 5000] [--channels 20]
+           [--messages 200000] [--rate 500] [--batch-ms 250] [--mode batch|direct] [--backend json|sqlite]
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import statistics
+import sys
+import tempfile
+import time
+import types
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# config.py needs a .env with a real token; the cog only reads these names from it
+config = types.ModuleType("config")
+config.GUILD_ID = 1
+config.TOKEN = "benchmark"
+config.BOT_SETTINGS = {"embed_color": "0xbc69f0", "moderation": {}}
+sys.modules.setdefault("config", config)
+
+GUILD_ID = sys.modules["config"].GUILD_ID
+
+class StubChannel:
+    def __init__(self, channel_id: int):
+        self.id = channel_id
+        self.category_id = None
+        self.sent = 0
+
+    async def send(self, *args, **kwargs):
+        self.sent += 1
+
+class StubMember:
+    def __init__(self, user_id: int, guild: 'StubGuild'):
+        self.id = user_id
+        self.bot = False
+        self.name = f"user{user_id}"
+        self.mention = f"<@{user_id}>"
+        self.guild = guild
+        self.roles = []
+        self.display_avatar = types.SimpleNamespace(url="https://cdn.discordapp.com/embed/avatars/0.png")
+
+    async def edit(self, roles=None, reason=None):
+        self.roles = roles
+
+class StubGuild:
+    def __init__(self, member_ids):
+        self.id = GUILD_ID
+        self.members = {user_id: StubMember(user_id, self) for user_id in member_ids}
+        self.channels = []
+        self.categories = []
+        self.voice_channels = []
+        self.stage_channels = []
+        self.afk_channel = None
+
+    def get_member(self, user_id: int):
+        return self.members.get(user_id)
+
+    def get_role(self, role_id: int):
+        return None
+
+class StubBot:
+    def __init__(self, guild: StubGuild, channels: dict):
+        self.guild = guild
+        self.channels = channels
+        self.cogs = {}
+
+    def get_guild(self, guild_id: int):
+        return self.guild if guild_id == GUILD_ID else None
+
+    def get_channel(self, channel_id: int):
+        return self.channels.get(channel_id)
+
+    def get_user(self, user_id: int):
+        return self.guild.get_member(user_id)
+
+    def get_cog(self, name: str):
+        return None
+
+    def is_ready(self) -> bool:
+        return True
+
+def rss_mb() -> float:
+    """Current resident set size, falling back to the peak where /proc is unavailable"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+    except (OSError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def percentile(samples: list, pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+async def run(args) -> None:
+    from cogs.leveling import Leveling
+
+    log_channel = StubChannel(999)
+    channels = {1000 + i: StubChannel(1000 + i) for i in range(args.channels)}
+    channels[log_channel.id] = log_channel
+    member_ids = [100000000000000000 + i for i in range(args.users)]
+    bot = StubBot(StubGuild(member_ids), channels)
+    bot.guild.channels = list(channels.values())
+
+    # The first load writes the default settings file; tweak it and load again
+    Leveling(bot).store.backend.close()
+    with open("data/leveling_settings.json") as f:
+        data = json.load(f)
+    data["settings"]["storage_backend"] = args.backend
+    data["settings"]["log_channel_id"] = log_channel.id
+    # The benchmark drains the queue itself so it can time each batch
+    data["settings"]["xp_batch_interval_ms"] = 10 ** 9
+    with open("data/leveling_settings.json", "w") as f:
+        json.dump(data, f)
+
+    cog = Leveling(bot)
+    await cog.cog_load()
+
+    channel_ids = list(channels)[:-1]
+    start_ts = datetime.now(timezone.utc).timestamp()
+    # Messages that arrive during one batch interval at the simulated rate
+    batch_every = max(1, int(args.rate * args.batch_ms / 1000))
+    rss_before = rss_mb()
+
+    handler_ns = []
+    batch_ms = []
+    wall_start = time.perf_counter()
+    for i in range(args.messages):
+        user_id = member_ids[(i * 7919) % args.users]
+        channel_id = channel_ids[i % len(channel_ids)]
+        ts = start_ts + i / args.rate
+
+        if args.mode == "batch":
+            message = types.SimpleNamespace(
+                author=bot.guild.members[user_id],
+                guild=bot.guild,
+                channel=channels[channel_id],
+                content=f"benchmark message {i}",
+                created_at=datetime.fromtimestamp(ts, timezone.utc)
+            )
+            t0 = time.perf_counter_ns()
+            await cog.on_message(message)
+            handler_ns.append(time.perf_counter_ns() - t0)
+            if (i + 1) % batch_every == 0:
+                t0 = time.perf_counter()
+                await cog._process_xp_batch()
+                batch_ms.append((time.perf_counter() - t0) * 1000)
+                # Let the store flusher and announcement timers run like they would between gateway events
+                await asyncio.sleep(0)
+        else:
+            t0 = time.perf_counter_ns()
+            await cog._award_xp(user_id, channel_id, ts)
+            handler_ns.append(time.perf_counter_ns() - t0)
+            if (i + 1) % batch_every == 0:
+                await asyncio.sleep(0)
+
+    if args.mode == "batch":
+        t0 = time.perf_counter()
+        await cog._process_xp_batch()
+        batch_ms.append((time.perf_counter() - t0) * 1000)
+    wall = time.perf_counter() - wall_start
+    rss_after = rss_mb()
+
+    t0 = time.perf_counter()
+    flushed = await cog.store.flush()
+    flush_ms = (time.perf_counter() - t0) * 1000
+    t0 = time.perf_counter()
+    await cog._compact_store()
+    snapshot_ms = (time.perf_counter() - t0) * 1000
+    await cog.cog_unload()
+
+    handler_us = [ns / 1000 for ns in handler_ns]
+    print(f"mode={args.mode} backend={args.backend} users={args.users} channels={args.channels} "
+          f"messages={args.messages} simulated rate={args.rate}/s")
+    print(f"throughput        {args.messages / wall:>12,.0f} msg/s ({wall:.2f}s wall)")
+    print(f"handler p50       {percentile(handler_us, 50):>12.1f} us")
+    print(f"handler p99       {percentile(handler_us, 99):>12.1f} us")
+    print(f"handler mean      {statistics.fmean(handler_us):>12.1f} us")
+    if batch_ms:
+        print(f"batch p50/p99     {percentile(batch_ms, 50):>8.2f} / {percentile(batch_ms, 99):.2f} ms "
+              f"({len(batch_ms)} batches of ~{batch_every} messages)")
+    print(f"users tracked     {len(cog.users):>12,}")
+    filter_stats = cog.message_filter.stats()
+    print(f"farming filter    {filter_stats['duplicates_blocked'] + filter_stats['low_entropy_blocked']:>12,} refused "
+          f"({filter_stats['tracked_users']:,} users tracked)")
+    print(f"level ups sent    {log_channel.sent:>12,} messages")
+    print(f"final flush       {flush_ms:>12.1f} ms ({flushed} rows)")
+    print(f"snapshot save     {snapshot_ms:>12.1f} ms")
+    print(f"RSS               {rss_before:>8.1f} -> {rss_after:.1f} MB (+{rss_after - rss_before:.1f} MB)")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--channels", type=int, default=20)
+    parser.add_argument("--messages", type=int, default=200000)
+    parser.add_argument("--rate", type=float, default=500, help="simulated messages per second")
+    parser.add_argument("--mode", choices=["batch", "direct"], default="batch",
+                        help="batch: on_message + batch worker, direct: _award_xp per message")
+    parser.add_argument("--batch-ms", type=float, default=250, help="simulated batch worker interval")
+    parser.add_argument("--backend", choices=["json", "sqlite"], default="json")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        os.makedirs("data")
+        asyncio.run(run(args))
+
+if __name__ == "__main__":
+    main()
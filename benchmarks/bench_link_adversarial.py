@@ -0,0 +1,176 @@
+"""Check that automod link scanning stays bounded on adversarial messages
+
+Checks that hosts hidden behind junk characters are still found, times the
+tokenizer and the full rule pipeline on inputs built to make regular
+expressions backtrack, then drives the worker-process scanner with
+a deliberately catastrophic pattern to show the deadline fires and the event
+loop keeps running. Exits non-zero if any bound is exceeded.
+
+Usage: python benchmarks/bench_link_adversarial.py [--length 4000] [--inline-budget-ms 10]
+           [--deadline-ms 250] [--stall-budget-ms 50]
+"""
+import argparse
+import asyncio
+import os
+import re
+import sys
+import tempfile
+import time
+import types
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# config.py needs a .env with a real token; the cog only reads these names from it
+config = types.ModuleType("config")
+config.GUILD_ID = 1
+config.TOKEN = "benchmark"
+config.BOT_SETTINGS = {"embed_color": "0xbc69f0", "moderation": {}}
+sys.modules.setdefault("config", config)
+
+from utils.automod_rules import MessageContext
+from utils.link_scanner import LinkScanner
+from utils.link_tokenizer import extract_links
+
+# Nested quantifiers: exponential on a run of "a" that doesn't end the string
+CATASTROPHIC = re.compile(r"(a|aa)+$")
+
+# Hosts written to slip past a link filter, and what must still be extracted
+EVASIONS = {
+    "..evil.tk": "evil.tk",
+    "-evil.tk": "evil.tk",
+    "_evil.tk": "evil.tk",
+    "evil.com_": "evil.com",
+    "x..evil.tk": "evil.tk",
+    "x-.evil.tk": "evil.tk",
+    "--evil.tk": "evil.tk",
+    "(--evil.tk)": "evil.tk",
+    "..--evil.tk": "evil.tk",
+    "see_evil.tk_now": "evil.tk",
+}
+
+def catastrophic_scan(text: str) -> list:
+    CATASTROPHIC.match(text)
+    return []
+
+def adversarial_inputs(length: int) -> dict:
+    def fill(unit: str, tail: str = "") -> str:
+        return unit * ((length - len(tail)) // len(unit)) + tail
+    return {
+        "dots and letters": fill("a."),
+        "letters then a dot": fill("a", "."),
+        "max-length labels": fill("a" * 63 + "."),
+        "hyphenated labels": fill("a-" * 31 + "a."),
+        "digit labels": fill("1."),
+        "scheme then labels": "http://" + fill("a.")[7:],
+        "userinfo run": "http://" + fill("a@")[7:],
+        "labels without a tld": fill("ab.", "-"),
+        "dot runs": fill("a.."),
+        "dash runs": fill("-a--a."),
+        "underscored labels": fill("_a.b"),
+        "junk before labels": fill(".-_a.a"),
+        "dashes before labels": fill("(" + "-" * 30 + "a."),
+        "url characters": fill("a.b-c_d%e~"),
+        "dotted words": fill("x.y. "),
+        "unique hosts": " ".join(f"h{i}.example.com" for i in range(length // 16)),
+        "unclosed emoji": "<:" + fill("a")[2:],
+        "all caps": fill("A"),
+        "plain chat": fill("the quick brown fox "),
+    }
+
+def best_of(fn, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000
+
+async def heartbeat(lags: list, stop: asyncio.Event, interval: float = 0.005) -> None:
+    """Record how late the event loop wakes us up"""
+    while not stop.is_set():
+        t0 = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append((time.perf_counter() - t0 - interval) * 1000)
+
+async def run_scanner(args, inputs: dict) -> bool:
+    ok = True
+    lags, stop = [], asyncio.Event()
+    beat = asyncio.create_task(heartbeat(lags, stop))
+
+    scanner = LinkScanner(timeout=args.deadline_ms / 1000)
+    await scanner.start()
+    worst = 0.0
+    for text in inputs.values():
+        t0 = time.perf_counter()
+        links = await scanner.scan(text)
+        worst = max(worst, (time.perf_counter() - t0) * 1000)
+        if links is None:
+            ok = False
+    await scanner.close()
+    print(f"worker scan, real tokenizer   worst {worst:8.2f} ms  {scanner.stats()}")
+
+    stuck = LinkScanner(timeout=args.deadline_ms / 1000, scan=catastrophic_scan)
+    await stuck.start()
+    t0 = time.perf_counter()
+    result = await stuck.scan("a" * 60 + "!")
+    elapsed = (time.perf_counter() - t0) * 1000
+    # The next scan gets a fresh pool, not the stuck worker
+    t1 = time.perf_counter()
+    await stuck.scan("a" * 5 + "!")
+    recovery = (time.perf_counter() - t1) * 1000
+    await stuck.close()
+    print(f"worker scan, catastrophic     {elapsed:8.2f} ms  fallback={result is None}  "
+          f"next scan {recovery:.2f} ms  {stuck.stats()}")
+    if result is not None or elapsed > args.deadline_ms + args.stall_budget_ms:
+        ok = False
+
+    stop.set()
+    await beat
+    max_lag = max(lags, default=0.0)
+    print(f"event loop max stall          {max_lag:8.2f} ms (budget {args.stall_budget_ms} ms)")
+    return ok and max_lag <= args.stall_budget_ms
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--length", type=int, default=4000, help="characters per adversarial message")
+    parser.add_argument("--inline-budget-ms", type=float, default=10)
+    parser.add_argument("--deadline-ms", type=float, default=250)
+    parser.add_argument("--stall-budget-ms", type=float, default=50)
+    args = parser.parse_args()
+
+    os.chdir(tempfile.mkdtemp(prefix="bench_adversarial_"))
+    import logging
+    logging.disable(logging.WARNING)
+    from cogs.automod import AutoMod
+    cog = AutoMod(types.SimpleNamespace())
+    cog.settings["rules"]["text_filter"]["banned_words"] = ["badword", "slur", "scam"]
+    cog._compile_text_filter()
+    cog._save_settings()
+
+    missed = 0
+    for text, host in EVASIONS.items():
+        found = [link.host for link in extract_links(text)]
+        if host not in found:
+            missed += 1
+            print(f"evasion {text!r:<20} found {found}, expected {host}")
+    ok = not missed
+    print(f"evasions caught               {len(EVASIONS) - missed}/{len(EVASIONS)}")
+    
+    inputs = adversarial_inputs(args.length)
+    print(f"{'input':<22} {'tokenizer':>10} {'pipeline':>10}")
+    for name, text in inputs.items():
+        tokenize_ms = best_of(lambda: extract_links(text))
+        # A fresh author each time so the spam rule doesn't fire
+        pipeline_ms = best_of(lambda: cog.rule_pipeline.evaluate(
+            MessageContext(text, hash(name), 1, 1, False, time.monotonic())
+        ))
+        flag = "" if max(tokenize_ms, pipeline_ms) <= args.inline_budget_ms else "  over budget"
+        ok = ok and not flag
+        print(f"{name:<22} {tokenize_ms:>8.2f}ms {pipeline_ms:>8.2f}ms{flag}")
+
+    ok = asyncio.run(run_scanner(args, inputs)) and ok
+    print("PASS" if ok else "FAIL")
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
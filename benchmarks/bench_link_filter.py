@@ -0,0 +1,135 @@
+"""Measure automod link extraction and the link rules over a synthetic chat corpus
+
+Compares the regex-plus-urlparse extraction the link filter used to run with
+the single-pass tokenizer, then times the cog's link rules on the tokens,
+including their per-host verdict cache.
+
+Usage: python benchmarks/bench_link_filter.py [--messages 50000] [--link-ratio 0.2] [--seed 1]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import types
+from urllib.parse import urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# config.py needs a .env with a real token; the cog only reads these names from it
+config = types.ModuleType("config")
+config.GUILD_ID = 1
+config.TOKEN = "benchmark"
+config.BOT_SETTINGS = {"embed_color": "0xbc69f0", "moderation": {}}
+sys.modules.setdefault("config", config)
+
+import re
+
+from utils.link_tokenizer import extract_links
+
+# The extraction the link filter ran before the tokenizer
+LEGACY_URL = re.compile(r'https?://(?:www\.)?[-a-zA-Z0-9@:%._\+~#=]{1,256}\.[a-zA-Z0-9()]{1,6}\b(?:[-a-zA-Z0-9()@:%_\+.~#?&//=]*)')
+LEGACY_BARE = re.compile(r'\b(?:www\.)?[-a-zA-Z0-9@:%._\+~#=]{1,256}\.[a-zA-Z0-9()]{1,6}\b(?:[-a-zA-Z0-9()@:%_\+.~#?&//=]*)')
+LEGACY_INVITE = re.compile(r'discord\.gg/[a-zA-Z0-9-]+')
+
+WORDS = (
+    "the quick brown fox jumps over lazy dog gg wp anyone up for a game tonight lol "
+    "check this out what do you think about the new patch i can't believe it"
+).split()
+LINKS = [
+    "https://github.com/user/repo/issues/42", "https://www.youtube.com/watch?v=dQw4w9WgXcQ",
+    "docs.python.org/3/library/re.html", "https://en.wikipedia.org/wiki/Trie", "discord.gg/abcdef",
+    "https://bit.ly/3xYz", "http://192.168.0.1/admin", "free-nitro.xyz/claim", "https://steamcommunity.ru/gift",
+    "https://news.bbc.co.uk/sport", "example.com", "https://cdn.discordapp.com/attachments/1/2/a.png",
+    "http://paypal.com@login-verify.tk/", "https://a1b2c3d4e5.net/x", "reddit.com/r/python"
+]
+
+def make_corpus(count: int, link_ratio: float, seed: int) -> list:
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(count):
+        words = [rng.choice(WORDS) for _ in range(rng.randint(3, 40))]
+        if rng.random() < link_ratio:
+            for _ in range(rng.randint(1, 3)):
+                words.insert(rng.randrange(len(words) + 1), rng.choice(LINKS))
+        elif rng.random() < 0.3:
+            # Dots that aren't links
+            words.append(rng.choice(["v1.5", "e.g.", "ok...", "file.txt", "3.14"]))
+        corpus.append(" ".join(words))
+    return corpus
+
+def legacy_extract(content: str) -> list:
+    urls = list(set(LEGACY_URL.findall(content) + LEGACY_BARE.findall(content)))
+    hosts = []
+    for url in urls:
+        if LEGACY_INVITE.search(url):
+            continue
+        # urlparse ran once in the trusted check and once in the suspicious check
+        for _ in range(2):
+            full = url if url.startswith(("http://", "https://")) else "https://" + url
+            host = urlparse(full.lower()).netloc.replace("www.", "")
+        hosts.append(host)
+    return hosts
+
+def percentile(samples: list, pct: float) -> float:
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * pct / 100))]
+
+def timed(fn, corpus: list):
+    samples, results = [], []
+    for content in corpus:
+        t0 = time.perf_counter_ns()
+        results.append(fn(content))
+        samples.append((time.perf_counter_ns() - t0) / 1000)
+    return samples, results
+
+def report(name: str, samples: list) -> None:
+    print(f"{name:<22} mean {statistics.fmean(samples):>7.2f} us  p50 {percentile(samples, 50):>7.2f} us  "
+          f"p99 {percentile(samples, 99):>7.2f} us")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=50000)
+    parser.add_argument("--link-ratio", type=float, default=0.2, help="share of messages with links")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    os.chdir(tempfile.mkdtemp(prefix="bench_links_"))
+    import logging
+    logging.disable(logging.INFO)
+    from cogs.automod import AutoMod
+    cog = AutoMod(types.SimpleNamespace())
+
+    corpus = make_corpus(args.messages, args.link_ratio, args.seed)
+
+    def rules(content: str) -> list:
+        verdicts = []
+        for link in extract_links(content):
+            if link.is_invite:
+                verdicts.append("invite")
+                continue
+            verdicts.append(cog._link_verdict(link))
+        return verdicts
+
+    legacy_us, legacy_hosts = timed(legacy_extract, corpus)
+    token_us, token_links = timed(extract_links, corpus)
+    rules_us, verdicts = timed(rules, corpus)
+
+    print(f"messages={args.messages} link_ratio={args.link_ratio}")
+    report("legacy extraction", legacy_us)
+    report("tokenizer", token_us)
+    report("tokenizer + rules", rules_us)
+    print(f"legacy matches     {sum(map(len, legacy_hosts)):>10,} (invites skipped)")
+    print(f"tokenizer links    {sum(map(len, token_links)):>10,}")
+    counts = {}
+    for message_verdicts in verdicts:
+        for verdict in message_verdicts:
+            counts[verdict] = counts.get(verdict, 0) + 1
+    print("rule verdicts      " + ", ".join(f"{name} {count:,}" for name, count in sorted(counts.items())))
+    stats = cog.link_verdicts.stats()
+    print(f"verdict cache      {stats['hit_ratio']:>10.1%} hits ({stats['size']} hosts cached)")
+
+if __name__ == "__main__":
+    main()
@@ -2,15 +2,30 @@ import discord
 from discord.ext import commands
 from discord import app_commands
 import re
+import ipaddress
 from typing import Optional, Dict, List, Set
 import json
 import os
-from datetime import datetime
+from datetime import datetime, timedelta
 import logging
+import time
 from config import BOT_SETTINGS
+from utils.word_matcher import BannedWordMatcher
+from utils.domain_rules import DomainRuleSet, normalize_domain, split_overbroad
+from utils.spam_tracker import SpamHit, SpamTracker
+from utils.link_tokenizer import Link
+from utils.ttl_cache import TTLCache
+from utils.link_scanner import LinkScanner
+from utils.log_batcher import LogBatcher, LogEntry
+from utils.automod_rules import (
+    DEFAULT_RULE_ORDER, AdvertisingRule, CapsRule, EmojiSpamRule, LinkFilterRule, MessageContext,
+    RuleCounters, RulePipeline, SpamRule, TextFilterRule, resolve_rule_order
+)
 
 logger = logging.getLogger(__name__)
 
+BULK_DELETE_MAX_AGE_DAYS = 14
+
 class AutoMod(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
@@ -35,8 +50,8 @@ class AutoMod(commands.Cog):
             'edx.org', 'udemy.com', 'skillshare.com', 'ted.com',
             'scholar.google.com', 'researchgate.net', 'arxiv.org',
             
-            # Government and official
-            'gov', 'mil', 'edu', 'org', 'net', 'com',
+            # Government and official (bare TLDs only when registration is restricted)
+            'gov', 'mil', 'edu',
             
             # Gaming and entertainment
             'steam.com', 'steampowered.com', 'epicgames.com', 'ea.com',
@@ -64,15 +79,24 @@ class AutoMod(commands.Cog):
             'elastic.co', 'kibana.org', 'grafana.com', 'prometheus.io'
         }
         
+        # Domains that are always blocked, even under a trusted domain
+        self.blocked_domains: Set[str] = set()
+        
         # Now load settings (which may update trusted_domains)
         self.settings = self._load_settings()
-        self.user_warnings = {}  # Store warnings per user: {user_id: warning_count}
         
-        # Initialize regex patterns
-        self.url_pattern = re.compile(r'https?://(?:www\.)?[-a-zA-Z0-9@:%._\+~#=]{1,256}\.[a-zA-Z0-9()]{1,6}\b(?:[-a-zA-Z0-9()@:%_\+.~#?&//=]*)')
-        self.bare_domain_pattern = re.compile(r'\b(?:www\.)?[-a-zA-Z0-9@:%._\+~#=]{1,256}\.[a-zA-Z0-9()]{1,6}\b(?:[-a-zA-Z0-9()@:%_\+.~#?&//=]*)')
-        self.invite_pattern = re.compile(r'discord\.gg/[a-zA-Z0-9-]+')
-        self.emoji_pattern = re.compile(r'<a?:\w+:\d+>')
+        # Imported lists (e.g. Tranco top sites) live in their own file, outside the settings modal
+        self.imported_domains_file = 'data/automod_imported_domains.json'
+        self.imported_domains = self._load_imported_domains()
+        self.domain_rules = DomainRuleSet()
+        # host -> "trusted", "blocked", "suspicious" or "clean"; cleared whenever the rules change
+        link_filter = self.settings.get("rules", {}).get("link_filter", {})
+        self.link_verdicts = TTLCache(
+            maxsize=link_filter.get("verdict_cache_size", 4096),
+            ttl=link_filter.get("verdict_cache_ttl", 600)
+        )
+        self._compile_domain_rules()
+        self.user_warnings = {}  # Store warnings per user: {user_id: warning_count}
         
         # Suspicious patterns that indicate sketchy links
         self.suspicious_patterns = [
@@ -84,59 +108,188 @@ class AutoMod(commands.Cog):
             r'[a-zA-Z0-9-]+\.(ru|cn|br|in|pk|ng|za|eg|ma|dz|tn|ly|sd|so|et|ke|ug|tz|rw|bi|mg|mz|zm|zw|bw|na|sz|ls|st|sc|mu|km|yt|re|io|sh|ac|ta|bv|hm|gs|fk|ai|aw|bl|bm|io|ky|ms|pn|tc|vg|wf|yt)',  # Suspicious country codes
         ]
         
-        # Compile suspicious patterns
-        self.suspicious_regex = re.compile('|'.join(self.suspicious_patterns), re.IGNORECASE)
+        # Compile suspicious patterns, matched against whole hosts or their suffixes
+        self.suspicious_regex = re.compile(r'(?:^|\.)(?:' + '|'.join(self.suspicious_patterns) + r')$', re.IGNORECASE)
+        
+        # Banned words compiled into one automaton, rebuilt when the list changes
+        self.word_matcher = BannedWordMatcher([])
+        self._compile_text_filter()
+        
+        # Per-author sliding windows for spam detection, rebuilt when the spam settings change
+        self.spam_tracker = SpamTracker()
+        self._configure_spam_tracker()
+        
+        # Links in huge messages are scanned in a worker process against a deadline
+        self.link_scanner = LinkScanner()
+        self.scan_offload_length = 2000
+        self.scan_timeout_verdict = "block"
         
-        # Message tracking for spam detection
-        self.message_history: Dict[int, List[Dict]] = {}  # channel_id -> list of messages
-        self.max_history = 10  # Keep last 10 messages per channel
+        # Violation and ban logs are batched so a raid can't use up the log channel's rate limit
+        self.log_batcher = LogBatcher(self._send_log_embeds, self._summarize_violations)
+        
+        # Enabled rules in evaluation order, recompiled whenever the settings are saved;
+        # the counters outlive each compiled pipeline
+        self.rule_counters: Dict[str, RuleCounters] = {}
+        self.rule_pipeline = RulePipeline([])
+        self._compile_rules()
 
-    def _is_trusted_domain(self, url: str) -> bool:
-        """Check if a URL is from a trusted domain"""
+    def _configure_spam_tracker(self) -> None:
+        """Build the spam tracker from the spam settings"""
         try:
-            from urllib.parse import urlparse
+            spam = self.settings["rules"]["spam"]
+            self.spam_tracker = SpamTracker(
+                max_messages=spam.get("max_messages", 5),
+                time_window=spam.get("time_window", 5),
+                cross_messages=spam.get("cross_channel_messages", 8),
+                cross_window=spam.get("cross_channel_window", 10),
+                started=time.monotonic()
+            )
+        except Exception as e:
+            logger.error(f"Error configuring spam tracker: {e}")
+
+    def _compile_rules(self) -> None:
+        """Compile the enabled rules, in the configured order, from a snapshot of the settings"""
+        try:
+            rules = self.settings["rules"]
+            builders = {
+                "spam": lambda config: SpamRule(config["punishment"], self.spam_tracker),
+                "advertising": lambda config: AdvertisingRule(
+                    config["punishment"], config.get("block_invites", True), config.get("block_urls", True)
+                ),
+                "link_filter": lambda config: LinkFilterRule(
+                    config["punishment"], self._link_verdict, config.get("allow_trusted_only", False)
+                ),
+                # A filter without words can never match
+                "text_filter": lambda config: (
+                    TextFilterRule(config["punishment"], self.word_matcher) if len(self.word_matcher) else None
+                ),
+                "caps": lambda config: CapsRule(config["punishment"], config["min_length"], config["threshold"]),
+                "emoji_spam": lambda config: EmojiSpamRule(config["punishment"], config["max_emojis"])
+            }
             
-            # Add scheme if missing (for bare domains like bit.ly/abc)
-            if not url.startswith(('http://', 'https://')):
-                url = 'https://' + url
-                
-            parsed = urlparse(url.lower())
-            domain = parsed.netloc.replace('www.', '')
+            compiled = []
+            for key in resolve_rule_order(self.settings.get("rule_order", DEFAULT_RULE_ORDER)):
+                config = rules.get(key, {})
+                if config.get("enabled"):
+                    rule = builders[key](config)
+                    if rule is not None:
+                        compiled.append(rule)
             
-            # Check if domain is in trusted list
-            if domain in self.trusted_domains:
-                return True
-                
-            # Check if any part of the domain matches trusted patterns
-            for trusted in self.trusted_domains:
-                if trusted in domain or domain.endswith('.' + trusted):
-                    return True
-                    
-            return False
+            link_filter = rules.get("link_filter", {})
+            self.scan_offload_length = link_filter.get("scan_offload_length", 2000)
+            self.scan_timeout_verdict = link_filter.get("scan_timeout_verdict", "block")
+            self.link_scanner.timeout = link_filter.get("scan_timeout_ms", 500) / 1000
+            self.log_batcher.interval = self.settings.get("log_batch_interval", 2)
+            self.log_batcher.summary_threshold = self.settings.get("log_summary_threshold", 10)
+            
+            whitelist = self.settings.get("whitelist", {})
+            self.rule_pipeline = RulePipeline(
+                compiled,
+                whitelist_roles=whitelist.get("roles", []),
+                whitelist_channels=whitelist.get("channels", []),
+                counters=self.rule_counters
+            )
+            logger.info(f"Compiled automod rules: {', '.join(rule.key for rule in compiled) or 'none'}")
         except Exception as e:
-            logger.error(f"Error checking trusted domain: {e}")
-            return False
+            logger.error(f"Error compiling automod rules: {e}")
 
-    def _is_suspicious_link(self, url: str) -> bool:
-        """Check if a URL matches suspicious patterns"""
+    def _compile_text_filter(self) -> None:
+        """Build the banned word matcher from the text filter settings"""
         try:
+            text_filter = self.settings["rules"]["text_filter"]
+            self.word_matcher = BannedWordMatcher(
+                text_filter.get("banned_words", []),
+                whole_word=text_filter.get("whole_word", False),
+                leetspeak=text_filter.get("leetspeak", False)
+            )
+            logger.info(f"Compiled {len(self.word_matcher)} banned words for the text filter")
+        except Exception as e:
+            logger.error(f"Error compiling banned words: {e}")
+
+    def _compile_domain_rules(self) -> None:
+        """Build the domain allow/deny rules from the trusted, imported and blocked lists"""
+        try:
+            self.domain_rules = DomainRuleSet(
+                allow=self.trusted_domains | self.imported_domains,
+                deny=self.blocked_domains
+            )
+            self.url_shorteners = {
+                normalize_domain(domain)
+                for domain in self.settings.get("rules", {}).get("link_filter", {}).get("url_shorteners", [])
+            }
+            self.link_verdicts.clear()
+            logger.info(
+                f"Compiled domain rules: {len(self.domain_rules.allow)} trusted, "
+                f"{len(self.domain_rules.deny)} blocked"
+            )
+        except Exception as e:
+            logger.error(f"Error compiling domain rules: {e}")
+
+    def _sanitize_domains(self, domains, source: str) -> Set[str]:
+        """Normalize a domain list and drop bare TLDs such as 'com' that would match every site"""
+        kept, dropped = split_overbroad(domains)
+        if dropped:
+            logger.warning(
+                f"Ignoring bare TLDs in {source}: {', '.join(dropped)} "
+                f"(they would match every domain under them)"
+            )
+        return kept
+
+    def _load_imported_domains(self) -> Set[str]:
+        """Load imported trusted domains from their own file"""
+        try:
+            if os.path.exists(self.imported_domains_file):
+                with open(self.imported_domains_file, 'r') as f:
+                    data = json.load(f)
+                return set(data.get("domains", []))
+        except Exception as e:
+            logger.error(f"Error loading imported domains: {e}")
+        return set()
+
+    def _save_imported_domains(self, source: str) -> None:
+        """Save imported trusted domains to their own file"""
+        try:
+            with open(self.imported_domains_file, 'w') as f:
+                json.dump({"source": source, "domains": sorted(self.imported_domains)}, f)
+        except Exception as e:
+            logger.error(f"Error saving imported domains: {e}")
+
+    def _domain_verdict(self, link: Link) -> Optional[bool]:
+        """True if a link is under a trusted domain, False if blocked, None if neither"""
+        try:
+            return self.domain_rules.verdict(link.host)
+        except Exception as e:
+            logger.error(f"Error checking domain rules: {e}")
+            return None
+
+    def _link_verdict(self, link: Link) -> str:
+        """"trusted", "blocked", "suspicious" or "clean" for a link's host, cached per host"""
+        now = time.monotonic()
+        verdict = self.link_verdicts.get(link.host, now)
+        if verdict is None:
+            rule = self._domain_verdict(link)
+            if rule is not None:
+                verdict = "trusted" if rule else "blocked"
+            else:
+                verdict = "suspicious" if self._is_suspicious_link(link) else "clean"
+            self.link_verdicts.put(link.host, verdict, now)
+        return verdict
+
+    def _is_trusted_domain(self, link: Link) -> bool:
+        """Check if a link is from a trusted domain"""
+        return self._domain_verdict(link) is True
+
+    def _is_suspicious_link(self, link: Link) -> bool:
+        """Check if a link matches suspicious patterns"""
+        try:
+            domain = link.host[4:] if link.host.startswith('www.') else link.host
+            
             # Check for suspicious patterns
-            if self.suspicious_regex.search(url):
-                logger.info(f"URL matched suspicious regex: {url}")
+            if self.suspicious_regex.search(domain):
+                logger.info(f"URL matched suspicious regex: {link.url}")
                 return True
-                
-            # Check for IP addresses
-            from urllib.parse import urlparse
-            
-            # Add scheme if missing (for bare domains like bit.ly/abc)
-            if not url.startswith(('http://', 'https://')):
-                url = 'https://' + url
-                
-            parsed = urlparse(url)
-            domain = parsed.netloc.replace('www.', '')
             
             # Check if domain is an IP address
-            import ipaddress
             try:
                 ipaddress.ip_address(domain)
                 logger.info(f"Domain is IP address: {domain}")
@@ -145,9 +298,7 @@ class AutoMod(commands.Cog):
                 pass
                 
             # Check for URL shorteners (often used for malicious links)
-            url_shorteners = self.settings.get("rules", {}).get("link_filter", {}).get("url_shorteners", [])
-            
-            if domain.lower() in url_shorteners:
+            if domain in self.url_shorteners or link.registrable_domain in self.url_shorteners:
                 logger.info(f"Domain {domain} is a URL shortener, blocking")
                 return True
                 
@@ -180,6 +331,8 @@ class AutoMod(commands.Cog):
                         settings["rules"]["spam"] = {}
                     if "warning_limit" not in settings["rules"]["spam"]:
                         settings["rules"]["spam"]["warning_limit"] = 5
+                    settings["rules"]["spam"].setdefault("cross_channel_messages", 8)
+                    settings["rules"]["spam"].setdefault("cross_channel_window", 10)
                     
                     # Ensure link_filter settings exist
                     if "link_filter" not in settings["rules"]:
@@ -215,27 +368,43 @@ class AutoMod(commands.Cog):
                             "vzturl.com", "7vd.cn", "virl.ws", "qr.ae", "adsby.pl", "Digg.com",
                             "redd.it", "tr.im", "Bookmark.com"
                         ]
+                    settings.setdefault("rule_order", list(DEFAULT_RULE_ORDER))
+                    settings.setdefault("log_batch_interval", 2)
+                    settings.setdefault("log_summary_threshold", 10)
+                    settings["rules"]["link_filter"].setdefault("scan_offload_length", 2000)
+                    settings["rules"]["link_filter"].setdefault("scan_timeout_ms", 500)
+                    settings["rules"]["link_filter"].setdefault("scan_timeout_verdict", "block")
+                    settings["rules"]["link_filter"].setdefault("verdict_cache_size", 4096)
+                    settings["rules"]["link_filter"].setdefault("verdict_cache_ttl", 600)
                     
                     # Load trusted domains from settings if they exist
                     if "trusted_domains" in settings:
-                        self.trusted_domains = set(settings["trusted_domains"])
-                    else:
-                        # Use default trusted domains if none saved
-                        settings["trusted_domains"] = list(self.trusted_domains)
+                        self.trusted_domains = self._sanitize_domains(settings["trusted_domains"], "trusted domains")
+                    # Saved back without any bare TLDs that were dropped
+                    settings["trusted_domains"] = list(self.trusted_domains)
+                    
+                    self.blocked_domains = self._sanitize_domains(settings.get("blocked_domains", []), "blocked domains")
+                    settings["blocked_domains"] = list(self.blocked_domains)
                     
                     return settings
             
             default_settings = {
                 "enabled": False,
                 "log_channel": None,
+                "log_batch_interval": 2,  # seconds violation logs collect before they're sent
+                "log_summary_threshold": 10,  # more queued violations than this are sent as a summary
                 "trusted_domains": list(self.trusted_domains),
+                "blocked_domains": [],
+                "rule_order": list(DEFAULT_RULE_ORDER),
                 "rules": {
                     "spam": {
                         "enabled": True,
                         "max_messages": 5,
                         "time_window": 5,  # seconds
                         "punishment": "delete",  # delete, warn, mute
-                        "warning_limit": 5  # Number of warnings before ban
+                        "warning_limit": 5,  # Number of warnings before ban
+                        "cross_channel_messages": 8,  # Same author across several channels
+                        "cross_channel_window": 10  # seconds
                     },
                     "advertising": {
                         "enabled": True,
@@ -259,11 +428,18 @@ class AutoMod(commands.Cog):
                             "yourls.org", "xlinkz.net", "a.gy", "qr.net", "1url.com", "tweez.me",
                             "vzturl.com", "7vd.cn", "virl.ws", "qr.ae", "adsby.pl", "Digg.com",
                             "redd.it", "tr.im", "Bookmark.com"
-                        ]
+                        ],
+                        "scan_offload_length": 2000,  # characters; longer messages are scanned off the event loop
+                        "scan_timeout_ms": 500,
+                        "scan_timeout_verdict": "block",  # block or allow messages whose scan times out
+                        "verdict_cache_size": 4096,  # hosts
+                        "verdict_cache_ttl": 600  # seconds
                     },
                     "text_filter": {
                         "enabled": True,
                         "banned_words": [],
+                        "whole_word": False,
+                        "leetspeak": False,
                         "punishment": "delete"
                     },
                     "caps": {
@@ -297,11 +473,15 @@ class AutoMod(commands.Cog):
         try:
             # Update trusted domains in settings before saving
             self.settings["trusted_domains"] = list(self.trusted_domains)
+            self.settings["blocked_domains"] = list(self.blocked_domains)
             
             with open(self.settings_file, 'w') as f:
                 json.dump(self.settings, f, indent=4)
         except Exception as e:
             logger.error(f"Error saving automod settings: {e}")
+        
+        # Every settings change goes through here, so the rules pick it up
+        self._compile_rules()
 
     async def _send_ban_log(self, embed: discord.Embed, action_type: str) -> None:
         """Send ban log to the configured channel"""
@@ -319,9 +499,9 @@ class AutoMod(commands.Cog):
                 logger.warning(f"Ban log channel {ban_log_channel_id} not found or not a text channel")
                 return
             
-            # Send the log message
-            await channel.send(embed=embed)
-            logger.info(f"Sent automod {action_type} log to channel {channel.name}")
+            # Queued ahead of routine violation logs
+            self.log_batcher.add_priority(channel.id, embed)
+            logger.info(f"Queued automod {action_type} log for channel {channel.name}")
             
         except Exception as e:
             logger.error(f"Error sending automod ban log: {e}")
@@ -372,12 +552,76 @@ class AutoMod(commands.Cog):
             if message.content:
                 embed.add_field(name="Message Content", value=message.content[:1000], inline=False)
                 
-            await channel.send(embed=embed)
-            logger.info(f"Sent automod violation log to channel {channel.name} ({channel.id})")
+            self.log_batcher.add(channel.id, LogEntry(
+                embed=embed,
+                user_id=message.author.id,
+                user=message.author.mention,
+                rule=rule,
+                action=action_taken,
+                channel=channel_mention,
+                details=details
+            ))
             
         except Exception as e:
             logger.error(f"Error logging automod violation: {e}")
 
+    async def _send_log_embeds(self, channel_id: int, embeds: List[discord.Embed]) -> None:
+        """Send a batch of queued log embeds as one message"""
+        channel = self.bot.get_channel(channel_id)
+        if not channel or not isinstance(channel, discord.TextChannel):
+            logger.warning(f"Log channel {channel_id} not found or not a text channel")
+            return
+        await channel.send(embeds=embeds)
+        logger.info(f"Sent {len(embeds)} automod log embeds to channel {channel.name} ({channel.id})")
+
+    def _summarize_violations(self, entries: List[LogEntry]) -> List[discord.Embed]:
+        """One line per user for a batch too big to log message by message"""
+        users: Dict[int, List[LogEntry]] = {}
+        for entry in entries:
+            users.setdefault(entry.user_id, []).append(entry)
+        
+        def counted(values: List[str]) -> str:
+            counts: Dict[str, int] = {}
+            for value in values:
+                counts[value] = counts.get(value, 0) + 1
+            return ", ".join(value if count == 1 else f"{value} ×{count}" for value, count in counts.items())
+        
+        lines = []
+        for user_id, user_entries in users.items():
+            channels = ", ".join(dict.fromkeys(entry.channel for entry in user_entries))
+            lines.append(
+                f"{user_entries[0].user} (`{user_id}`) **{len(user_entries)}×** "
+                f"{counted([entry.rule for entry in user_entries])} → "
+                f"{counted([entry.action for entry in user_entries])} in {channels}\n"
+                f"└ {user_entries[-1].details[:100]}"
+            )
+        
+        # Descriptions hold 4096 characters, so long summaries run over several embeds
+        pages: List[List[str]] = [[]]
+        size = 0
+        for line in lines:
+            line = line[:1000]
+            if pages[-1] and size + len(line) + 1 > 4000:
+                pages.append([])
+                size = 0
+            pages[-1].append(line)
+            size += len(line) + 1
+        
+        embeds = []
+        for number, page in enumerate(pages, 1):
+            title = f"🚫 AutoMod Violations: {len(entries)} by {len(users)} users"
+            if len(pages) > 1:
+                title += f" ({number}/{len(pages)})"
+            embed = discord.Embed(
+                title=title,
+                description="\n".join(page),
+                color=discord.Color.red(),
+                timestamp=datetime.utcnow()
+            )
+            embed.set_footer(text=f"Summarized: more than {self.log_batcher.summary_threshold} violations within {self.log_batcher.interval}s")
+            embeds.append(embed)
+        return embeds
+
     async def _handle_violation(self, message: discord.Message, rule: str, 
                               details: str, punishment: str) -> bool:
         """Handle automod violations with appropriate punishments"""
@@ -531,6 +775,69 @@ class AutoMod(commands.Cog):
             logger.error(f"Error handling automod violation: {e}")
             return False
 
+    async def _delete_spam(self, message: discord.Message, hit: SpamHit) -> None:
+        """Delete the messages in a spam window, straight from the tracked IDs"""
+        # Discord refuses to bulk delete messages older than 14 days
+        bulk_cutoff = discord.utils.time_snowflake(
+            discord.utils.utcnow() - timedelta(days=BULK_DELETE_MAX_AGE_DAYS) + timedelta(minutes=1)
+        )
+        
+        for channel_id, message_ids in hit.by_channel().items():
+            channel = message.guild.get_channel_or_thread(channel_id) if message.guild else None
+            if channel is None:
+                if channel_id != message.channel.id:
+                    continue
+                channel = message.channel
+            
+            try:
+                if not hit.complete:
+                    # The tracker started inside the window; pick up what it didn't see
+                    after = discord.utils.utcnow() - timedelta(seconds=hit.window)
+                    known = set(message_ids)
+                    async for msg in channel.history(limit=100, after=after):
+                        if msg.author.id == message.author.id and msg.id not in known:
+                            message_ids.append(msg.id)
+                
+                bulk = [discord.Object(id=message_id) for message_id in message_ids if message_id > bulk_cutoff]
+                single = [message_id for message_id in message_ids if message_id <= bulk_cutoff]
+                
+                # Delete messages in chunks of 100
+                for i in range(0, len(bulk), 100):
+                    chunk = bulk[i:i + 100]
+                    try:
+                        await channel.delete_messages(chunk)
+                    except discord.HTTPException as e:
+                        logger.error(f"Failed to delete message chunk: {e}")
+                        # Try to delete messages individually as fallback
+                        single.extend(msg.id for msg in chunk)
+                
+                for message_id in single:
+                    try:
+                        await channel.get_partial_message(message_id).delete()
+                    except discord.HTTPException:
+                        pass
+                    
+            except Exception as e:
+                logger.error(f"Failed to delete spam messages in channel {channel_id}: {e}")
+
+    async def cog_load(self) -> None:
+        """Start the link scanning worker processes"""
+        try:
+            await self.link_scanner.start()
+        except Exception as e:
+            logger.error(f"Error starting link scanner: {e}")
+
+    async def cog_unload(self) -> None:
+        """Stop the link scanning worker processes and send any queued logs"""
+        try:
+            await self.link_scanner.close()
+        except Exception as e:
+            logger.error(f"Error stopping link scanner: {e}")
+        try:
+            await self.log_batcher.close()
+        except Exception as e:
+            logger.error(f"Error flushing automod logs: {e}")
+
     @commands.Cog.listener()
     async def on_message(self, message: discord.Message):
         """Handle incoming messages for automod checks"""
@@ -541,211 +848,39 @@ class AutoMod(commands.Cog):
         if message.author.bot:
             return
             
-        # Check if user/channel is whitelisted (for non-link filtering)
-        is_whitelisted = (
-            any(role.id in self.settings["whitelist"]["roles"] for role in message.author.roles) or
-            message.channel.id in self.settings["whitelist"]["channels"]
+        pipeline = self.rule_pipeline
+        ctx = MessageContext(
+            message.content,
+            message.author.id,
+            message.channel.id,
+            message.id,
+            # Whitelisted roles and channels skip every rule except the link filter
+            pipeline.is_whitelisted((role.id for role in message.author.roles), message.channel.id),
+            time.monotonic()
         )
-            
-        # Initialize message history for channel if needed
-        if message.channel.id not in self.message_history:
-            self.message_history[message.channel.id] = []
-            
-        # Add message to history
-        self.message_history[message.channel.id].append({
-            "timestamp": datetime.utcnow().timestamp(),
-            "content": message.content,
-            "author": message.author.id,
-            "id": message.id
-        })
-        
-        # Trim history
-        if len(self.message_history[message.channel.id]) > self.max_history:
-            self.message_history[message.channel.id].pop(0)
-            
-        # Check for spam (skip if whitelisted)
-        if not is_whitelisted and self.settings["rules"]["spam"]["enabled"]:
-            recent_messages = [
-                msg for msg in self.message_history[message.channel.id]
-                if msg["author"] == message.author.id and
-                datetime.utcnow().timestamp() - msg["timestamp"] <= self.settings["rules"]["spam"]["time_window"]
-            ]
-            
-            if len(recent_messages) >= self.settings["rules"]["spam"]["max_messages"]:
-                # Get the oldest message timestamp
-                oldest_timestamp = min(msg["timestamp"] for msg in recent_messages)
-                
-                try:
-                    # Fetch messages in bulk using channel history
-                    messages_to_delete = []
-                    async for msg in message.channel.history(
-                        limit=100,  # Discord's max limit
-                        after=datetime.fromtimestamp(oldest_timestamp),
-                        before=datetime.utcnow()
-                    ):
-                        if msg.author.id == message.author.id:
-                            messages_to_delete.append(msg)
-                    
-                    # Delete messages in chunks of 100
-                    for i in range(0, len(messages_to_delete), 100):
-                        chunk = messages_to_delete[i:i + 100]
-                        try:
-                            await message.channel.delete_messages(chunk)
-                        except discord.HTTPException as e:
-                            logger.error(f"Failed to delete message chunk: {e}")
-                            # Try to delete messages individually as fallback
-                            for msg in chunk:
-                                try:
-                                    await msg.delete()
-                                except:
-                                    pass
-                        
-                except Exception as e:
-                    logger.error(f"Failed to delete spam messages: {e}")
-                
-                # Clear the message history for this user in this channel
-                self.message_history[message.channel.id] = [
-                    msg for msg in self.message_history[message.channel.id]
-                    if msg["author"] != message.author.id
-                ]
-                
-                # Log only one violation
-                await self._handle_violation(
-                    message,
-                    "Spam",
-                    f"User sent {len(recent_messages)} messages in {self.settings['rules']['spam']['time_window']} seconds",
-                    self.settings["rules"]["spam"]["punishment"]
-                )
-                return
-                
-        # Check for advertising (skip if whitelisted)
-        if not is_whitelisted and self.settings["rules"]["advertising"]["enabled"]:
-            # Only check if message might contain invites or URLs
-            content_lower = message.content.lower()
-            has_potential_ads = (
-                'discord.gg' in content_lower or
-                'http' in content_lower or
-                'www.' in content_lower
-            )
-            
-            if has_potential_ads:
-                if self.settings["rules"]["advertising"]["block_invites"]:
-                    if self.invite_pattern.search(message.content):
-                        await self._handle_violation(
-                            message,
-                            "Advertising",
-                            "Discord invite link detected",
-                            self.settings["rules"]["advertising"]["punishment"]
-                        )
-                        return
-                        
-                if self.settings["rules"]["advertising"]["block_urls"]:
-                    if self.url_pattern.search(message.content):
-                        await self._handle_violation(
-                            message,
-                            "Advertising",
-                            "URL detected",
-                            self.settings["rules"]["advertising"]["punishment"]
-                        )
-                        return
-                    
-        # Check for sketchy links - BLOCK EVERYONE including admins and owner
-        if self.settings["rules"]["link_filter"]["enabled"]:
-            # Only check messages that might contain links (URLs, domains, or suspicious patterns)
-            content_lower = message.content.lower()
-            has_potential_links = (
-                'http' in content_lower or 
-                'www.' in content_lower or
-                '.' in content_lower or  # Basic domain check
-                any(pattern.replace('\\', '').replace('.', '') in content_lower for pattern in self.suspicious_patterns)
-            )
-            
-            if has_potential_links:
-                # Find both full URLs and bare domains
-                full_urls = self.url_pattern.findall(message.content)
-                bare_domains = self.bare_domain_pattern.findall(message.content)
-                
-                # Combine and deduplicate URLs
-                all_urls = list(set(full_urls + bare_domains))
-                
-                for url in all_urls:
-                    # Skip if it's a Discord invite
-                    if self.invite_pattern.search(url):
-                        continue
-                    
-                    # Check if domain is trusted FIRST - trusted domains should never be blocked
-                    is_trusted = self._is_trusted_domain(url)
-                    
-                    if is_trusted:
-                        # Trusted domains are allowed - no logging needed
-                        continue
-                        
-                    # If allow_trusted_only is enabled, block untrusted domains
-                    if self.settings["rules"]["link_filter"]["allow_trusted_only"]:
-                        logger.info(f"Blocking untrusted domain: {url}")
-                        await self._handle_violation(
-                            message,
-                            "Link Filter",
-                            f"Untrusted domain detected: {url}",
-                            self.settings["rules"]["link_filter"]["punishment"]
-                        )
-                        return
-                    
-                    # Only check for suspicious patterns if domain is not trusted
-                    is_suspicious = self._is_suspicious_link(url)
-                    
-                    if is_suspicious:
-                        logger.info(f"Blocking suspicious link: {url}")
-                        await self._handle_violation(
-                            message,
-                            "Link Filter",
-                            f"Suspicious link detected: {url}",
-                            self.settings["rules"]["link_filter"]["punishment"]
-                        )
-                        return
-                    
-        # Check for banned words (skip if whitelisted)
-        if not is_whitelisted and self.settings["rules"]["text_filter"]["enabled"]:
-            # Only check if there are banned words configured
-            banned_words = self.settings["rules"]["text_filter"]["banned_words"]
-            if banned_words:
-                content_lower = message.content.lower()
-                for word in banned_words:
-                    if word.lower() in content_lower:
-                        await self._handle_violation(
-                            message,
-                            "Text Filter",
-                            f"Banned word detected: {word}",
-                            self.settings["rules"]["text_filter"]["punishment"]
-                        )
-                        return
-                    
-        # Check for excessive caps (skip if whitelisted)
-        if not is_whitelisted and self.settings["rules"]["caps"]["enabled"]:
-            if len(message.content) >= self.settings["rules"]["caps"]["min_length"]:
-                caps_count = sum(1 for c in message.content if c.isupper())
-                if caps_count / len(message.content) >= self.settings["rules"]["caps"]["threshold"]:
-                    await self._handle_violation(
-                        message,
-                        "Excessive Caps",
-                        f"Message contains {caps_count}/{len(message.content)} uppercase characters",
-                        self.settings["rules"]["caps"]["punishment"]
-                    )
-                    return
-                    
-        # Check for emoji spam (skip if whitelisted)
-        if not is_whitelisted and self.settings["rules"]["emoji_spam"]["enabled"]:
-            # Only check if message contains emoji characters
-            if '<' in message.content and '>' in message.content:
-                emoji_count = len(self.emoji_pattern.findall(message.content))
-                if emoji_count > self.settings["rules"]["emoji_spam"]["max_emojis"]:
-                    await self._handle_violation(
-                        message,
-                        "Emoji Spam",
-                        f"Message contains {emoji_count} emojis",
-                        self.settings["rules"]["emoji_spam"]["punishment"]
-                    )
+        
+        # Huge messages get their links scanned in a worker process so a slow scan can't stall the bot
+        link_rule = pipeline.link_rule(ctx) if len(ctx.content) > self.scan_offload_length else None
+        if link_rule is not None:
+            links = await self.link_scanner.scan(ctx.content)
+            if links is None:
+                if self.scan_timeout_verdict == "block":
+                    # Blamed on the rule that asked for the scan, with that rule's punishment
+                    violation = link_rule.violation(f"Link scan timed out on a {len(ctx.content)} character message")
+                    await self._handle_violation(message, violation.rule, violation.details, violation.punishment)
                     return
+                links = []
+            ctx.links = links
+        
+        # Rules run in the configured order and stop at the first violation
+        violation = pipeline.evaluate(ctx)
+        if violation is None:
+            return
+        
+        if violation.spam_hit:
+            await self._delete_spam(message, violation.spam_hit)
+        
+        await self._handle_violation(message, violation.rule, violation.details, violation.punishment)
 
     @app_commands.command(name="automod")
     @app_commands.default_permissions(administrator=True)
@@ -804,6 +939,161 @@ class AutoMod(commands.Cog):
                 ephemeral=True
             )
 
+    @app_commands.command(name="automodstats", description="Show how often each automod rule runs, hits and how long it takes")
+    @app_commands.default_permissions(administrator=True)
+    async def automodstats(self, interaction: discord.Interaction):
+        """Show per-rule automod counters"""
+        try:
+            enabled = [rule.key for rule in self.rule_pipeline.rules]
+            lines = [f"{'rule':<12} {'runs':>8} {'skipped':>8} {'hits':>6} {'total ms':>9} {'avg us':>7}"]
+            for key in resolve_rule_order(self.settings.get("rule_order", DEFAULT_RULE_ORDER)):
+                counters = self.rule_counters.get(key, RuleCounters())
+                average = counters.nanoseconds / counters.evaluations / 1000 if counters.evaluations else 0
+                name = key if key in enabled else f"({key})"
+                lines.append(
+                    f"{name:<12} {counters.evaluations:>8,} {counters.skipped:>8,} {counters.hits:>6,} "
+                    f"{counters.nanoseconds / 1e6:>9.1f} {average:>7.1f}"
+                )
+            
+            embed = discord.Embed(
+                title="🛡️ AutoMod Rule Stats",
+                description="```\n" + "\n".join(lines) + "\n```",
+                color=discord.Color.blue()
+            )
+            scanner = self.link_scanner.stats()
+            embed.add_field(
+                name="Off-loop Link Scans",
+                value=f"{scanner['scans']:,} messages over {self.scan_offload_length:,} characters, "
+                      f"{scanner['timeouts']:,} timed out ({self.scan_timeout_verdict})",
+                inline=False
+            )
+            logs = self.log_batcher.stats()
+            embed.add_field(
+                name="Log Batching",
+                value=f"{logs['entries']:,} log entries sent as {logs['messages']:,} messages "
+                      f"({logs['summaries']:,} summaries), {logs['queued']:,} waiting",
+                inline=False
+            )
+            embed.set_footer(text="Rules run top to bottom and stop at the first hit; skipped = ruled out by the prefilter; (disabled)")
+            await interaction.response.send_message(embed=embed, ephemeral=True)
+        except Exception as e:
+            logger.error(f"Error showing automod stats: {e}")
+            await interaction.response.send_message(
+                "❌ Failed to show automod stats",
+                ephemeral=True
+            )
+
+    @app_commands.command(name="linkcachestats", description="Show how often link checks are answered from the cache")
+    @app_commands.default_permissions(administrator=True)
+    async def linkcachestats(self, interaction: discord.Interaction):
+        """Show link verdict cache statistics"""
+        try:
+            stats = self.link_verdicts.stats()
+            embed = discord.Embed(
+                title="🔗 Link Verdict Cache",
+                color=discord.Color.blue()
+            )
+            embed.add_field(name="Hit Ratio", value=f"{stats['hit_ratio']:.1%}", inline=True)
+            embed.add_field(name="Hits / Misses", value=f"{stats['hits']:,} / {stats['misses']:,}", inline=True)
+            embed.add_field(name="Hosts Cached", value=f"{stats['size']:,} / {stats['maxsize']:,}", inline=True)
+            embed.add_field(
+                name="Dropped",
+                value=f"{stats['evictions']:,} evicted, {stats['expirations']:,} expired (TTL {stats['ttl']:g}s)",
+                inline=False
+            )
+            await interaction.response.send_message(embed=embed, ephemeral=True)
+        except Exception as e:
+            logger.error(f"Error showing link cache stats: {e}")
+            await interaction.response.send_message(
+                "❌ Failed to show link cache stats",
+                ephemeral=True
+            )
+
+    @app_commands.command(name="blocklistimport")
+    @app_commands.default_permissions(administrator=True)
+    @app_commands.describe(
+        file="Text file with one banned word or phrase per line (commas also separate)",
+        replace="Replace the current list instead of adding to it"
+    )
+    async def blocklistimport(self, interaction: discord.Interaction, file: discord.Attachment, replace: bool = False):
+        """Import a banned word list for the text filter"""
+        try:
+            await interaction.response.defer(ephemeral=True)
+            text = (await file.read()).decode("utf-8-sig", errors="replace")
+            imported = [
+                word.strip() for line in text.splitlines() for word in line.split(",")
+                if word.strip() and not word.strip().startswith("#")
+            ]
+            
+            text_filter = self.settings["rules"]["text_filter"]
+            words = [] if replace else list(text_filter["banned_words"])
+            known = {word.lower() for word in words}
+            for word in imported:
+                if word.lower() not in known:
+                    known.add(word.lower())
+                    words.append(word)
+            added = len(words) - (0 if replace else len(text_filter["banned_words"]))
+            text_filter["banned_words"] = words
+            
+            self._compile_text_filter()
+            self._save_settings()
+            
+            await interaction.followup.send(
+                f"✅ Imported `{file.filename}`: {added} new words, {len(self.word_matcher)} banned words in total",
+                ephemeral=True
+            )
+        except Exception as e:
+            logger.error(f"Error importing blocklist: {e}")
+            await interaction.followup.send(
+                "❌ Failed to import the blocklist",
+                ephemeral=True
+            )
+
+    @app_commands.command(name="trustedimport", description="Import a top-sites list (e.g. Tranco) as trusted domains")
+    @app_commands.default_permissions(administrator=True)
+    @app_commands.describe(
+        file="CSV of rank,domain (the Tranco format) or one domain per line",
+        limit="How many domains to take from the top of the list",
+        replace="Replace the imported list instead of adding to it"
+    )
+    async def trustedimport(self, interaction: discord.Interaction, file: discord.Attachment,
+                            limit: app_commands.Range[int, 1, 1000000] = 10000, replace: bool = True):
+        """Import trusted domains from a ranked top-sites list"""
+        try:
+            await interaction.response.defer(ephemeral=True)
+            text = (await file.read()).decode("utf-8-sig", errors="replace")
+            
+            imported = []
+            for line in text.splitlines():
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                # "rank,domain" rows keep the domain; a plain list is one domain per line
+                domain = normalize_domain(line.rsplit(",", 1)[-1])
+                if domain and domain != "domain":
+                    imported.append(domain)
+                    if len(imported) >= limit:
+                        break
+            
+            domains = self._sanitize_domains(imported, f"imported list {file.filename}")
+            previous = len(self.imported_domains)
+            self.imported_domains = domains if replace else self.imported_domains | domains
+            self._save_imported_domains(file.filename)
+            self._compile_domain_rules()
+            
+            added = len(self.imported_domains) - (0 if replace else previous)
+            await interaction.followup.send(
+                f"✅ Imported `{file.filename}`: {added} domains "
+                f"({len(self.imported_domains)} imported, {len(self.domain_rules.allow)} trusted in total)",
+                ephemeral=True
+            )
+        except Exception as e:
+            logger.error(f"Error importing trusted domains: {e}")
+            await interaction.followup.send(
+                "❌ Failed to import trusted domains",
+                ephemeral=True
+            )
+
 
 
 class AutoModSettingsView(discord.ui.View):
@@ -820,6 +1110,7 @@ class AutoModSettingsView(discord.ui.View):
         self.add_item(TextFilterButton(cog))
         self.add_item(TrustedLinksButton(cog))
         self.add_item(WhitelistButton(cog))
+        self.add_item(RuleOrderButton(cog))
 
 class EnableDisableButton(discord.ui.Button):
     def __init__(self, cog: AutoMod):
@@ -908,13 +1199,27 @@ class SpamSettingsModal(discord.ui.Modal):
             default=str(self.cog.settings["rules"]["spam"].get("warning_limit", 5))
         ))
         
+        # Add text input for the cross-channel window
+        self.add_item(discord.ui.TextInput(
+            label="Cross-Channel Limit (messages/seconds)",
+            placeholder="Messages across channels per window (default: 8/10)",
+            default=(
+                f"{self.cog.settings['rules']['spam'].get('cross_channel_messages', 8)}/"
+                f"{self.cog.settings['rules']['spam'].get('cross_channel_window', 10)}"
+            )
+        ))
+        
     async def on_submit(self, interaction: discord.Interaction):
         try:
+            cross_messages, cross_window = self.children[4].value.split("/")
             self.cog.settings["rules"]["spam"]["max_messages"] = int(self.children[0].value)
             self.cog.settings["rules"]["spam"]["time_window"] = int(self.children[1].value)
             self.cog.settings["rules"]["spam"]["punishment"] = self.children[2].value.lower()
             self.cog.settings["rules"]["spam"]["warning_limit"] = int(self.children[3].value)
+            self.cog.settings["rules"]["spam"]["cross_channel_messages"] = int(cross_messages)
+            self.cog.settings["rules"]["spam"]["cross_channel_window"] = int(cross_window)
             
+            self.cog._configure_spam_tracker()
             self.cog._save_settings()
             
             await interaction.response.send_message(
@@ -1050,6 +1355,7 @@ class LinkFilterModal(discord.ui.Modal, title="Link Filter Settings"):
             self.cog.settings["rules"]["link_filter"]["punishment"] = self.punishment.value.lower()
             
             # Save settings
+            self.cog.link_verdicts.clear()
             self.cog._save_settings()
             
             await interaction.response.send_message(
@@ -1078,33 +1384,65 @@ class TextFilterModal(discord.ui.Modal):
     def __init__(self, cog: AutoMod):
         super().__init__(title="Text Filter Settings")
         self.cog = cog
+        text_filter = cog.settings["rules"]["text_filter"]
         
-        # Add text input for banned words
-        self.add_item(discord.ui.TextInput(
+        # Large imported blocklists don't fit in a text input; leave them out and keep them on submit
+        banned_words = ",".join(text_filter["banned_words"])
+        self.words_too_long = len(banned_words) > 4000
+        self.banned_words = discord.ui.TextInput(
             label="Banned Words",
-            placeholder="Enter banned words (comma-separated)",
-            default=",".join(cog.settings["rules"]["text_filter"]["banned_words"])
-        ))
+            placeholder=(
+                f"{len(text_filter['banned_words'])} words loaded; leave blank to keep them"
+                if self.words_too_long else "Enter banned words (comma-separated)"
+            ),
+            default=None if self.words_too_long else banned_words,
+            style=discord.TextStyle.paragraph,
+            required=False
+        )
+        
+        self.whole_word = discord.ui.TextInput(
+            label="Whole Words Only",
+            placeholder="true/false (if true, 'ass' won't match 'class')",
+            default=str(text_filter.get("whole_word", False)).lower(),
+            max_length=5
+        )
+        
+        self.leetspeak = discord.ui.TextInput(
+            label="Match Leetspeak",
+            placeholder="true/false (if true, 'b4d' matches 'bad')",
+            default=str(text_filter.get("leetspeak", False)).lower(),
+            max_length=5
+        )
         
         # Add text input for punishment
-        self.add_item(discord.ui.TextInput(
+        self.punishment = discord.ui.TextInput(
             label="Punishment",
             placeholder="Enter punishment (delete/warn/mute/ban)",
-            default=cog.settings["rules"]["text_filter"]["punishment"]
-        ))
+            default=text_filter["punishment"]
+        )
+        
+        self.add_item(self.banned_words)
+        self.add_item(self.whole_word)
+        self.add_item(self.leetspeak)
+        self.add_item(self.punishment)
         
     async def on_submit(self, interaction: discord.Interaction):
         try:
-            self.cog.settings["rules"]["text_filter"]["banned_words"] = [
-                word.strip() for word in self.children[0].value.split(",")
-                if word.strip()
-            ]
-            self.cog.settings["rules"]["text_filter"]["punishment"] = self.children[1].value.lower()
+            text_filter = self.cog.settings["rules"]["text_filter"]
+            if self.banned_words.value.strip() or not self.words_too_long:
+                text_filter["banned_words"] = [
+                    word.strip() for word in self.banned_words.value.split(",")
+                    if word.strip()
+                ]
+            text_filter["whole_word"] = self.whole_word.value.lower() == "true"
+            text_filter["leetspeak"] = self.leetspeak.value.lower() == "true"
+            text_filter["punishment"] = self.punishment.value.lower()
             
+            self.cog._compile_text_filter()
             self.cog._save_settings()
             
             await interaction.response.send_message(
-                "Text filter settings updated successfully!",
+                f"Text filter settings updated successfully! ({len(self.cog.word_matcher)} banned words)",
                 ephemeral=True
             )
         except ValueError:
@@ -1131,35 +1469,59 @@ class TrustedLinksModal(discord.ui.Modal):
         super().__init__(title="Trusted Links Settings")
         self.cog = cog
         
-        # Add text inputs for trusted domains
+        # Long lists don't fit in a text input; leave them out and keep them on submit
+        trusted = ",".join(sorted(cog.trusted_domains))
+        self.trusted_too_long = len(trusted) > 4000
         self.trusted_domains_input = discord.ui.TextInput(
             label="Trusted Domains",
-            placeholder="Enter trusted domains (comma-separated)",
-            default=",".join(cog.trusted_domains),
+            placeholder=(
+                f"{len(cog.trusted_domains)} domains loaded; leave blank to keep them"
+                if self.trusted_too_long else "Enter trusted domains (comma-separated)"
+            ),
+            default=None if self.trusted_too_long else trusted,
+            style=discord.TextStyle.paragraph,
+            required=False
+        )
+        
+        blocked = ",".join(sorted(cog.blocked_domains))
+        self.blocked_too_long = len(blocked) > 4000
+        self.blocked_domains_input = discord.ui.TextInput(
+            label="Blocked Domains",
+            placeholder=(
+                f"{len(cog.blocked_domains)} domains loaded; leave blank to keep them"
+                if self.blocked_too_long else "Always blocked, even under a trusted domain (comma-separated)"
+            ),
+            default=None if self.blocked_too_long else blocked,
             style=discord.TextStyle.paragraph,
             required=False
         )
         
         self.add_item(self.trusted_domains_input)
+        self.add_item(self.blocked_domains_input)
         
     async def on_submit(self, interaction: discord.Interaction):
         try:
-            # Parse the trusted domains from the input
-            domains_input = self.trusted_domains_input.value.strip()
-            if domains_input:
-                new_domains = [
-                    domain.strip().lower() for domain in domains_input.split(",")
-                    if domain.strip()
-                ]
-                self.cog.trusted_domains = set(new_domains)
-            else:
-                self.cog.trusted_domains = set()
+            # Parse the domains from the inputs; bare TLDs such as "com" are dropped
+            if self.trusted_domains_input.value.strip() or not self.trusted_too_long:
+                self.cog.trusted_domains = self.cog._sanitize_domains(
+                    self.trusted_domains_input.value.split(","), "trusted domains"
+                )
+            if self.blocked_domains_input.value.strip() or not self.blocked_too_long:
+                self.cog.blocked_domains = self.cog._sanitize_domains(
+                    self.blocked_domains_input.value.split(","), "blocked domains"
+                )
             
             # Save the settings
+            self.cog._compile_domain_rules()
             self.cog._save_settings()
             
+            dropped = split_overbroad(
+                self.trusted_domains_input.value.split(",") + self.blocked_domains_input.value.split(",")
+            )[1]
+            note = f"\n⚠️ Ignored bare TLDs that would match every site: {', '.join(dropped)}" if dropped else ""
             await interaction.response.send_message(
-                f"✅ Trusted links updated successfully! ({len(self.cog.trusted_domains)} domains)",
+                f"✅ Trusted links updated successfully! ({len(self.cog.trusted_domains)} trusted, "
+                f"{len(self.cog.blocked_domains)} blocked, {len(self.cog.imported_domains)} imported){note}",
                 ephemeral=True
             )
         except Exception as e:
@@ -1223,6 +1585,51 @@ class WhitelistModal(discord.ui.Modal):
                 ephemeral=True
             )
 
+class RuleOrderButton(discord.ui.Button):
+    def __init__(self, cog: AutoMod):
+        super().__init__(
+            label="Rule Order",
+            style=discord.ButtonStyle.secondary,
+            emoji="🔀"
+        )
+        self.cog = cog
+        
+    async def callback(self, interaction: discord.Interaction):
+        modal = RuleOrderModal(self.cog)
+        await interaction.response.send_modal(modal)
+
+class RuleOrderModal(discord.ui.Modal):
+    def __init__(self, cog: AutoMod):
+        super().__init__(title="Rule Order")
+        self.cog = cog
+        
+        # Add text input for the evaluation order
+        self.order = discord.ui.TextInput(
+            label="Evaluation Order",
+            placeholder=", ".join(DEFAULT_RULE_ORDER),
+            default=", ".join(resolve_rule_order(cog.settings.get("rule_order", DEFAULT_RULE_ORDER))),
+            style=discord.TextStyle.paragraph
+        )
+        
+        self.add_item(self.order)
+        
+    async def on_submit(self, interaction: discord.Interaction):
+        try:
+            # Unknown names are dropped and rules left out keep their default place at the end
+            order = resolve_rule_order(
+                key.strip().lower() for key in self.order.value.split(",") if key.strip()
+            )
+            self.cog.settings["rule_order"] = order
+            self.cog._save_settings()
+            
+            await interaction.response.send_message(
+                f"✅ Rules now run in this order: {', '.join(order)}",
+                ephemeral=True
+            )
+        except Exception as e:
+            logger.error(f"Error saving rule order: {e}")
+            await interaction.response.send_message("❌ Failed to save the rule order", ephemeral=True)
+
 async def setup(bot: commands.Bot):
     logger.info("Setting up AutoMod cog...")
     try:
@@ -7,10 +7,33 @@ import os
 from typing import Dict, Optional, List
 from config import GUILD_ID, BOT_SETTINGS
 import random
+import copy
+import shutil
+import asyncio
+import aiohttp
+import time
+import math
+from bisect import bisect_right
+from collections import deque
 from datetime import datetime
+from utils.bulk_xp import BulkPlan, XPTable, plan_decay, plan_recalculate, plan_seasonal_reset, progress
+from utils.level_transfer import MAX_STORED_INT, ImportReader, ParsedChunk, detect_format, write_export_rows
+from utils.leveling_store import JournalBackend, SqliteBackend, WriteBehindStore
+from utils.level_curve import LevelCurve
+from utils.rank_index import LeaderboardIndex
+from utils.user_record import ActiveMultiplier, UserRecord, memory_report
+from utils.xp_filter import MessageFingerprintFilter
+from utils.xp_multipliers import ExpiryScheduler, RollTable
 
 logger = logging.getLogger(__name__)
 GUILD = discord.Object(id=GUILD_ID)
+# Rows handled per step of /levelimport and /levelexport before yielding to the event loop
+TRANSFER_CHUNK_ROWS = 5000
+TRANSFER_PROGRESS_INTERVAL = 2.0
+
+# Bounds for admin-entered multipliers and scheduled events; NaN and infinity are refused too
+MAX_XP_MULTIPLIER = 100
+MAX_MULTIPLIER_EVENT_HOURS = 24 * 365
 
 class BaseSettingsView(discord.ui.View):
     def __init__(self, cog: 'Leveling', previous_view=None):
@@ -34,12 +57,19 @@ class LevelSettingsView(BaseSettingsView):
     @discord.ui.button(label="🔄 Toggle", style=discord.ButtonStyle.primary)
     async def toggle(self, interaction: discord.Interaction, button: discord.ui.Button):
         self.cog.settings["enabled"] = not self.cog.settings.get("enabled", True)
+        settled = []
+        if self.cog.settings["enabled"]:
+            self.cog._rebuild_voice_sessions()
+        else:
+            # Credit voice time up to now; nothing is earned while leveling is off
+            settled = self.cog._settle_voice_sessions(close=True)
         self.cog._save_settings()
         status = "enabled" if self.cog.settings["enabled"] else "disabled"
         await interaction.response.send_message(
             f"Leveling system {status}!",
             ephemeral=True
         )
+        await self.cog._announce_voice_level_ups(settled)
 
     @discord.ui.button(label="📝 Set Channel", style=discord.ButtonStyle.primary)
     async def set_channel(self, interaction: discord.Interaction, button: discord.ui.Button):
@@ -99,6 +129,15 @@ class LevelSettingsView(BaseSettingsView):
         embed = create_message_templates_embed(self.cog)
         await interaction.response.edit_message(embed=embed, view=view)
 
+    @discord.ui.button(label="📦 Bulk XP", style=discord.ButtonStyle.danger)
+    async def bulk_xp(self, interaction: discord.Interaction, button: discord.ui.Button):
+        view = BulkXPView(self.cog)
+        await interaction.response.send_message(
+            "Select a bulk operation. You'll see a preview before anything changes:",
+            view=view,
+            ephemeral=True
+        )
+
 class LevelRewardsView(discord.ui.View):
     def __init__(self, cog: 'Leveling'):
         super().__init__(timeout=120)
@@ -115,6 +154,42 @@ class LevelRewardsView(discord.ui.View):
             button.callback = self.make_callback(level)
             self.add_item(button)
 
+        resync_button = discord.ui.Button(
+            label="🔄 Resync All Members",
+            style=discord.ButtonStyle.primary,
+            custom_id="resync_roles"
+        )
+        resync_button.callback = self.resync_roles
+        self.add_item(resync_button)
+
+    async def resync_roles(self, interaction: discord.Interaction):
+        task = self.cog._role_resync_task
+        if task and not task.done():
+            await interaction.response.send_message(
+                "A role reward resync is already running!",
+                ephemeral=True
+            )
+            return
+
+        await interaction.response.send_message(
+            "Resyncing reward roles for all tracked members. Edits are paced to stay under rate limits; "
+            "you'll get a summary here when it's done.",
+            ephemeral=True
+        )
+
+        async def run_resync():
+            try:
+                result = await self.cog._resync_reward_roles()
+                await interaction.followup.send(
+                    f"Role reward resync done: {result['checked']} members checked, "
+                    f"{result['updated']} updated, {result['failed']} failed.",
+                    ephemeral=True
+                )
+            except Exception as e:
+                logger.error(f"Error resyncing role rewards: {e}")
+
+        self.cog._role_resync_task = asyncio.create_task(run_resync())
+
     def make_callback(self, level: int):
         async def callback(interaction: discord.Interaction):
             view = RoleRewardView(self.cog, level)
@@ -211,6 +286,7 @@ class RoleRewardView(discord.ui.View):
             role_rewards = self.cog.settings.get("role_rewards", {})
             role_rewards[str(self.level)] = role_id
             self.cog.settings["role_rewards"] = role_rewards
+            self.cog._compile_role_rewards()
             self.cog._save_settings()
             
             await interaction.response.send_message(
@@ -251,15 +327,33 @@ class XPSettingsModal(discord.ui.Modal, title="Configure XP Settings"):
             required=True
         )
         
+        self.voice_xp = discord.ui.TextInput(
+            label="Voice XP per minute",
+            placeholder="Enter voice XP per minute, 0 to disable (default: 10)",
+            default=str(self.cog.settings.get("voice_xp_per_minute", 10)),
+            required=True
+        )
+        
+        self.min_entropy = discord.ui.TextInput(
+            label="Minimum message entropy (bits/char)",
+            placeholder="Messages below this earn no XP, 0 to disable (default: 1.0)",
+            default=str(self.cog.settings.get("xp_min_entropy", 1.0)),
+            required=True
+        )
+        
         self.add_item(self.min_xp)
         self.add_item(self.max_xp)
         self.add_item(self.cooldown)
+        self.add_item(self.voice_xp)
+        self.add_item(self.min_entropy)
 
     async def on_submit(self, interaction: discord.Interaction):
         try:
             min_xp = int(self.min_xp.value)
             max_xp = int(self.max_xp.value)
             cooldown = int(self.cooldown.value)
+            voice_xp = int(self.voice_xp.value)
+            min_entropy = float(self.min_entropy.value)
             
             if min_xp > max_xp:
                 await interaction.response.send_message(
@@ -275,15 +369,42 @@ class XPSettingsModal(discord.ui.Modal, title="Configure XP Settings"):
                 )
                 return
             
+            if voice_xp < 0:
+                await interaction.response.send_message(
+                    "Voice XP per minute cannot be negative!",
+                    ephemeral=True
+                )
+                return
+            
+            if min_entropy < 0:
+                await interaction.response.send_message(
+                    "Minimum entropy cannot be negative!",
+                    ephemeral=True
+                )
+                return
+            
+            was_voice_enabled = self.cog.settings.get("voice_xp_per_minute", 10) > 0
+            settled = []
+            if voice_xp <= 0:
+                # Credit what's been earned at the old rate, then stop tracking
+                settled = self.cog._settle_voice_sessions(close=True)
             self.cog.settings["min_xp"] = min_xp
             self.cog.settings["max_xp"] = max_xp
             self.cog.settings["xp_cooldown"] = cooldown
+            self.cog.settings["voice_xp_per_minute"] = voice_xp
+            self.cog.settings["xp_min_entropy"] = min_entropy
+            self.cog._configure_message_filter()
+            if voice_xp > 0 and not was_voice_enabled:
+                self.cog._rebuild_voice_sessions()
             self.cog._save_settings()
             
             await interaction.response.send_message(
-                f"XP settings updated!\nMin: {min_xp}\nMax: {max_xp}\nCooldown: {cooldown}s",
+                f"XP settings updated!\nMin: {min_xp}\nMax: {max_xp}\nCooldown: {cooldown}s\n"
+                f"Voice XP: {voice_xp}/min\nMin entropy: {min_entropy}",
                 ephemeral=True
             )
+            # Role rewards can take a while, so they wait until the interaction has its response
+            await self.cog._announce_voice_level_ups(settled)
         except ValueError:
             await interaction.response.send_message(
                 "Please enter valid numbers!",
@@ -458,25 +579,25 @@ class UserManagementView(discord.ui.View):
             # Get user data
             user_data = self.cog._get_user_data(user.id)
             
-            # Remove all role rewards
-            for level in self.cog.settings["role_rewards"].values():
-                role = user.guild.get_role(level)
-                if role and role in user.roles:
-                    try:
-                        await user.remove_roles(role)
-                    except discord.Forbidden:
-                        logger.error(f"Could not remove role {role.name} from {user}")
+            # Remove all role rewards in one edit
+            try:
+                await self.cog._reconcile_reward_roles(user, 0)
+            except discord.HTTPException as e:
+                logger.error(f"Could not remove role rewards from {user}: {e}")
             
             # Reset user data
-            user_data["level"] = 0
-            user_data["xp"] = 0
-            user_data["total_xp"] = 0  # Reset total XP
-            user_data["last_xp_gain"] = 0
-            user_data["streak"] = 0
-            user_data["last_streak_date"] = None
-            user_data["highest_streak"] = 0
-            
-            # Save changes
+            user_data.level = 0
+            user_data.xp = 0
+            user_data.total_xp = 0  # Reset total XP
+            user_data.last_xp_gain = 0
+            user_data.last_active = 0
+            user_data.streak = 0
+            user_data.last_streak_date = None
+            user_data.highest_streak = 0
+            
+            # Save changes and move them to the bottom of the leaderboard
+            self.cog.store.mark_dirty(user.id)
+            self.cog._index_user(user.id)
             self.cog._save_settings()
             
             await interaction.response.send_message(
@@ -525,16 +646,22 @@ class AmountInputModal(discord.ui.Modal, title="Enter Amount"):
             amount = int(self.amount.value)
             
             if self.action == "add_xp":
-                user_data["xp"] += amount
+                old_level = self.cog._apply_xp_change(user_data, amount)
+                if user_data.level != old_level:
+                    await self.cog._handle_role_rewards(user.id, user_data.level)
                 await interaction.response.send_message(
-                    f"Added {amount} XP to {user.mention}. New total: {user_data['xp']}",
+                    f"Added {amount} XP to {user.mention}. Now level {user_data.level} "
+                    f"with {user_data.xp} XP (total: {user_data.total_xp})",
                     ephemeral=True
                 )
             
             elif self.action == "remove_xp":
-                user_data["xp"] = max(0, user_data["xp"] - amount)
+                old_level = self.cog._apply_xp_change(user_data, -amount)
+                if user_data.level != old_level:
+                    await self.cog._handle_role_rewards(user.id, user_data.level)
                 await interaction.response.send_message(
-                    f"Removed {amount} XP from {user.mention}. New total: {user_data['xp']}",
+                    f"Removed {amount} XP from {user.mention}. Now level {user_data.level} "
+                    f"with {user_data.xp} XP (total: {user_data.total_xp})",
                     ephemeral=True
                 )
             
@@ -546,29 +673,33 @@ class AmountInputModal(discord.ui.Modal, title="Enter Amount"):
                     )
                     return
                 
-                # Remove old level rewards
-                old_level = user_data["level"]
-                for level in self.cog.settings["role_rewards"].values():
-                    role = user.guild.get_role(level)
-                    if role and role in user.roles:
-                        try:
-                            await user.remove_roles(role)
-                        except discord.Forbidden:
-                            logger.error(f"Could not remove role {role.name} from {user}")
+                max_level = self.cog.level_curve.max_level
+                if amount > max_level:
+                    await interaction.response.send_message(
+                        f"Level cannot be above the level cap ({max_level})!",
+                        ephemeral=True
+                    )
+                    return
                 
-                # Set new level and reset XP
-                user_data["level"] = amount
-                user_data["xp"] = 0
+                # Set new level, reset XP and line total XP up with the level threshold
+                user_data.level = amount
+                user_data.xp = 0
+                user_data.total_xp = self.cog.level_curve.threshold(amount)
                 
-                # Add new level rewards
-                await self.cog._handle_role_rewards(user.id, amount)
+                # Swap reward roles for the new level in one edit
+                try:
+                    await self.cog._reconcile_reward_roles(user, amount)
+                except discord.HTTPException as e:
+                    logger.error(f"Could not update role rewards for {user}: {e}")
                 
                 await interaction.response.send_message(
                     f"Set {user.mention}'s level to {amount}",
                     ephemeral=True
                 )
             
-            # Save changes
+            # Save changes and reposition them on the leaderboard
+            self.cog.store.mark_dirty(user.id)
+            self.cog._index_user(user.id)
             self.cog._save_settings()
             
         except ValueError:
@@ -606,6 +737,14 @@ class XPMultiplierView(BaseSettingsView):
         set_channel_button.callback = self.set_channel_multiplier
         self.add_item(set_channel_button)
         
+        schedule_button = discord.ui.Button(
+            label="Schedule Event",
+            style=discord.ButtonStyle.primary,
+            custom_id="schedule_mult"
+        )
+        schedule_button.callback = self.schedule_multiplier
+        self.add_item(schedule_button)
+        
         remove_button = discord.ui.Button(
             label="Remove Multiplier",
             style=discord.ButtonStyle.danger,
@@ -622,6 +761,10 @@ class XPMultiplierView(BaseSettingsView):
         modal = ChannelMultiplierModal(self.cog)
         await interaction.response.send_modal(modal)
 
+    async def schedule_multiplier(self, interaction: discord.Interaction):
+        modal = ScheduleMultiplierModal(self.cog)
+        await interaction.response.send_modal(modal)
+
     async def remove_multiplier(self, interaction: discord.Interaction):
         view = RemoveMultiplierView(self.cog, self)
         await interaction.response.edit_message(
@@ -653,36 +796,33 @@ class GlobalMultiplierModal(discord.ui.Modal, title="Set Global XP Multiplier"):
     async def on_submit(self, interaction: discord.Interaction):
         try:
             multiplier = float(self.multiplier.value)
-            if multiplier < 0:
+            if not 0 <= multiplier <= MAX_XP_MULTIPLIER:
                 await interaction.response.send_message(
-                    "Multiplier cannot be negative!",
+                    f"Multiplier must be between 0 and {MAX_XP_MULTIPLIER}!",
                     ephemeral=True
                 )
                 return
-                
-            self.cog.settings["xp_multipliers"]["global"] = multiplier
             
+            active_until = None
             if self.duration.value:
                 try:
                     duration = int(self.duration.value)
-                    if duration < 1:
+                    if not 1 <= duration <= MAX_MULTIPLIER_EVENT_HOURS:
                         await interaction.response.send_message(
-                            "Duration must be at least 1 hour!",
+                            f"Duration must be between 1 and {MAX_MULTIPLIER_EVENT_HOURS} hours!",
                             ephemeral=True
                         )
                         return
-                    self.cog.settings["xp_multipliers"]["active_until"] = (
-                        datetime.now().timestamp() + (duration * 3600)
-                    )
+                    active_until = datetime.now().timestamp() + (duration * 3600)
                 except ValueError:
                     await interaction.response.send_message(
                         "Please enter a valid number for duration!",
                         ephemeral=True
                     )
                     return
-            else:
-                self.cog.settings["xp_multipliers"]["active_until"] = None
             
+            # Set the multiplier and arm its expiry timer
+            self.cog._set_global_multiplier(multiplier, active_until)
             self.cog._save_settings()
             
             await interaction.response.send_message(
@@ -697,14 +837,78 @@ class GlobalMultiplierModal(discord.ui.Modal, title="Set Global XP Multiplier"):
                 ephemeral=True
             )
 
+class ScheduleMultiplierModal(discord.ui.Modal, title="Schedule XP Multiplier Event"):
+    def __init__(self, cog: 'Leveling'):
+        super().__init__()
+        self.cog = cog
+        
+        self.multiplier = discord.ui.TextInput(
+            label="Multiplier",
+            placeholder="Enter multiplier (e.g., 2.0 for double XP)",
+            required=True
+        )
+        
+        self.starts_in = discord.ui.TextInput(
+            label="Starts in (hours)",
+            placeholder="e.g., 24 to start this time tomorrow",
+            required=True
+        )
+        
+        self.duration = discord.ui.TextInput(
+            label="Duration (hours)",
+            placeholder="How long the event lasts",
+            required=True
+        )
+        
+        self.add_item(self.multiplier)
+        self.add_item(self.starts_in)
+        self.add_item(self.duration)
+
+    async def on_submit(self, interaction: discord.Interaction):
+        try:
+            multiplier = float(self.multiplier.value)
+            starts_in = float(self.starts_in.value)
+            duration = float(self.duration.value)
+            # NaN fails every comparison and infinity can't become a timestamp, so check these first
+            if not all(map(math.isfinite, (multiplier, starts_in, duration))):
+                await interaction.response.send_message(
+                    "Please enter finite numbers!",
+                    ephemeral=True
+                )
+                return
+            if (not 0 <= multiplier <= MAX_XP_MULTIPLIER
+                    or not 0 <= starts_in <= MAX_MULTIPLIER_EVENT_HOURS
+                    or not 0 < duration <= MAX_MULTIPLIER_EVENT_HOURS):
+                await interaction.response.send_message(
+                    f"The multiplier must be between 0 and {MAX_XP_MULTIPLIER}; the start time and "
+                    f"duration can be at most {MAX_MULTIPLIER_EVENT_HOURS} hours, and the duration must be positive!",
+                    ephemeral=True
+                )
+                return
+            
+            starts_at = datetime.now().timestamp() + starts_in * 3600
+            event = self.cog._add_multiplier_event(multiplier, starts_at, starts_at + duration * 3600)
+            
+            await interaction.response.send_message(
+                f"Scheduled a {multiplier}x XP event from <t:{int(event['starts_at'])}:f> "
+                f"to <t:{int(event['ends_at'])}:f>",
+                ephemeral=True
+            )
+            
+        except ValueError:
+            await interaction.response.send_message(
+                "Please enter valid numbers!",
+                ephemeral=True
+            )
+
 class ChannelMultiplierModal(discord.ui.Modal, title="Set Channel XP Multiplier"):
     def __init__(self, cog: 'Leveling'):
         super().__init__()
         self.cog = cog
         
         self.channel = discord.ui.TextInput(
-            label="Channel ID",
-            placeholder="Enter channel ID",
+            label="Channel or Category ID",
+            placeholder="Enter a channel ID, or a category ID to cover every channel in it",
             required=True
         )
         
@@ -729,18 +933,24 @@ class ChannelMultiplierModal(discord.ui.Modal, title="Set Channel XP Multiplier"
                 return
                 
             multiplier = float(self.multiplier.value)
-            if multiplier < 0:
+            if not 0 <= multiplier <= MAX_XP_MULTIPLIER:
                 await interaction.response.send_message(
-                    "Multiplier cannot be negative!",
+                    f"Multiplier must be between 0 and {MAX_XP_MULTIPLIER}!",
                     ephemeral=True
                 )
                 return
             
-            self.cog.settings["xp_multipliers"]["channels"][str(channel_id)] = multiplier
+            if isinstance(channel, discord.CategoryChannel):
+                self.cog.settings["xp_multipliers"].setdefault("categories", {})[str(channel_id)] = multiplier
+                target = f"every channel in **{channel.name}**"
+            else:
+                self.cog.settings["xp_multipliers"]["channels"][str(channel_id)] = multiplier
+                target = channel.mention
+            self.cog._compile_channel_multipliers()
             self.cog._save_settings()
             
             await interaction.response.send_message(
-                f"Set XP multiplier to {multiplier}x for {channel.mention}",
+                f"Set XP multiplier to {multiplier}x for {target}",
                 ephemeral=True
             )
             
@@ -763,9 +973,21 @@ class RemoveMultiplierView(BaseSettingsView):
                 button = discord.ui.Button(
                     label=f"Remove {channel.name} ({multiplier}x)",
                     style=discord.ButtonStyle.danger,
-                    custom_id=f"remove_{channel_id}",
-                    callback=self.make_remove_callback(channel_id)
+                    custom_id=f"remove_{channel_id}"
+                )
+                button.callback = self.make_remove_callback("channels", channel_id)
+                self.add_item(button)
+        
+        # Add buttons for each category with a multiplier
+        for category_id, multiplier in self.cog.settings["xp_multipliers"].get("categories", {}).items():
+            category = self.cog.bot.get_channel(int(category_id))
+            if category:
+                button = discord.ui.Button(
+                    label=f"Remove category {category.name} ({multiplier}x)",
+                    style=discord.ButtonStyle.danger,
+                    custom_id=f"remove_category_{category_id}"
                 )
+                button.callback = self.make_remove_callback("categories", category_id)
                 self.add_item(button)
         
         # Add button to reset global multiplier
@@ -773,16 +995,37 @@ class RemoveMultiplierView(BaseSettingsView):
             button = discord.ui.Button(
                 label="Reset Global Multiplier",
                 style=discord.ButtonStyle.danger,
-                custom_id="reset_global",
-                callback=self.reset_global_multiplier
+                custom_id="reset_global"
             )
+            button.callback = self.reset_global_multiplier
             self.add_item(button)
+        
+        # Add buttons to cancel scheduled multiplier events
+        for event in self.cog.settings["xp_multipliers"].get("scheduled", []):
+            start = datetime.fromtimestamp(event["starts_at"]).strftime("%b %d %H:%M")
+            button = discord.ui.Button(
+                label=f"Cancel {event['multiplier']}x event ({start})",
+                style=discord.ButtonStyle.danger,
+                custom_id=f"cancel_event_{event['id']}"
+            )
+            button.callback = self.make_cancel_event_callback(event["id"])
+            self.add_item(button)
+
+    def make_cancel_event_callback(self, event_id: int):
+        async def callback(interaction: discord.Interaction):
+            self.cog._cancel_multiplier_event(event_id)
+            await interaction.response.send_message(
+                "Cancelled the scheduled XP multiplier event",
+                ephemeral=True
+            )
+        return callback
 
-    def make_remove_callback(self, channel_id: str):
+    def make_remove_callback(self, kind: str, channel_id: str):
         async def callback(interaction: discord.Interaction):
             channel = self.cog.bot.get_channel(int(channel_id))
             if channel:
-                del self.cog.settings["xp_multipliers"]["channels"][channel_id]
+                self.cog.settings["xp_multipliers"][kind].pop(channel_id, None)
+                self.cog._compile_channel_multipliers()
                 self.cog._save_settings()
                 await interaction.response.send_message(
                     f"Removed XP multiplier for {channel.mention}",
@@ -791,8 +1034,7 @@ class RemoveMultiplierView(BaseSettingsView):
         return callback
 
     async def reset_global_multiplier(self, interaction: discord.Interaction):
-        self.cog.settings["xp_multipliers"]["global"] = 1.0
-        self.cog.settings["xp_multipliers"]["active_until"] = None
+        self.cog._set_global_multiplier(1.0)
         self.cog._save_settings()
         await interaction.response.send_message(
             "Reset global XP multiplier to 1x",
@@ -803,7 +1045,7 @@ def create_xp_multiplier_embed(cog: 'Leveling') -> discord.Embed:
     """Create the XP multiplier settings overview embed"""
     embed = discord.Embed(
         title="⚡ XP Multiplier Settings",
-        description="Configure XP multipliers for channels or the entire server:",
+        description="Configure XP multipliers for channels, categories or the entire server:",
         color=cog.embed_color
     )
     
@@ -841,6 +1083,32 @@ def create_xp_multiplier_embed(cog: 'Leveling') -> discord.Embed:
                 inline=False
             )
     
+    # Add category multipliers
+    category_multipliers = cog.settings["xp_multipliers"].get("categories", {})
+    category_text = ""
+    for category_id, mult in category_multipliers.items():
+        category = cog.bot.get_channel(int(category_id))
+        if category:
+            category_text += f"**{category.name}**: {mult}x\n"
+    if category_text:
+        embed.add_field(
+            name="Category Multipliers",
+            value=category_text,
+            inline=False
+        )
+    
+    # Add scheduled multiplier events
+    events = cog.settings["xp_multipliers"].get("scheduled", [])
+    if events:
+        embed.add_field(
+            name="Scheduled Events",
+            value="\n".join(
+                f"{event['multiplier']}x from <t:{int(event['starts_at'])}:f> to <t:{int(event['ends_at'])}:f>"
+                for event in sorted(events, key=lambda e: e["starts_at"])
+            ),
+            inline=False
+        )
+    
     return embed
 
 def create_remove_multiplier_embed(cog: 'Leveling') -> discord.Embed:
@@ -866,6 +1134,20 @@ def create_remove_multiplier_embed(cog: 'Leveling') -> discord.Embed:
                 inline=False
             )
     
+    # Add category multipliers
+    category_multipliers = cog.settings["xp_multipliers"].get("categories", {})
+    category_text = ""
+    for category_id, mult in category_multipliers.items():
+        category = cog.bot.get_channel(int(category_id))
+        if category:
+            category_text += f"**{category.name}**: {mult}x\n"
+    if category_text:
+        embed.add_field(
+            name="Category Multipliers",
+            value=category_text,
+            inline=False
+        )
+    
     # Add global multiplier info
     if cog.settings["xp_multipliers"]["global"] != 1.0:
         embed.add_field(
@@ -904,11 +1186,16 @@ def create_settings_embed(cog: 'Leveling') -> discord.Embed:
             )
     
     # Add XP settings
+    filter_stats = cog.message_filter.stats()
     embed.add_field(
         name="XP Settings",
         value=f"Min XP: {cog.settings.get('min_xp', 15)}\n"
               f"Max XP: {cog.settings.get('max_xp', 25)}\n"
-              f"Cooldown: {cog.settings.get('xp_cooldown', 60)}s",
+              f"Cooldown: {cog.settings.get('xp_cooldown', 60)}s\n"
+              f"Voice XP: {cog.settings.get('voice_xp_per_minute', 10)}/min\n"
+              f"Min entropy: {cog.settings.get('xp_min_entropy', 1.0)} bits/char\n"
+              f"Farming filter: {filter_stats['duplicates_blocked']} duplicate and "
+              f"{filter_stats['low_entropy_blocked']} low-effort messages refused XP",
         inline=False
     )
     
@@ -920,6 +1207,19 @@ def create_settings_embed(cog: 'Leveling') -> discord.Embed:
         inline=False
     )
     
+    # Add write-behind storage counters
+    stats = cog.store.stats()
+    embed.add_field(
+        name="Storage",
+        value=f"Pending rows: {stats['queue_depth']} (peak {stats['max_queue_depth']})\n"
+              f"Flushes: {stats['flush_count']} ({stats['rows_flushed']} rows, {stats['failed_flushes']} failed)\n"
+              f"Flush latency: last {stats['last_flush_ms']:.1f}ms, "
+              f"avg {stats['avg_flush_ms']:.1f}ms, max {stats['max_flush_ms']:.1f}ms\n"
+              f"XP queue: {len(cog.xp_queue)} waiting, last batch {cog.last_xp_batch_size} "
+              f"({cog.last_xp_batch_ms:.1f}ms), peak {cog.max_xp_batch_size}",
+        inline=False
+    )
+    
     return embed
 
 def create_role_rewards_embed(cog: 'Leveling') -> discord.Embed:
@@ -1170,23 +1470,19 @@ class LeaderboardView(discord.ui.View):
 
     async def update_button_states(self, guild: discord.Guild):
         """Update the states of navigation buttons based on current page and total users"""
-        # Get total users
-        users_data = self.cog.settings.get("users", {})
-        sorted_users = [
-            member for user_id, data in users_data.items()
-            if (member := guild.get_member(int(user_id)))
-        ]
+        # Get total ranked members (kept current by member join/leave events)
+        total_users = len(self.cog.rank_index)
         
         # Calculate total pages
         users_per_page = 10
-        total_pages = (len(sorted_users) + users_per_page - 1) // users_per_page
+        total_pages = (total_users + users_per_page - 1) // users_per_page
         
         # Update button states
         for item in self.children:
             if item.custom_id == "prev_page":
                 item.disabled = self.current_page <= 1
             elif item.custom_id == "next_page":
-                item.disabled = self.current_page >= total_pages or len(sorted_users) <= users_per_page
+                item.disabled = self.current_page >= total_pages or total_users <= users_per_page
 
 class LevelCapModal(discord.ui.Modal, title="Set Maximum Level Cap"):
     def __init__(self, cog: 'Leveling'):
@@ -1211,8 +1507,9 @@ class LevelCapModal(discord.ui.Modal, title="Set Maximum Level Cap"):
                 )
                 return
                 
-            # Update the max level in settings
+            # Update the max level in settings and rebuild the XP table for it
             self.cog.settings["max_level"] = max_level
+            self.cog._rebuild_level_curve()
             
             # Update the level rewards dictionary to remove any rewards above the new max level
             self.cog.level_rewards = {
@@ -1233,6 +1530,180 @@ class LevelCapModal(discord.ui.Modal, title="Set Maximum Level Cap"):
                 ephemeral=True
             )
 
+BULK_OPERATIONS = {
+    "recalculate": "Recalculate Levels",
+    "reset": "Seasonal Reset",
+    "decay": "Decay Inactive Users"
+}
+
+class BulkXPView(discord.ui.View):
+    def __init__(self, cog: 'Leveling'):
+        super().__init__(timeout=120)
+        self.cog = cog
+        
+        self.operation_select = discord.ui.Select(
+            placeholder="Select a bulk operation",
+            options=[
+                discord.SelectOption(
+                    label=BULK_OPERATIONS["recalculate"],
+                    value="recalculate",
+                    description="Recompute every level and XP from total XP"
+                ),
+                discord.SelectOption(
+                    label=BULK_OPERATIONS["reset"],
+                    value="reset",
+                    description="Reset everyone's XP, optionally keeping a percentage"
+                ),
+                discord.SelectOption(
+                    label=BULK_OPERATIONS["decay"],
+                    value="decay",
+                    description="Remove a percentage of XP from inactive users"
+                )
+            ]
+        )
+        self.operation_select.callback = self.on_operation_select
+        self.add_item(self.operation_select)
+
+    async def on_operation_select(self, interaction: discord.Interaction):
+        operation = self.operation_select.values[0]
+        if operation == "recalculate":
+            await send_bulk_preview(self.cog, interaction, operation, {})
+        else:
+            await interaction.response.send_modal(BulkXPModal(self.cog, operation))
+
+class BulkXPModal(discord.ui.Modal):
+    def __init__(self, cog: 'Leveling', operation: str):
+        super().__init__(title=BULK_OPERATIONS[operation])
+        self.cog = cog
+        self.operation = operation
+        
+        if operation == "reset":
+            self.percent = discord.ui.TextInput(
+                label="Keep (%)",
+                placeholder="Percentage of total XP carried into the new season (0 for a full reset)",
+                default="0",
+                required=True
+            )
+            self.add_item(self.percent)
+        else:
+            self.percent = discord.ui.TextInput(
+                label="Decay (%)",
+                placeholder="Percentage of total XP to remove",
+                default="10",
+                required=True
+            )
+            self.inactive_days = discord.ui.TextInput(
+                label="Inactive for (days)",
+                placeholder="Only users who haven't earned XP for this long",
+                default="30",
+                required=True
+            )
+            self.add_item(self.percent)
+            self.add_item(self.inactive_days)
+
+    async def on_submit(self, interaction: discord.Interaction):
+        try:
+            percent = float(self.percent.value)
+            if not 0 <= percent <= 100:
+                await interaction.response.send_message(
+                    "Percentage must be between 0 and 100!",
+                    ephemeral=True
+                )
+                return
+            
+            if self.operation == "reset":
+                params = {"keep_percent": percent}
+            else:
+                inactive_days = float(self.inactive_days.value)
+                if inactive_days < 0:
+                    await interaction.response.send_message(
+                        "Inactive days cannot be negative!",
+                        ephemeral=True
+                    )
+                    return
+                params = {"percent": percent, "inactive_days": inactive_days}
+            
+            await send_bulk_preview(self.cog, interaction, self.operation, params)
+            
+        except ValueError:
+            await interaction.response.send_message(
+                "Please enter valid numbers!",
+                ephemeral=True
+            )
+
+class BulkConfirmView(discord.ui.View):
+    def __init__(self, cog: 'Leveling', operation: str, params: dict):
+        super().__init__(timeout=120)
+        self.cog = cog
+        self.operation = operation
+        self.params = params
+
+    @discord.ui.button(label="✅ Apply", style=discord.ButtonStyle.danger)
+    async def apply(self, interaction: discord.Interaction, button: discord.ui.Button):
+        try:
+            await interaction.response.defer(ephemeral=True)
+            summary = await self.cog._apply_bulk_operation(self.operation, **self.params)
+            await interaction.edit_original_response(
+                content=(
+                    f"{BULK_OPERATIONS[self.operation]} applied: {summary['changed']:,} users updated, "
+                    f"{summary['level_changed']:,} changed level."
+                ),
+                embed=None,
+                view=None
+            )
+        except Exception as e:
+            logger.error(f"Error applying bulk XP operation: {e}")
+            await interaction.followup.send(
+                "An error occurred while applying the bulk operation.",
+                ephemeral=True
+            )
+
+    @discord.ui.button(label="❌ Cancel", style=discord.ButtonStyle.gray)
+    async def cancel(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await interaction.response.edit_message(content="Bulk operation cancelled.", embed=None, view=None)
+
+async def send_bulk_preview(cog: 'Leveling', interaction: discord.Interaction, operation: str, params: dict) -> None:
+    """Dry run a bulk operation and show what it would change"""
+    try:
+        started = time.perf_counter()
+        summary = cog._plan_bulk_operation(operation, **params).summary()
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        
+        embed = discord.Embed(
+            title=f"📦 {BULK_OPERATIONS[operation]} (dry run)",
+            description="Nothing has changed yet. Press Apply to write these changes.",
+            color=cog.embed_color
+        )
+        if operation == "reset":
+            embed.add_field(name="Keep", value=f"{params['keep_percent']:g}% of total XP", inline=False)
+        elif operation == "decay":
+            embed.add_field(
+                name="Decay",
+                value=f"{params['percent']:g}% of total XP from users inactive for {params['inactive_days']:g} days",
+                inline=False
+            )
+        embed.add_field(name="Users", value=f"{summary['users']:,}", inline=True)
+        embed.add_field(name="Users Changed", value=f"{summary['changed']:,}", inline=True)
+        embed.add_field(
+            name="Level Changes",
+            value=f"{summary['level_changed']:,} (⬆️ {summary['level_up']:,} / ⬇️ {summary['level_down']:,})",
+            inline=True
+        )
+        embed.add_field(name="XP Removed", value=f"{summary['xp_removed']:,}", inline=True)
+        embed.set_footer(text=f"Computed in {elapsed_ms:.0f}ms")
+        
+        await interaction.response.send_message(
+            embed=embed,
+            view=BulkConfirmView(cog, operation, params),
+            ephemeral=True
+        )
+    except Exception as e:
+        logger.error(f"Error previewing bulk XP operation: {e}")
+        await interaction.response.send_message(
+            "An error occurred while previewing the bulk operation.",
+            ephemeral=True
+        )
+
 class Leveling(commands.Cog):
     """Cog for handling user leveling system"""
     
@@ -1242,7 +1713,47 @@ class Leveling(commands.Cog):
         self.level_rewards = {}
         self.embed_color = discord.Color.blue()
         self.xp_formula = lambda level: 1 if level == 0 else (100 if level == 1 else int(100 * (level ** 1.5)))
+        self.settings_file = 'data/leveling_settings.json'
+        self.store: Optional[WriteBehindStore] = None
+        # User rows keyed by int user ID; serialized to the JSON row shape only when persisted
+        self.users: Dict[int, UserRecord] = {}
+        # Present members ranked by level and by total XP, built once the guild cache is ready
+        self.rank_index = LeaderboardIndex()
+        # Message events waiting for the XP batch worker: (user_id, channel_id, timestamp)
+        self.xp_queue: deque = deque()
+        self._xp_worker: Optional[asyncio.Task] = None
+        self.xp_batch_count = 0
+        self.last_xp_batch_size = 0
+        self.max_xp_batch_size = 0
+        self.last_xp_batch_ms = 0.0
         self._load_settings()
+        self._rebuild_level_curve()
+        # Reward roles sorted by level, rebuilt whenever role rewards change
+        self._reward_levels: List[int] = []
+        self._reward_role_ids: List[int] = []
+        self._compile_role_rewards()
+        self._role_resync_task: Optional[asyncio.Task] = None
+        # Level ups waiting to be announced together: user_id -> [old_level, new_level]
+        self._pending_level_ups: Dict[int, List[int]] = {}
+        self._level_up_task: Optional[asyncio.Task] = None
+        # Global, scheduled and per-user multiplier expiries, drained by one timer
+        self.multiplier_scheduler = ExpiryScheduler()
+        self._global_expiry_handle: Optional[list] = None
+        self._event_handles: Dict[int, list] = {}
+        # Effective multiplier per channel from channel, category and global settings
+        self._channel_multipliers: Dict[int, float] = {}
+        self._default_multiplier = 1.0
+        self._build_roll_table()
+        self._schedule_multiplier_timers()
+        self._compile_channel_multipliers()
+        # Recent message fingerprints per active user for the XP farming filter
+        self.message_filter = MessageFingerprintFilter()
+        self._configure_message_filter()
+        # Members currently earning voice XP: user_id -> [credited_until, channel_id]
+        self.voice_sessions: Dict[int, list] = {}
+        self._voice_sweeper: Optional[asyncio.Task] = None
+        # Only one /levelimport or /levelexport runs at a time
+        self._transfer_running = False
         
         # Default rewards if none exist
         if not self.level_rewards:
@@ -1267,15 +1778,15 @@ class Leveling(commands.Cog):
     def _load_settings(self):
         """Load settings from file"""
         try:
-            with open('data/leveling_settings.json', 'r') as f:
+            with open(self.settings_file, 'r') as f:
                 data = json.load(f)
                 self.settings = data.get('settings', {})
                 # Convert any string keys to integers when loading
                 self.level_rewards = {int(k): v for k, v in data.get('level_rewards', {}).items()}
                 
-                # Initialize users dictionary if it doesn't exist
-                if "users" not in self.settings:
-                    self.settings["users"] = {}
+                # Load user rows from the configured storage backend
+                self.store = self._create_store()
+                self._load_users()
                 
                 # Initialize xp_multipliers if it doesn't exist
                 if "xp_multipliers" not in self.settings:
@@ -1283,6 +1794,7 @@ class Leveling(commands.Cog):
                         "global": 1.0,
                         "active_until": None,
                         "channels": {},
+                        "categories": {},
                         "multiplier_chances": {
                             "10x": 0.001,  # 0.1% chance
                             "5x": 0.005,   # 0.5% chance
@@ -1312,12 +1824,19 @@ class Leveling(commands.Cog):
                 "min_xp": 15,
                 "max_xp": 25,
                 "xp_cooldown": 60,
+                "xp_batch_interval_ms": 250,  # How often queued messages are turned into XP
+                "level_up_batch_window": 2,  # Seconds level ups are collected into one announcement
+                "voice_xp_per_minute": 10,  # 0 disables voice XP
+                "voice_sweep_interval": 300,  # Seconds between settling open voice sessions
+                "xp_fingerprint_ring": 8,  # Recent messages per user checked for duplicates
+                "xp_min_entropy": 1.0,  # Bits per character a message needs to earn XP
                 "max_level": 420,
-                "users": {},  # Initialize empty users dictionary
+                "storage_backend": "json",  # "json" or "sqlite"
                 "xp_multipliers": {
                     "global": 1.0,
                     "active_until": None,
                     "channels": {},
+                    "categories": {},
                     "multiplier_chances": {
                         "10x": 0.001,  # 0.1% chance
                         "5x": 0.005,   # 0.5% chance
@@ -1338,46 +1857,316 @@ class Leveling(commands.Cog):
                     "next_reward": "Next reward at level {next_level}: {reward}"
                 }
             }
+            self.store = self._create_store()
+            self._load_users()
             self._save_settings()
 
+    def _create_store(self) -> WriteBehindStore:
+        """Create the write-behind store for the configured storage backend"""
+        if self.settings.get("storage_backend", "json") == "sqlite":
+            backend = SqliteBackend('data/leveling.db')
+        else:
+            backend = JournalBackend('data/leveling_users.journal')
+        # User rows are persisted write-behind; only changed rows are written between snapshots
+        return WriteBehindStore(backend, self._get_user_row)
+
+    def _get_user_row(self, user_id: int) -> Optional[dict]:
+        """Serialize one user for the storage backend"""
+        user_data = self.users.get(user_id)
+        return user_data.to_dict() if user_data else None
+
+    def _load_users(self) -> None:
+        """Load user rows from the storage backend into memory"""
+        backend = self.store.backend
+        legacy_users = self.settings.pop("users", {})
+        if not backend.snapshot_includes_users:
+            if legacy_users and backend.count() == 0:
+                # One-shot migration of users still stored in the JSON settings file
+                if os.path.exists(self.settings_file):
+                    shutil.copyfile(self.settings_file, f"{self.settings_file}.pre-sqlite.bak")
+                backend.write_rows([(int(user_id), row) for user_id, row in legacy_users.items()])
+                logger.info(f"Migrated {len(legacy_users)} leveling users from JSON to SQLite")
+        else:
+            self.users = {int(user_id): UserRecord.from_dict(row) for user_id, row in legacy_users.items()}
+        del legacy_users
+        
+        loaded = backend.load_into(self.users, UserRecord.from_dict)
+        if loaded:
+            logger.info(f"Loaded {loaded} leveling rows from {type(backend).__name__}")
+
+    def _settings_to_save(self) -> dict:
+        """Settings as written to the settings file, with users unless they are kept elsewhere"""
+        if self.store.backend.snapshot_includes_users:
+            return {**self.settings, "users": self._serialize_users()}
+        return self.settings
+
+    def _serialize_users(self) -> Dict[str, dict]:
+        """All users in the JSON shape of the settings file"""
+        return {str(user_id): user_data.to_dict() for user_id, user_data in self.users.items()}
+
+    def _snapshot_data(self) -> dict:
+        """Build a private copy of everything stored in the settings file"""
+        settings = copy.deepcopy(self.settings)
+        if self.store.backend.snapshot_includes_users:
+            settings["users"] = self._serialize_users()
+        return {
+            'settings': settings,
+            'level_rewards': dict(self.level_rewards)
+        }
+
     def _save_settings(self):
         """Save settings to file"""
         try:
-            # Create data directory if it doesn't exist
-            os.makedirs('data', exist_ok=True)
-            
-            # Prepare data to save
-            data = {
-                'settings': self.settings,
+            # Prepare data to save and write it, replacing the write-behind journal
+            self.store.write_snapshot(self.settings_file, {
+                'settings': self._settings_to_save(),
                 'level_rewards': self.level_rewards
-            }
-            
-            # Save to file
-            with open('data/leveling_settings.json', 'w') as f:
-                json.dump(data, f, indent=4)
+            })
         except Exception as e:
             logger.error(f"Error saving leveling settings: {e}")
 
-    def _get_user_data(self, user_id: int) -> dict:
+    async def _compact_store(self) -> None:
+        """Fold the write-behind journal back into the settings file off the event loop"""
+        try:
+            await self.store.write_snapshot_async(self.settings_file, self._snapshot_data())
+            logger.info("Compacted leveling write-behind journal")
+        except Exception as e:
+            logger.error(f"Error compacting leveling settings: {e}")
+
+    async def flush_pending_writes(self) -> None:
+        """Persist buffered user changes and fold them into the settings file"""
+        await self._process_xp_batch()
+        await self._settle_all_voice_sessions()
+        await self.store.flush()
+        await self._compact_store()
+
+    async def cog_load(self) -> None:
+        """Start the write-behind flusher"""
+        self.store.start(compact_callback=self._compact_store)
+        self.multiplier_scheduler.start()
+        self._xp_worker = asyncio.create_task(self._run_xp_worker())
+        self._voice_sweeper = asyncio.create_task(self._run_voice_sweeper())
+        # On reload the member cache is already there and on_ready won't fire again
+        if self.bot.is_ready():
+            self._rebuild_rank_index()
+            self._compile_channel_multipliers()
+            self._rebuild_voice_sessions()
+
+    async def cog_unload(self) -> None:
+        """Stop the flusher and write anything still buffered"""
+        try:
+            if self._xp_worker:
+                self._xp_worker.cancel()
+                self._xp_worker = None
+            if self._voice_sweeper:
+                self._voice_sweeper.cancel()
+                self._voice_sweeper = None
+            # Credit time spent in voice up to now
+            await self._settle_all_voice_sessions(close=True)
+            if self._role_resync_task:
+                self._role_resync_task.cancel()
+            if self._level_up_task:
+                self._level_up_task.cancel()
+            await self.multiplier_scheduler.stop()
+            # Award XP for anything still queued so it reaches the store
+            await self._process_xp_batch()
+            await self._send_level_ups()
+            await self.store.stop()
+            await self._compact_store()
+            self.store.backend.close()
+        except Exception as e:
+            logger.error(f"Error flushing leveling data on unload: {e}")
+
+    def _get_user_data(self, user_id: int) -> UserRecord:
         """Get user data, creating if it doesn't exist"""
-        if str(user_id) not in self.settings["users"]:
-            self.settings["users"][str(user_id)] = {
-                "xp": 0,
-                "level": 0,  # Start at level 0
-                "last_xp_gain": 0,
-                "streak": 0,
-                "last_streak_date": None,
-                "highest_streak": 0,
-                "total_xp": 0  # Add total_xp field
-            }
-        return self.settings["users"][str(user_id)]
+        user_data = self.users.get(user_id)
+        if user_data is None:
+            user_data = self.users[user_id] = UserRecord()
+            self._index_user(user_id)
+        return user_data
+
+    def _index_user(self, user_id: int) -> None:
+        """Reposition a user in the leaderboard index after their XP or level changed"""
+        guild = self.bot.get_guild(GUILD_ID)
+        user_data = self.users.get(user_id)
+        if guild and user_data is not None and guild.get_member(user_id):
+            self.rank_index.update(user_id, user_data.level, user_data.total_xp)
+        else:
+            self.rank_index.discard(user_id)
+
+    def _rebuild_rank_index(self) -> None:
+        """Index every user that is currently a member of the guild"""
+        guild = self.bot.get_guild(GUILD_ID)
+        if not guild:
+            return
+        self.rank_index.clear()
+        for user_id, user_data in self.users.items():
+            if guild.get_member(user_id):
+                self.rank_index.update(user_id, user_data.level, user_data.total_xp)
+        logger.info(f"Indexed {len(self.rank_index)} members for the leaderboard")
+
+    def _rebuild_level_curve(self) -> None:
+        """Precompute the XP table for the current formula and level cap"""
+        self.level_curve = LevelCurve(self.xp_formula, self.settings.get("max_level", 420))
 
     def _calculate_level(self, xp: int) -> int:
         """Calculate level based on XP"""
-        level = 0
-        while self.xp_formula(level) <= xp:
-            level += 1
-        return level
+        return self.level_curve.level_for_total(xp)
+
+    def _apply_xp_change(self, user_data: UserRecord, amount: int) -> int:
+        """Add (or remove) XP and recompute the level, returning the previous level"""
+        old_level = user_data.level
+        user_data.total_xp = max(0, user_data.total_xp + amount)
+        
+        if old_level > self.level_curve.max_level:
+            # Above a cap that was lowered later; keep the level and just bank the XP
+            user_data.xp = max(0, user_data.xp + amount)
+            return old_level
+        
+        position = max(0, self.level_curve.position(old_level, user_data.xp) + amount)
+        user_data.level, user_data.xp = self.level_curve.progress(position)
+        return old_level
+
+    def _plan_bulk_operation(self, operation: str, **params) -> BulkPlan:
+        """Compute a bulk XP operation over every user without applying it"""
+        table = XPTable(self.users)
+        if operation == "reset":
+            return plan_seasonal_reset(table, self.level_curve, params.get("keep_percent", 0))
+        if operation == "decay":
+            return plan_decay(
+                table, self.level_curve, params["percent"], params["inactive_days"], datetime.now().timestamp()
+            )
+        return plan_recalculate(table, self.level_curve)
+
+    async def _apply_bulk_operation(self, operation: str, **params) -> Dict[str, int]:
+        """Apply a bulk XP operation and persist every changed user in one flush"""
+        # Award queued messages first so they count against the old values
+        await self._process_xp_batch()
+        
+        plan = self._plan_bulk_operation(operation, **params)
+        summary = plan.summary()
+        changed = plan.apply(self.users)
+        for user_id in changed:
+            self.store.mark_dirty(user_id)
+        self._rebuild_rank_index()
+        await self.store.flush()
+        
+        if summary["level_changed"]:
+            self._start_role_resync()
+        
+        logger.info(
+            f"Bulk XP {operation} {params}: {summary['changed']} users updated, "
+            f"{summary['level_changed']} changed level"
+        )
+        return summary
+
+    def _start_role_resync(self) -> None:
+        """Sync reward roles in the background after many levels changed at once"""
+        resync_running = self._role_resync_task and not self._role_resync_task.done()
+        if self._reward_levels and not resync_running:
+            self._role_resync_task = asyncio.create_task(self._resync_reward_roles())
+
+    def _import_chunk(self, chunk: ParsedChunk, mode: str, streak_date: float) -> None:
+        """Merge one parsed chunk of imported rows into the users table"""
+        users = self.users
+        totals = chunk.total_xp
+        if mode == "add":
+            # A user can appear more than once; later rows add on top of earlier ones
+            merged: Dict[int, int] = {}
+            totals = []
+            for user_id, amount in zip(chunk.user_ids, chunk.total_xp):
+                base = merged.get(user_id)
+                if base is None:
+                    user_data = users.get(user_id)
+                    base = user_data.total_xp if user_data else 0
+                # Capped so the sum still fits the int64 XP arrays
+                merged[user_id] = min(base + amount, MAX_STORED_INT)
+                totals.append(merged[user_id])
+        
+        levels, xps = progress(self.level_curve, totals)
+        for user_id, total_xp, level, xp, streak in zip(
+            chunk.user_ids, totals, levels.tolist(), xps.tolist(), chunk.streaks
+        ):
+            user_data = users.get(user_id)
+            if user_data is None:
+                user_data = users[user_id] = UserRecord()
+            user_data.total_xp = total_xp
+            user_data.level = level
+            user_data.xp = xp
+            if streak is not None:
+                # Imported streaks continue from today
+                user_data.streak = streak
+                user_data.highest_streak = max(user_data.highest_streak, streak)
+                user_data.last_streak_date = streak_date if streak else None
+        self.store.mark_dirty_many(chunk.user_ids)
+
+    async def _import_levels(self, attachment: discord.Attachment, mode: str, report) -> Dict[str, int]:
+        """Stream an import file into the users table chunk by chunk"""
+        fmt, compressed = detect_format(attachment.filename)
+        reader = ImportReader(fmt, compressed, self.level_curve)
+        today = datetime.now().date()
+        streak_date = datetime.combine(today, datetime.min.time()).timestamp()
+        result = {"imported": 0, "skipped": 0, "bytes": 0}
+        pending: List[str] = []
+        last_report = time.monotonic()
+        
+        async def import_lines(lines: List[str]) -> None:
+            # Parsing runs in a worker thread; merging is a short pass on the loop
+            chunk = await asyncio.to_thread(reader.parse, lines)
+            self._import_chunk(chunk, mode, streak_date)
+            result["imported"] += len(chunk)
+            result["skipped"] += chunk.skipped
+            # Write each chunk as it lands so buffered rows never pile up
+            await self.store.flush()
+        
+        async with aiohttp.ClientSession() as session:
+            async with session.get(attachment.url) as response:
+                if response.status != 200:
+                    raise RuntimeError(f"Download failed with status {response.status}")
+                async for data in response.content.iter_chunked(1 << 16):
+                    result["bytes"] += len(data)
+                    pending.extend(reader.feed(data))
+                    if len(pending) >= TRANSFER_CHUNK_ROWS:
+                        await import_lines(pending)
+                        pending = []
+                        if time.monotonic() - last_report >= TRANSFER_PROGRESS_INTERVAL:
+                            last_report = time.monotonic()
+                            await report(result)
+        
+        pending.extend(reader.finish())
+        await import_lines(pending)
+        
+        self._rebuild_rank_index()
+        self._start_role_resync()
+        logger.info(
+            f"Imported {result['imported']} leveling rows from {attachment.filename} "
+            f"({mode}), skipped {result['skipped']}"
+        )
+        return result
+
+    async def _export_levels(self, fmt: str, path: str, report) -> int:
+        """Write every user to an export file chunk by chunk"""
+        user_ids = list(self.users)
+        exported = 0
+        last_report = time.monotonic()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            for start in range(0, len(user_ids), TRANSFER_CHUNK_ROWS):
+                rows = []
+                for user_id in user_ids[start:start + TRANSFER_CHUNK_ROWS]:
+                    user_data = self.users.get(user_id)
+                    if user_data is not None:
+                        rows.append((user_id, user_data.total_xp, user_data.level, user_data.xp, user_data.streak))
+                # Formatting and writing happen off the loop
+                await asyncio.to_thread(write_export_rows, f, fmt, rows, start == 0)
+                exported += len(rows)
+                if time.monotonic() - last_report >= TRANSFER_PROGRESS_INTERVAL:
+                    last_report = time.monotonic()
+                    await report(exported, len(user_ids))
+        
+        logger.info(f"Exported {exported} leveling rows to {path}")
+        return exported
 
     def _get_progress_bar(self, current_xp: int, next_level_xp: int, length: int = 10) -> str:
         """Create a progress bar for level progress"""
@@ -1389,6 +2178,165 @@ class Leveling(commands.Cog):
         percentage = int(progress * 100)
         return f"[{bar}] {percentage}%"
 
+    async def _get_rank(self, user_id: int, sort_by: str = "level") -> Optional[int]:
+        """Get a user's 1-based leaderboard position"""
+        position = self.rank_index.position(user_id, sort_by)
+        return position + 1 if position is not None else None
+
+    def _xp_to_pass_next(self, user_id: int, sort_by: str = "level") -> Optional[int]:
+        """XP a user needs to overtake the person ranked directly above them"""
+        position = self.rank_index.position(user_id, sort_by)
+        if not position:
+            return None
+        ahead_id = self.rank_index.at(sort_by, position - 1)
+        ahead_xp = self.users[ahead_id].total_xp
+        own_xp = self.users[user_id].total_xp
+        return max(1, ahead_xp - own_xp + 1)
+
+    @commands.Cog.listener()
+    async def on_ready(self) -> None:
+        """Build the leaderboard index, channel multipliers and voice sessions once the caches are populated"""
+        self._rebuild_rank_index()
+        self._compile_channel_multipliers()
+        self._rebuild_voice_sessions()
+
+    def _configure_message_filter(self) -> None:
+        """Apply the farming filter settings"""
+        self.message_filter.ring_size = self.settings.get("xp_fingerprint_ring", 8)
+        self.message_filter.min_entropy = self.settings.get("xp_min_entropy", 1.0)
+        # Keep fingerprints for a good while past the cooldown they are meant to catch
+        self.message_filter.idle_ttl = max(3600, self.settings.get("xp_cooldown", 60) * 20)
+
+    def _voice_earning(self, member: discord.Member) -> bool:
+        """Whether a member's current voice state earns XP"""
+        state = member.voice
+        if member.bot or not state or not state.channel:
+            return False
+        afk_channel = member.guild.afk_channel
+        if afk_channel and state.channel.id == afk_channel.id:
+            return False
+        if state.self_mute or state.self_deaf or state.mute or state.deaf:
+            return False
+        # Sitting alone in a channel doesn't count
+        return any(
+            not other.bot and other.id != member.id and other.voice and not (other.voice.self_deaf or other.voice.deaf)
+            for other in state.channel.members
+        )
+
+    def _settle_voice_session(self, user_id: int, now: float, close: bool = False) -> Optional[tuple]:
+        """Credit whole minutes spent in voice, returning (channel_id, previous level) if XP was granted"""
+        session = self.voice_sessions.get(user_id)
+        if not session:
+            return None
+        credited_until, channel_id = session
+        minutes = int((now - credited_until) // 60)
+        if close:
+            del self.voice_sessions[user_id]
+        else:
+            # Carry the partial minute over to the next settle
+            session[0] = credited_until + minutes * 60
+        if minutes <= 0:
+            return None
+        
+        user_data = self._get_user_data(user_id)
+        self._check_streak(user_data, now)
+        # Counts as activity for decay, without starting the message cooldown
+        user_data.last_active = now
+        rate = self.settings.get("voice_xp_per_minute", 10)
+        xp_gained = int(minutes * rate * self._user_multiplier(user_data, channel_id, now))
+        return channel_id, self._grant_xp(user_id, user_data, xp_gained)
+
+    def _settle_voice_sessions(self, close: bool = False) -> List[tuple]:
+        """Credit every open voice session (O(active sessions)), returning (user_id, channel_id, previous level) per grant"""
+        now = time.time()
+        settled = []
+        for user_id in list(self.voice_sessions):
+            granted = self._settle_voice_session(user_id, now, close)
+            if granted:
+                settled.append((user_id, *granted))
+        return settled
+
+    async def _announce_voice_level_ups(self, settled: List[tuple]) -> None:
+        """Announce level ups and apply role rewards for settled voice sessions"""
+        for user_id, channel_id, old_level in settled:
+            await self._announce_level_ups(user_id, channel_id, old_level, self.users[user_id].level)
+
+    async def _settle_all_voice_sessions(self, close: bool = False) -> None:
+        """Credit every open voice session and announce any level ups"""
+        await self._announce_voice_level_ups(self._settle_voice_sessions(close))
+
+    async def _run_voice_sweeper(self) -> None:
+        """Periodically credit long voice sessions so XP doesn't wait for the next state change"""
+        while True:
+            try:
+                await asyncio.sleep(self.settings.get("voice_sweep_interval", 300))
+                if self.voice_sessions and self.settings.get("enabled", True):
+                    await self._settle_all_voice_sessions()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Error in voice XP sweeper: {e}")
+
+    def _rebuild_voice_sessions(self) -> None:
+        """Open sessions for members already in voice when the bot starts"""
+        guild = self.bot.get_guild(GUILD_ID)
+        self.voice_sessions.clear()
+        if not guild or not self.settings.get("enabled", True) or self.settings.get("voice_xp_per_minute", 10) <= 0:
+            return
+        now = time.time()
+        for channel in list(guild.voice_channels) + list(guild.stage_channels):
+            for member in channel.members:
+                if self._voice_earning(member):
+                    self.voice_sessions[member.id] = [now, channel.id]
+
+    @commands.Cog.listener()
+    async def on_voice_state_update(
+        self,
+        member: discord.Member,
+        before: discord.VoiceState,
+        after: discord.VoiceState
+    ) -> None:
+        """Open, move or settle voice XP sessions when anyone's voice state changes"""
+        try:
+            if member.bot or member.guild.id != GUILD_ID:
+                return
+            if not self.settings.get("enabled", True) or self.settings.get("voice_xp_per_minute", 10) <= 0:
+                return
+            
+            # Someone joining or leaving can change whether others in either channel earn XP
+            affected = {member}
+            for channel in (before.channel, after.channel):
+                if channel:
+                    affected.update(other for other in channel.members if not other.bot)
+            
+            now = time.time()
+            for other in affected:
+                earning = self._voice_earning(other)
+                session = self.voice_sessions.get(other.id)
+                if session and earning and session[1] == other.voice.channel.id:
+                    continue
+                
+                settled = self._settle_voice_session(other.id, now, close=True)
+                if earning:
+                    self.voice_sessions[other.id] = [now, other.voice.channel.id]
+                if settled:
+                    channel_id, old_level = settled
+                    await self._announce_level_ups(other.id, channel_id, old_level, self.users[other.id].level)
+        except Exception as e:
+            logger.error(f"Error in on_voice_state_update event: {e}", exc_info=True)
+
+    @commands.Cog.listener()
+    async def on_member_join(self, member: discord.Member) -> None:
+        """Put returning members back on the leaderboard"""
+        if member.guild.id == GUILD_ID and member.id in self.users:
+            self._index_user(member.id)
+
+    @commands.Cog.listener()
+    async def on_member_remove(self, member: discord.Member) -> None:
+        """Take members who left off the leaderboard"""
+        if member.guild.id == GUILD_ID:
+            self.rank_index.discard(member.id)
+
     @commands.Cog.listener()
     async def on_message(self, message: discord.Message) -> None:
         """Handle message events for XP gain"""
@@ -1400,44 +2348,29 @@ class Leveling(commands.Cog):
             if message.author.bot or not message.guild:
                 return
                 
-            # Get user data
-            user_data = self._get_user_data(message.author.id)
-            current_time = message.created_at.timestamp()
-            
-            # Check cooldown using the setting value
-            cooldown = self.settings.get("xp_cooldown", 60)
-            if current_time - user_data["last_xp_gain"] < cooldown:
+            # Repeated or low-effort messages earn nothing
+            timestamp = message.created_at.timestamp()
+            if not self.message_filter.allow(message.author.id, message.content, timestamp):
                 return
-                
-            # Award XP using the _award_xp method that handles multipliers
-            await self._award_xp(message.author.id, message.channel.id)
             
-            # Update last gain time
-            user_data["last_xp_gain"] = current_time
-            self._save_settings()
+            # Queue the event; the batch worker applies cooldowns and awards XP
+            self.xp_queue.append((message.author.id, message.channel.id, timestamp))
             
         except Exception as e:
             logger.error(f"Error in on_message event: {str(e)}", exc_info=True)
 
-    async def _handle_level_up(self, user: discord.Member, old_level: int, new_level: int) -> None:
-        """Handle level up event"""
-        channel_id = self.settings.get("log_channel_id")
-        if not channel_id:
-            return
-            
-        channel = self.bot.get_channel(channel_id)
-        if not channel:
-            return
-            
+    def _format_level_up(self, user: discord.User, old_level: int, new_level: int) -> str:
+        """Build the level up text for a jump from ``old_level`` to ``new_level``"""
         # Create level up message using templates
         templates = self.settings.get("message_templates", {})
         
-        # Check if this is a milestone level
-        if new_level in self.level_rewards:
+        # Check if any milestone level was crossed
+        unlocked = [self.level_rewards[level] for level in sorted(self.level_rewards) if old_level < level <= new_level]
+        if unlocked:
             level_up_msg = templates["level_up_with_reward"].format(
                 user=user,
                 new_level=new_level,
-                reward=self.level_rewards[new_level]
+                reward=", ".join(unlocked)
             )
         else:
             level_up_msg = templates["level_up"].format(
@@ -1447,11 +2380,11 @@ class Leveling(commands.Cog):
         
         # Add multiplier info if applicable
         user_data = self._get_user_data(user.id)
-        if "active_multiplier" in user_data:
-            multiplier = user_data["active_multiplier"]
+        if user_data.active_multiplier:
+            multiplier = user_data.active_multiplier
             level_up_msg += templates["multiplier_info"].format(
-                amount=multiplier["amount"],
-                duration=multiplier["duration"]
+                amount=multiplier.amount,
+                duration=multiplier.duration
             )
         
         # Add next reward info if available
@@ -1464,14 +2397,99 @@ class Leveling(commands.Cog):
                 next_level=next_reward_level,
                 reward=self.level_rewards[next_reward_level]
             )
+        return level_up_msg
+
+    def _handle_level_up(self, user_id: int, old_level: int, new_level: int) -> None:
+        """Queue a level up announcement, merging it with one already pending for the user"""
+        if not self.settings.get("log_channel_id"):
+            return
         
-        # Send level up message
-        if self.settings.get("log_channel_id"):
-            log_channel = self.bot.get_channel(self.settings["log_channel_id"])
-            if log_channel:
-                await log_channel.send(level_up_msg)
+        pending = self._pending_level_ups.get(user_id)
+        if pending:
+            pending[1] = max(pending[1], new_level)
         else:
-            await channel.send(level_up_msg)
+            self._pending_level_ups[user_id] = [old_level, new_level]
+        
+        if self._level_up_task is None or self._level_up_task.done():
+            self._level_up_task = asyncio.create_task(self._send_level_ups_after_window())
+
+    async def _send_level_ups_after_window(self) -> None:
+        """Collect level ups for a short window, then announce them together"""
+        try:
+            await asyncio.sleep(self.settings.get("level_up_batch_window", 2))
+            await self._send_level_ups()
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.error(f"Error sending level up announcements: {e}")
+
+    async def _send_level_ups(self) -> None:
+        """Send every pending level up, up to 10 embeds per message"""
+        pending, self._pending_level_ups = self._pending_level_ups, {}
+        channel = self.bot.get_channel(self.settings.get("log_channel_id") or 0)
+        if not pending or not channel:
+            return
+        
+        announcements = []
+        for user_id, (old_level, new_level) in pending.items():
+            user = self.bot.get_user(user_id)
+            if not user:
+                continue
+            title = f"⬆️ Level {old_level} → {new_level}" if new_level - old_level > 1 else f"⬆️ Level {new_level}"
+            embed = discord.Embed(
+                title=title,
+                description=self._format_level_up(user, old_level, new_level),
+                color=self.embed_color
+            )
+            embed.set_thumbnail(url=user.display_avatar.url)
+            announcements.append((user, embed))
+        
+        # Mentions go in the message content since mentions inside embeds don't ping
+        for i in range(0, len(announcements), 10):
+            chunk = announcements[i:i + 10]
+            await channel.send(
+                content=" ".join(user.mention for user, _ in chunk),
+                embeds=[embed for _, embed in chunk],
+                allowed_mentions=discord.AllowedMentions(users=True, roles=False, everyone=False)
+            )
+
+    def _compile_role_rewards(self) -> None:
+        """Sort the level to role reward map once so lookups are a bisect"""
+        rewards = sorted(
+            (int(level), role_id)
+            for level, role_id in self.settings.get("role_rewards", {}).items()
+            if role_id
+        )
+        self._reward_levels = [level for level, _ in rewards]
+        self._reward_role_ids = [role_id for _, role_id in rewards]
+
+    def _desired_reward_role(self, level: int) -> Optional[int]:
+        """Role ID of the highest reward unlocked at ``level``"""
+        index = bisect_right(self._reward_levels, level)
+        return self._reward_role_ids[index - 1] if index else None
+
+    async def _reconcile_reward_roles(self, member: discord.Member, level: int) -> bool:
+        """Give a member exactly the reward role for their level in a single edit
+
+        Returns True if the member's roles had to change. HTTP errors, missing
+        permissions included, are left to the caller.
+        """
+        reward_ids = set(self._reward_role_ids)
+        desired_id = self._desired_reward_role(level)
+        desired_role = member.guild.get_role(desired_id) if desired_id else None
+        if desired_id and not desired_role:
+            logger.error(f"Could not find role with ID {desired_id}")
+        
+        # Keep every non-reward role, drop stale reward roles, add the one they should have
+        roles = [role for role in member.roles[1:] if role.id not in reward_ids]
+        if desired_role:
+            roles.append(desired_role)
+        if set(roles) == set(member.roles[1:]):
+            return False
+        
+        await member.edit(roles=roles, reason=f"Leveling role rewards for level {level}")
+        logger.info(f"Updated reward roles for {member.name} at level {level}")
+        return True
 
     async def _handle_role_rewards(self, user_id: int, new_level: int) -> None:
         """Handle role rewards for leveling up"""
@@ -1486,43 +2504,54 @@ class Leveling(commands.Cog):
         if not member:
             logger.error(f"Could not find member {user_id} for role rewards")
             return
-            
-        # Get role rewards from settings
-        role_rewards = self.settings.get("role_rewards", {})
         
-        # Check if there's a role reward for this level
-        if str(new_level) in role_rewards:
-            role_id = role_rewards[str(new_level)]
-            role = guild.get_role(role_id)
-            
-            if role:
-                try:
-                    # Remove any previous level roles
-                    for level, prev_role_id in role_rewards.items():
-                        if int(level) < new_level:
-                            prev_role = guild.get_role(prev_role_id)
-                            if prev_role and prev_role in member.roles:
-                                await member.remove_roles(prev_role)
-                    
-                    # Add the new role
-                    if role not in member.roles:
-                        await member.add_roles(role)
-                        logger.info(f"Added role {role.name} to {member.name}")
-                except Exception as e:
-                    logger.error(f"Error handling role rewards: {e}")
-            else:
-                logger.error(f"Could not find role with ID {role_id}")
+        try:
+            await self._reconcile_reward_roles(member, new_level)
+        except discord.HTTPException as e:
+            logger.error(f"Error handling role rewards: {e}")
+
+    async def _resync_reward_roles(self, edit_delay: float = 1.0) -> Dict[str, int]:
+        """Reconcile reward roles for every tracked member, pacing the edits"""
+        guild = self.bot.get_guild(GUILD_ID)
+        result = {"checked": 0, "updated": 0, "failed": 0}
+        if not guild:
+            return result
+        
+        for user_id, user_data in list(self.users.items()):
+            member = guild.get_member(user_id)
+            if not member:
+                continue
+            result["checked"] += 1
+            # discord.py waits out rate limits itself, so an error here is a real failure
+            try:
+                changed = await self._reconcile_reward_roles(member, user_data.level)
+            except discord.HTTPException as e:
+                logger.error(f"Could not sync reward roles for {member}: {e}")
+                result["failed"] += 1
+                continue
+            if changed:
+                result["updated"] += 1
+                # Members already in sync cost no API call; only space out real edits
+                await asyncio.sleep(edit_delay)
+        
+        logger.info(
+            f"Reward role resync: {result['checked']} checked, "
+            f"{result['updated']} updated, {result['failed']} failed"
+        )
+        return result
 
     @app_commands.command(
         name="level",
         description="📊 Check your current level and progress"
     )
     @app_commands.guilds(GUILD)
+    @app_commands.describe(target_level="Show how much XP is needed to reach this level")
     @app_commands.checks.cooldown(1, 5)  # 1 use per 5 seconds
     async def check_level(
         self,
         interaction: discord.Interaction,
-        user: Optional[discord.Member] = None
+        user: Optional[discord.Member] = None,
+        target_level: Optional[int] = None
     ) -> None:
         """Check user's level and progress"""
         try:
@@ -1530,10 +2559,10 @@ class Leveling(commands.Cog):
             
             # Get user data
             user_data = self._get_user_data(target_user.id)
-            current_level = user_data["level"]
-            current_xp = user_data["xp"]
-            total_xp = user_data.get("total_xp", 0)
-            next_level_xp = self.xp_formula(current_level)
+            current_level = user_data.level
+            current_xp = user_data.xp
+            total_xp = user_data.total_xp
+            next_level_xp = self.level_curve.xp_for_level(current_level)
             
             # Create progress bar
             progress = self._get_progress_bar(current_xp, next_level_xp)
@@ -1562,12 +2591,41 @@ class Leveling(commands.Cog):
                 inline=True
             )
             
+            rank = await self._get_rank(target_user.id)
+            if rank:
+                embed.add_field(
+                    name="Server Rank",
+                    value=f"Rank #{rank} of {len(self.rank_index)}",
+                    inline=True
+                )
+                xp_to_pass = self._xp_to_pass_next(target_user.id)
+                if xp_to_pass:
+                    embed.add_field(
+                        name="XP to Pass the Next Person",
+                        value=f"{xp_to_pass:,} XP",
+                        inline=True
+                    )
+            
             embed.add_field(
                 name="Progress to Next Level",
                 value=progress,
                 inline=False
             )
             
+            if target_level is not None:
+                max_level = self.level_curve.max_level
+                if target_level > max_level:
+                    value = f"The level cap is {max_level}"
+                elif target_level <= current_level:
+                    value = "Already reached!"
+                else:
+                    value = f"{self.level_curve.xp_until(current_level, current_xp, target_level):,} XP"
+                embed.add_field(
+                    name=f"XP until Level {target_level}",
+                    value=value,
+                    inline=False
+                )
+            
             # Add next reward info if available
             next_reward_level = min(
                 (level for level in self.level_rewards.keys() if level > current_level),
@@ -1635,6 +2693,152 @@ class Leveling(commands.Cog):
         view = LevelSettingsView(self)
         await interaction.response.send_message(embed=embed, view=view, ephemeral=True)
 
+    @app_commands.command(
+        name="levelmemory",
+        description="🧠 Show how much memory leveling user data uses"
+    )
+    @app_commands.guilds(GUILD)
+    @app_commands.checks.has_permissions(administrator=True)
+    async def level_memory(self, interaction: discord.Interaction):
+        """Report bytes per user for slot records versus the old dict rows"""
+        try:
+            report = memory_report(self.users)
+            before = report["dict_bytes_per_user"]
+            after = report["record_bytes_per_user"]
+
+            embed = discord.Embed(
+                title="🧠 Leveling Memory Usage",
+                description=f"Estimated from a sample of {report['users']:,} tracked users",
+                color=self.embed_color
+            )
+            embed.add_field(
+                name="Before (dict rows)",
+                value=f"{before:,.0f} bytes/user\n{before * report['users'] / 1024 / 1024:,.1f} MiB total",
+                inline=True
+            )
+            embed.add_field(
+                name="After (slot records)",
+                value=f"{after:,.0f} bytes/user\n{after * report['users'] / 1024 / 1024:,.1f} MiB total",
+                inline=True
+            )
+            if before:
+                embed.add_field(
+                    name="Saved",
+                    value=f"{(1 - after / before) * 100:.0f}%",
+                    inline=True
+                )
+            await interaction.response.send_message(embed=embed, ephemeral=True)
+        except Exception as e:
+            logger.error(f"Error in levelmemory command: {e}")
+            await interaction.response.send_message(
+                "An error occurred while measuring memory usage.",
+                ephemeral=True
+            )
+
+    @app_commands.command(
+        name="levelimport",
+        description="📥 Import levels from a CSV or NDJSON file"
+    )
+    @app_commands.guilds(GUILD)
+    @app_commands.checks.has_permissions(administrator=True)
+    @app_commands.describe(
+        file="CSV or NDJSON (optionally .gz) with user_id, total_xp and optional level and streak",
+        mode="Replace each user's XP or add the imported XP to what they already have"
+    )
+    @app_commands.choices(mode=[
+        app_commands.Choice(name="Replace XP", value="replace"),
+        app_commands.Choice(name="Add to existing XP", value="add")
+    ])
+    async def level_import(self, interaction: discord.Interaction, file: discord.Attachment, mode: str = "replace"):
+        """Stream user XP from another level bot's export into the leveling store"""
+        fmt, _ = detect_format(file.filename)
+        if fmt is None:
+            await interaction.response.send_message(
+                "Please upload a .csv, .ndjson or .jsonl file (optionally gzipped)!",
+                ephemeral=True
+            )
+            return
+        if self._transfer_running:
+            await interaction.response.send_message(
+                "An import or export is already running!",
+                ephemeral=True
+            )
+            return
+        
+        self._transfer_running = True
+        try:
+            await interaction.response.send_message(f"📥 Importing `{file.filename}`...", ephemeral=True)
+            started = time.monotonic()
+            
+            async def report(result: Dict[str, int]) -> None:
+                percent = min(100, result["bytes"] * 100 // max(1, file.size))
+                await interaction.edit_original_response(
+                    content=f"📥 Importing `{file.filename}`... {percent}% "
+                            f"({result['imported']:,} rows imported, {result['skipped']:,} skipped)"
+                )
+            
+            result = await self._import_levels(file, mode, report)
+            await interaction.edit_original_response(
+                content=f"✅ Imported {result['imported']:,} rows from `{file.filename}` "
+                        f"in {time.monotonic() - started:.1f}s ({result['skipped']:,} skipped). "
+                        f"Levels were recalculated from total XP."
+            )
+        except Exception as e:
+            logger.error(f"Error importing levels: {e}")
+            await interaction.edit_original_response(
+                content="An error occurred while importing levels. Rows imported before the error were kept."
+            )
+        finally:
+            self._transfer_running = False
+
+    @app_commands.command(
+        name="levelexport",
+        description="📤 Export all levels as CSV or NDJSON"
+    )
+    @app_commands.guilds(GUILD)
+    @app_commands.checks.has_permissions(administrator=True)
+    @app_commands.describe(format="File format of the export")
+    @app_commands.choices(format=[
+        app_commands.Choice(name="CSV", value="csv"),
+        app_commands.Choice(name="NDJSON", value="ndjson")
+    ])
+    async def level_export(self, interaction: discord.Interaction, format: str = "csv"):
+        """Stream every user's XP, level and streak to a file"""
+        if self._transfer_running:
+            await interaction.response.send_message(
+                "An import or export is already running!",
+                ephemeral=True
+            )
+            return
+        
+        self._transfer_running = True
+        try:
+            await interaction.response.send_message("📤 Exporting levels...", ephemeral=True)
+            filename = f"leveling_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{format}"
+            path = os.path.join("data", "exports", filename)
+            
+            async def report(exported: int, total: int) -> None:
+                await interaction.edit_original_response(
+                    content=f"📤 Exporting levels... {exported:,}/{total:,} users"
+                )
+            
+            exported = await self._export_levels(format, path, report)
+            if os.path.getsize(path) <= interaction.guild.filesize_limit:
+                await interaction.edit_original_response(
+                    content=f"✅ Exported {exported:,} users.",
+                    attachments=[discord.File(path, filename=filename)]
+                )
+            else:
+                await interaction.edit_original_response(
+                    content=f"✅ Exported {exported:,} users. The file is too large to upload here "
+                            f"and was saved on the bot host as `{path}`."
+                )
+        except Exception as e:
+            logger.error(f"Error exporting levels: {e}")
+            await interaction.edit_original_response(content="An error occurred while exporting levels.")
+        finally:
+            self._transfer_running = False
+
     @app_commands.command(
         name="streak",
         description="Check your current streak and streak statistics"
@@ -1652,8 +2856,8 @@ class Leveling(commands.Cog):
         user_data = self._get_user_data(user.id)
         
         # Calculate time until streak reset
-        if user_data["last_streak_date"]:
-            last_date = datetime.fromtimestamp(user_data["last_streak_date"]).date()
+        if user_data.last_streak_date:
+            last_date = datetime.fromtimestamp(user_data.last_streak_date).date()
             current_date = datetime.now().date()
             days_since_last = (current_date - last_date).days
             
@@ -1671,12 +2875,12 @@ class Leveling(commands.Cog):
             title=f"{user.name}'s Streak Stats",
             color=discord.Color.blue()
         )
-        embed.add_field(name="Current Streak", value=f"{user_data['streak']} days", inline=True)
-        embed.add_field(name="Highest Streak", value=f"{user_data['highest_streak']} days", inline=True)
+        embed.add_field(name="Current Streak", value=f"{user_data.streak} days", inline=True)
+        embed.add_field(name="Highest Streak", value=f"{user_data.highest_streak} days", inline=True)
         embed.add_field(name="Last Active", value=time_until_reset, inline=True)
         
         # Add streak bonus info
-        streak_bonus = min(user_data["streak"] * 0.01, 0.5)
+        streak_bonus = min(user_data.streak * 0.01, 0.5)
         if streak_bonus > 0:
             embed.add_field(
                 name="Streak Bonus",
@@ -1686,6 +2890,64 @@ class Leveling(commands.Cog):
         
         await interaction.response.send_message(embed=embed, ephemeral=True)
 
+    @app_commands.command(
+        name="rank",
+        description="🏅 Check your position on the leaderboard"
+    )
+    @app_commands.guilds(GUILD)
+    @app_commands.describe(sort_by="Rank by level or by total XP")
+    @app_commands.choices(sort_by=[
+        app_commands.Choice(name="Level", value="level"),
+        app_commands.Choice(name="Total XP", value="xp")
+    ])
+    @app_commands.checks.cooldown(1, 3)  # 1 use per 3 seconds
+    async def rank(
+        self,
+        interaction: discord.Interaction,
+        user: Optional[discord.Member] = None,
+        sort_by: str = "level"
+    ) -> None:
+        """Check a user's leaderboard position"""
+        try:
+            target_user = user or interaction.user
+            rank = await self._get_rank(target_user.id, sort_by)
+            if not rank:
+                await interaction.response.send_message(
+                    f"{target_user.mention} isn't on the leaderboard yet!",
+                    ephemeral=True
+                )
+                return
+            
+            user_data = self.users[target_user.id]
+            embed = discord.Embed(
+                title=f"🏅 Rank #{rank} of {len(self.rank_index)}",
+                description=f"{target_user.mention} • Level {user_data.level} • {user_data.total_xp:,} total XP",
+                color=self.embed_color
+            )
+            
+            xp_to_pass = self._xp_to_pass_next(target_user.id, sort_by)
+            if xp_to_pass:
+                embed.add_field(
+                    name="XP to Pass the Next Person",
+                    value=f"{xp_to_pass:,} XP",
+                    inline=False
+                )
+            else:
+                embed.add_field(
+                    name="Top of the Leaderboard",
+                    value="Nobody to pass! 👑",
+                    inline=False
+                )
+            
+            await interaction.response.send_message(embed=embed, ephemeral=True)
+            
+        except Exception as e:
+            logger.error(f"Error in rank command: {e}")
+            await interaction.response.send_message(
+                "An error occurred while checking the rank.",
+                ephemeral=True
+            )
+
     @app_commands.command(
         name="leaderboard",
         description="📊 View the server's leveling leaderboard"
@@ -1720,38 +2982,26 @@ class Leveling(commands.Cog):
             color=self.embed_color
         )
         
-        # Get all user data
-        users_data = self.settings.get("users", {})
-        
-        # Sort users based on the specified criteria
-        if sort_by == "level":
-            sorted_users = sorted(
-                users_data.items(),
-                key=lambda x: (x[1]["level"], x[1]["total_xp"]),
-                reverse=True
-            )
-        else:  # sort_by == "xp"
-            sorted_users = sorted(
-                users_data.items(),
-                key=lambda x: x[1]["total_xp"],
-                reverse=True
-            )
-        
         # Calculate pagination
         users_per_page = 10
-        total_pages = (len(sorted_users) + users_per_page - 1) // users_per_page
         start_idx = (page - 1) * users_per_page
-        end_idx = min(start_idx + users_per_page, len(sorted_users))
-        page_users = sorted_users[start_idx:end_idx]
+        
+        # Read one page straight out of the ranked index
+        total_users = len(self.rank_index)
+        page_users = [
+            (user_id, self.users[user_id])
+            for user_id in self.rank_index.page(sort_by, start_idx, users_per_page)
+        ]
+        total_pages = (total_users + users_per_page - 1) // users_per_page
         
         # Add users for current page
         for i, (user_id, data) in enumerate(page_users, start=start_idx + 1):
-            user = guild.get_member(int(user_id))
+            user = guild.get_member(user_id)
             if user:
-                level = data["level"]
-                total_xp = data.get("total_xp", 0)
-                current_xp = data["xp"]
-                next_level_xp = self.xp_formula(level)
+                level = data.level
+                total_xp = data.total_xp
+                current_xp = data.xp
+                next_level_xp = self.level_curve.xp_for_level(level)
                 progress = self._get_progress_bar(current_xp, next_level_xp)
                 
                 # Add medal emoji for top 3
@@ -1768,42 +3018,166 @@ class Leveling(commands.Cog):
         
         return embed
 
+    def _build_roll_table(self) -> None:
+        """Precompute the random multiplier roll table from settings"""
+        multipliers = self.settings["xp_multipliers"]
+        self.roll_table = RollTable(multipliers["multiplier_chances"], multipliers["duration_chances"])
+
+    def _schedule_multiplier_timers(self) -> None:
+        """Queue every known multiplier expiry and scheduled event on the timer"""
+        multipliers = self.settings["xp_multipliers"]
+        if multipliers.get("active_until"):
+            self._global_expiry_handle = self.multiplier_scheduler.schedule(
+                multipliers["active_until"], self._expire_global_multiplier
+            )
+        for event in multipliers.setdefault("scheduled", []):
+            self._schedule_multiplier_event(event)
+        for user_id, user_data in self.users.items():
+            if user_data.active_multiplier:
+                self.multiplier_scheduler.schedule(
+                    user_data.active_multiplier.expires_at, self._expire_user_multiplier, user_id
+                )
+
+    def _set_global_multiplier(self, multiplier: float, active_until: Optional[float] = None) -> None:
+        """Set the global multiplier and (re)arm its expiry timer"""
+        self.settings["xp_multipliers"]["global"] = multiplier
+        self.settings["xp_multipliers"]["active_until"] = active_until
+        self._compile_channel_multipliers()
+        self.multiplier_scheduler.cancel(self._global_expiry_handle)
+        self._global_expiry_handle = None
+        if active_until:
+            self._global_expiry_handle = self.multiplier_scheduler.schedule(
+                active_until, self._expire_global_multiplier
+            )
+
+    def _expire_global_multiplier(self) -> None:
+        """Reset the global multiplier once its duration is over"""
+        self._global_expiry_handle = None
+        self._set_global_multiplier(1.0)
+        self._save_settings()
+        logger.info("Global XP multiplier expired")
+
+    def _expire_user_multiplier(self, user_id: int) -> None:
+        """Clear a user's rolled multiplier once it has run out"""
+        user_data = self.users.get(user_id)
+        multiplier = user_data.active_multiplier if user_data else None
+        # A newer roll may have replaced the multiplier this timer was for
+        if multiplier and multiplier.expires_at <= time.time():
+            user_data.active_multiplier = None
+            self.store.mark_dirty(user_id)
+
+    def _schedule_multiplier_event(self, event: dict) -> None:
+        """Arm the timer that starts a scheduled global multiplier event"""
+        self._event_handles[event["id"]] = self.multiplier_scheduler.schedule(
+            event["starts_at"], self._start_multiplier_event, event["id"]
+        )
+
+    def _add_multiplier_event(self, multiplier: float, starts_at: float, ends_at: float) -> dict:
+        """Schedule a future global multiplier event"""
+        events = self.settings["xp_multipliers"].setdefault("scheduled", [])
+        event = {
+            "id": max((e["id"] for e in events), default=0) + 1,
+            "multiplier": multiplier,
+            "starts_at": starts_at,
+            "ends_at": ends_at
+        }
+        events.append(event)
+        self._schedule_multiplier_event(event)
+        self._save_settings()
+        return event
+
+    def _cancel_multiplier_event(self, event_id: int) -> None:
+        """Remove a scheduled multiplier event before it starts"""
+        events = self.settings["xp_multipliers"].setdefault("scheduled", [])
+        self.settings["xp_multipliers"]["scheduled"] = [e for e in events if e["id"] != event_id]
+        self.multiplier_scheduler.cancel(self._event_handles.pop(event_id, None))
+        self._save_settings()
+
+    def _start_multiplier_event(self, event_id: int) -> None:
+        """Switch a scheduled multiplier event on"""
+        events = self.settings["xp_multipliers"].setdefault("scheduled", [])
+        event = next((e for e in events if e["id"] == event_id), None)
+        self.settings["xp_multipliers"]["scheduled"] = [e for e in events if e["id"] != event_id]
+        self._event_handles.pop(event_id, None)
+        if event and event["ends_at"] > time.time():
+            self._set_global_multiplier(event["multiplier"], event["ends_at"])
+            logger.info(f"Scheduled {event['multiplier']}x XP multiplier event started")
+        self._save_settings()
+
+    def _compile_channel_multipliers(self) -> None:
+        """Flatten channel, category and global multipliers into one table keyed by channel ID"""
+        multipliers = self.settings["xp_multipliers"]
+        global_mult = multipliers["global"]
+        channels = {int(channel_id): mult for channel_id, mult in multipliers["channels"].items()}
+        categories = {int(category_id): mult for category_id, mult in multipliers.setdefault("categories", {}).items()}
+        
+        # A channel's own multiplier wins over its category's; the higher of that and the global applies
+        table = {}
+        guild = self.bot.get_guild(GUILD_ID)
+        if guild:
+            for channel in guild.channels:
+                mult = channels.get(channel.id)
+                if mult is None:
+                    mult = categories.get(channel.category_id, 1.0)
+                table[channel.id] = max(mult, global_mult)
+        # Before the guild is cached, channels with their own multiplier still resolve
+        for channel_id, mult in channels.items():
+            table.setdefault(channel_id, max(mult, global_mult))
+        
+        self._channel_multipliers = table
+        self._default_multiplier = global_mult
+
     def _get_xp_multiplier(self, channel_id: int) -> float:
         """Get the XP multiplier for a channel"""
-        # Check channel-specific multiplier first
-        channel_mult = self.settings["xp_multipliers"]["channels"].get(str(channel_id), 1.0)
-        
-        # Check global multiplier
-        global_mult = self.settings["xp_multipliers"]["global"]
-        active_until = self.settings["xp_multipliers"]["active_until"]
-        
-        # If global multiplier has expired, reset it
-        if active_until and datetime.now().timestamp() > active_until:
-            self.settings["xp_multipliers"]["global"] = 1.0
-            self.settings["xp_multipliers"]["active_until"] = None
-            self._save_settings()
-            global_mult = 1.0
-        
-        # Return the higher multiplier between channel and global
-        return max(channel_mult, global_mult)
+        multiplier = self._channel_multipliers.get(channel_id)
+        if multiplier is None:
+            # Threads aren't in the table until first seen; they inherit from their parent
+            channel = self.bot.get_channel(channel_id)
+            if not isinstance(channel, discord.Thread):
+                return self._default_multiplier
+            multiplier = self._channel_multipliers.get(channel.parent_id, self._default_multiplier)
+            self._channel_multipliers[channel_id] = multiplier
+        return multiplier
+
+    @commands.Cog.listener()
+    async def on_guild_channel_create(self, channel: discord.abc.GuildChannel) -> None:
+        """Give new channels their category's multiplier"""
+        if channel.guild.id == GUILD_ID:
+            self._compile_channel_multipliers()
+
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel: discord.abc.GuildChannel) -> None:
+        """Drop deleted channels (and a deleted category's rule) from the multiplier table"""
+        if channel.guild.id == GUILD_ID:
+            self._compile_channel_multipliers()
+
+    @commands.Cog.listener()
+    async def on_guild_channel_update(self, before: discord.abc.GuildChannel, after: discord.abc.GuildChannel) -> None:
+        """Recompile when a channel moves to another category"""
+        if after.guild.id == GUILD_ID and before.category_id != after.category_id:
+            self._compile_channel_multipliers()
+
+    @commands.Cog.listener()
+    async def on_raw_thread_delete(self, payload: discord.RawThreadDeleteEvent) -> None:
+        """Forget a deleted thread's cached multiplier"""
+        self._channel_multipliers.pop(payload.thread_id, None)
 
-    async def _check_streak(self, user_id: int) -> None:
+    def _check_streak(self, user_data: UserRecord, current_time: float) -> None:
         """Check and update user's streak"""
-        user_data = self._get_user_data(user_id)
-        current_date = datetime.now().date()
+        current_date = datetime.fromtimestamp(current_time).date()
         
         # If last streak date is None, this is their first streak
-        if user_data["last_streak_date"] is None:
-            user_data["streak"] = 1
-            user_data["last_streak_date"] = datetime.combine(current_date, datetime.min.time()).timestamp()
-            user_data["highest_streak"] = 1
+        if user_data.last_streak_date is None:
+            user_data.streak = 1
+            user_data.last_streak_date = datetime.combine(current_date, datetime.min.time()).timestamp()
+            user_data.highest_streak = 1
             return
             
         # Convert timestamp to date if it's a timestamp, otherwise use the date directly
-        if isinstance(user_data["last_streak_date"], (int, float)):
-            last_date = datetime.fromtimestamp(user_data["last_streak_date"]).date()
+        if isinstance(user_data.last_streak_date, (int, float)):
+            last_date = datetime.fromtimestamp(user_data.last_streak_date).date()
         else:
-            last_date = user_data["last_streak_date"]
+            last_date = user_data.last_streak_date
         
         # If it's the same day, don't update streak
         if last_date == current_date:
@@ -1811,157 +3185,145 @@ class Leveling(commands.Cog):
             
         # If it's the next day, increment streak
         if (current_date - last_date).days == 1:
-            user_data["streak"] += 1
-            if user_data["streak"] > user_data["highest_streak"]:
-                user_data["highest_streak"] = user_data["streak"]
+            user_data.streak += 1
+            if user_data.streak > user_data.highest_streak:
+                user_data.highest_streak = user_data.streak
         # If it's more than one day, reset streak
         else:
-            user_data["streak"] = 1
+            user_data.streak = 1
             
         # Convert date to datetime and then to timestamp
-        user_data["last_streak_date"] = datetime.combine(current_date, datetime.min.time()).timestamp()
-
-    async def _award_xp(self, user_id: int, channel_id: int) -> None:
+        user_data.last_streak_date = datetime.combine(current_date, datetime.min.time()).timestamp()
+
+    async def _run_xp_worker(self) -> None:
+        """Turn queued message events into XP every few hundred milliseconds"""
+        while True:
+            try:
+                await asyncio.sleep(self.settings.get("xp_batch_interval_ms", 250) / 1000)
+                await self._process_xp_batch()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Error in XP batch worker: {e}", exc_info=True)
+
+    async def _process_xp_batch(self) -> int:
+        """Award XP for every queued message and announce level ups afterwards"""
+        if not self.xp_queue:
+            return 0
+        
+        start = time.perf_counter()
+        batch, self.xp_queue = self.xp_queue, deque()
+        
+        # Compute the whole batch first; at most one award per user per cooldown
+        awarded = set()
+        level_ups = []
+        for user_id, channel_id, timestamp in batch:
+            if user_id in awarded:
+                continue
+            old_level = self._compute_xp_award(user_id, channel_id, timestamp)
+            if old_level is None:
+                continue
+            awarded.add(user_id)
+            if self.users[user_id].level > old_level:
+                level_ups.append((user_id, channel_id, old_level))
+        
+        self.xp_batch_count += 1
+        self.last_xp_batch_size = len(batch)
+        self.max_xp_batch_size = max(self.max_xp_batch_size, len(batch))
+        self.last_xp_batch_ms = (time.perf_counter() - start) * 1000
+        
+        # Then send level up messages and role rewards
+        for user_id, channel_id, old_level in level_ups:
+            try:
+                await self._announce_level_ups(user_id, channel_id, old_level, self.users[user_id].level)
+            except Exception as e:
+                logger.error(f"Error announcing level up for {user_id}: {e}")
+        return len(awarded)
+
+    async def _award_xp(self, user_id: int, channel_id: int, current_time: Optional[float] = None) -> None:
         """Award XP to a user"""
+        if current_time is None:
+            current_time = datetime.now().timestamp()
+        old_level = self._compute_xp_award(user_id, channel_id, current_time)
+        if old_level is not None:
+            await self._announce_level_ups(user_id, channel_id, old_level, self.users[user_id].level)
+
+    def _compute_xp_award(self, user_id: int, channel_id: int, current_time: float) -> Optional[int]:
+        """Apply one XP award in memory, returning the previous level or None if on cooldown"""
         # Get user data
         user_data = self._get_user_data(user_id)
-        current_time = datetime.now().timestamp()
         
         # Check cooldown
         cooldown = self.settings.get("xp_cooldown", 60)
-        if current_time - user_data["last_xp_gain"] < cooldown:
-            return
+        if current_time - user_data.last_xp_gain < cooldown:
+            return None
         
         # Check and update streak
-        await self._check_streak(user_id)
+        self._check_streak(user_data, current_time)
         
         # Get base XP (15-25)
         base_xp = random.randint(15, 25)
         
+        # Check for random multipliers
+        roll = self.roll_table.roll(random.random(), random.random())
+        if roll:
+            amount, duration, duration_seconds = roll
+            expires_at = current_time + duration_seconds
+            user_data.active_multiplier = ActiveMultiplier(amount, duration, expires_at)
+            self.multiplier_scheduler.schedule(expires_at, self._expire_user_multiplier, user_id)
+        
+        # Calculate final XP
+        xp_gained = int(base_xp * self._user_multiplier(user_data, channel_id, current_time))
+        
+        # Update last gain time
+        user_data.last_xp_gain = current_time
+        user_data.last_active = current_time
+        
+        return self._grant_xp(user_id, user_data, xp_gained)
+
+    def _user_multiplier(self, user_data: UserRecord, channel_id: int, current_time: float) -> float:
+        """Combined channel/global, streak and active random multiplier for one award"""
         # Apply multiplier
         multiplier = self._get_xp_multiplier(channel_id)
         
         # Apply streak bonus (1% per day, up to 50%)
-        streak_bonus = min(user_data["streak"] * 0.01, 0.5)
+        streak_bonus = min(user_data.streak * 0.01, 0.5)
         multiplier *= (1 + streak_bonus)
         
-        # Check for random multipliers
-        rand = random.random()
-        if rand < self.settings["xp_multipliers"]["multiplier_chances"]["10x"]:
-            # Determine duration
-            duration_rand = random.random()
-            duration = None
-            for dur, chance in self.settings["xp_multipliers"]["duration_chances"].items():
-                if duration_rand < chance:
-                    duration = dur
-                    break
-            
-            if duration:
-                # Convert duration to seconds
-                duration_seconds = {
-                    "30m": 1800,  # 30 minutes
-                    "1h": 3600,   # 1 hour
-                    "6h": 21600,  # 6 hours
-                    "12h": 43200, # 12 hours
-                    "24h": 86400  # 24 hours
-                }[duration]
-                
-                multiplier *= 10
-                user_data["active_multiplier"] = {
-                    "amount": 10,
-                    "duration": duration,
-                    "expires_at": current_time + duration_seconds
-                }
-        elif rand < self.settings["xp_multipliers"]["multiplier_chances"]["5x"]:
-            # Determine duration
-            duration_rand = random.random()
-            duration = None
-            for dur, chance in self.settings["xp_multipliers"]["duration_chances"].items():
-                if duration_rand < chance:
-                    duration = dur
-                    break
-            
-            if duration:
-                # Convert duration to seconds
-                duration_seconds = {
-                    "30m": 1800,  # 30 minutes
-                    "1h": 3600,   # 1 hour
-                    "6h": 21600,  # 6 hours
-                    "12h": 43200, # 12 hours
-                    "24h": 86400  # 24 hours
-                }[duration]
-                
-                multiplier *= 5
-                user_data["active_multiplier"] = {
-                    "amount": 5,
-                    "duration": duration,
-                    "expires_at": current_time + duration_seconds
-                }
-        elif rand < self.settings["xp_multipliers"]["multiplier_chances"]["2x"]:
-            # Determine duration
-            duration_rand = random.random()
-            duration = None
-            for dur, chance in self.settings["xp_multipliers"]["duration_chances"].items():
-                if duration_rand < chance:
-                    duration = dur
-                    break
-            
-            if duration:
-                # Convert duration to seconds
-                duration_seconds = {
-                    "30m": 1800,  # 30 minutes
-                    "1h": 3600,   # 1 hour
-                    "6h": 21600,  # 6 hours
-                    "12h": 43200, # 12 hours
-                    "24h": 86400  # 24 hours
-                }[duration]
-                
-                multiplier *= 2
-                user_data["active_multiplier"] = {
-                    "amount": 2,
-                    "duration": duration,
-                    "expires_at": current_time + duration_seconds
-                }
-        
         # Check for active multiplier
-        if "active_multiplier" in user_data:
-            if current_time < user_data["active_multiplier"]["expires_at"]:
-                multiplier *= user_data["active_multiplier"]["amount"]
+        if user_data.active_multiplier:
+            if current_time < user_data.active_multiplier.expires_at:
+                multiplier *= user_data.active_multiplier.amount
             else:
-                del user_data["active_multiplier"]
+                user_data.active_multiplier = None
+        return multiplier
+
+    def _grant_xp(self, user_id: int, user_data: UserRecord, xp_gained: int) -> int:
+        """Add earned XP and queue the row for saving, returning the previous level"""
+        # Add XP to both current and total; the level comes from the precomputed table
+        current_level = self._apply_xp_change(user_data, xp_gained)
+        
+        # Queue the user row for the next write-behind flush and re-rank them
+        self.store.mark_dirty(user_id)
+        self._index_user(user_id)
+        return current_level
+
+    async def _announce_level_ups(self, user_id: int, channel_id: int, old_level: int, new_level: int) -> None:
+        """Queue the level up announcement and apply role rewards for the levels crossed"""
+        if new_level <= old_level:
+            return
         
-        # Calculate final XP
-        xp_gained = int(base_xp * multiplier)
+        # Get user and channel objects
+        user = self.bot.get_user(user_id)
+        channel = self.bot.get_channel(channel_id)
+        if not (user and channel):
+            return
         
-        # Update last gain time
-        user_data["last_xp_gain"] = current_time
-        
-        # Add XP to both current and total
-        current_xp = user_data["xp"]
-        current_level = user_data["level"]
-        user_data["xp"] = current_xp + xp_gained
-        user_data["total_xp"] = user_data.get("total_xp", 0) + xp_gained
-        
-        # Check for level up
-        next_level_xp = self.xp_formula(current_level)
-        while user_data["xp"] >= next_level_xp:
-            user_data["level"] += 1
-            user_data["xp"] -= next_level_xp
-            next_level_xp = self.xp_formula(user_data["level"])
-            
-            # Get user and channel objects
-            user = self.bot.get_user(user_id)
-            channel = self.bot.get_channel(channel_id)
-            
-            if user and channel:
-                # Handle level up event
-                await self._handle_level_up(user, current_level, user_data["level"])
-                
-                # Handle role rewards
-                await self._handle_role_rewards(user_id, user_data["level"])
+        # Queue one announcement covering every level crossed
+        self._handle_level_up(user_id, old_level, new_level)
         
-        # Save user data
-        self._save_settings()
+        # Handle role rewards once for the final level
+        await self._handle_role_rewards(user_id, new_level)
 
 class MessageTemplatesView(discord.ui.View):
     def __init__(self, cog: 'Leveling', previous_view):
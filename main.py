@@ -390,8 +390,14 @@ class KruzBot(commands.Bot):
                 if hasattr(music_cog, 'player_views'):
                     getattr(music_cog, 'player_views', {}).clear()
             
-            # Close any active sessions in cogs
+            # Flush buffered writes and close any active sessions in cogs
             for cog in self.cogs.values():
+                flush_pending_writes = getattr(cog, 'flush_pending_writes', None)
+                if flush_pending_writes is not None:
+                    try:
+                        await flush_pending_writes()
+                    except Exception as e:
+                        logger.error(f"Error flushing pending writes for {cog.qualified_name}: {e}")
                 reddit = getattr(cog, 'reddit', None)
                 if reddit is not None:
                     await reddit.close()
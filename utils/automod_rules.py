@@ -0,0 +1,285 @@
+import logging
+import re
+import time
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional
+
+from utils.link_tokenizer import Link, extract_links
+from utils.spam_tracker import SpamHit, SpamTracker
+from utils.word_matcher import BannedWordMatcher
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RULE_ORDER = ("spam", "advertising", "link_filter", "text_filter", "caps", "emoji_spam")
+
+# Character classes a message contains, worked out once per message
+HAS_DOT = 1
+HAS_ANGLE = 2
+HAS_UPPER = 4
+
+EMOJI_PATTERN = re.compile(r'<a?:\w+:\d+>')
+# Shortest custom emoji, e.g. <:a:1>
+MIN_EMOJI_LENGTH = 6
+
+class MessageContext:
+    """What the rules need to know about one message, computed at most once"""
+
+    __slots__ = ("content", "author_id", "channel_id", "message_id", "whitelisted", "now", "_features", "_links")
+
+    def __init__(self, content: str, author_id: int, channel_id: int, message_id: int,
+                 whitelisted: bool, now: float):
+        self.content = content
+        self.author_id = author_id
+        self.channel_id = channel_id
+        self.message_id = message_id
+        self.whitelisted = whitelisted
+        self.now = now
+        self._features: Optional[int] = None
+        self._links: Optional[List[Link]] = None
+
+    @property
+    def features(self) -> int:
+        """Bitmap of the ``HAS_*`` character classes in the content"""
+        if self._features is None:
+            content = self.content
+            features = 0
+            if "." in content:
+                features |= HAS_DOT
+            if "<" in content and ">" in content:
+                features |= HAS_ANGLE
+            if content != content.lower():
+                features |= HAS_UPPER
+            self._features = features
+        return self._features
+
+    @property
+    def links(self) -> List[Link]:
+        """Links in the content, tokenized on first use and shared by every link rule"""
+        if self._links is None:
+            self._links = extract_links(self.content)
+        return self._links
+
+    @links.setter
+    def links(self, links: List[Link]) -> None:
+        # Set when the links were found elsewhere, e.g. in a worker process
+        self._links = links
+
+class Violation:
+    """A rule's finding, handed to the cog's violation handler"""
+
+    __slots__ = ("rule", "details", "punishment", "spam_hit")
+
+    def __init__(self, rule: str, details: str, punishment: str, spam_hit: Optional[SpamHit] = None):
+        self.rule = rule
+        self.details = details
+        self.punishment = punishment
+        # Messages to clean up for spam violations
+        self.spam_hit = spam_hit
+
+class RuleCounters:
+    """Evaluations, prefilter skips, hits and time spent for one rule"""
+
+    __slots__ = ("evaluations", "skipped", "hits", "nanoseconds")
+
+    def __init__(self):
+        self.evaluations = 0
+        self.skipped = 0
+        self.hits = 0
+        self.nanoseconds = 0
+
+class Rule:
+    """One automod check
+
+    ``requires`` is a bitmap of ``HAS_*`` classes and ``min_length`` a
+    content length; a message missing either is skipped without running
+    ``check``. Rules with ``skip_whitelisted`` don't apply to whitelisted
+    roles and channels.
+    """
+
+    key = ""
+    name = ""
+    requires = 0
+    skip_whitelisted = True
+    uses_links = False
+
+    def __init__(self, punishment: str, min_length: int = 0):
+        self.punishment = punishment
+        self.min_length = min_length
+        self.counters = RuleCounters()
+
+    def prefilter(self, ctx: MessageContext) -> bool:
+        """Whether the message could possibly break this rule"""
+        if len(ctx.content) < self.min_length:
+            return False
+        return not self.requires or ctx.features & self.requires == self.requires
+
+    def check(self, ctx: MessageContext) -> Optional[Violation]:
+        raise NotImplementedError
+
+    def violation(self, details: str, **kwargs) -> Violation:
+        return Violation(self.name, details, self.punishment, **kwargs)
+
+class SpamRule(Rule):
+    key = "spam"
+    name = "Spam"
+
+    def __init__(self, punishment: str, tracker: SpamTracker):
+        super().__init__(punishment)
+        self.tracker = tracker
+
+    def check(self, ctx: MessageContext) -> Optional[Violation]:
+        hit = self.tracker.record(ctx.author_id, ctx.channel_id, ctx.message_id, ctx.now)
+        if hit is None:
+            return None
+        # Start the user's window over in the channel (or everywhere for cross-channel spam)
+        self.tracker.clear(ctx.author_id, ctx.channel_id if hit.scope == "channel" else None)
+        where = "" if hit.scope == "channel" else f" across {len(hit.channel_ids)} channels"
+        return self.violation(f"User sent {hit.count} messages{where} in {hit.window} seconds", spam_hit=hit)
+
+class AdvertisingRule(Rule):
+    key = "advertising"
+    name = "Advertising"
+    requires = HAS_DOT
+    uses_links = True
+
+    def __init__(self, punishment: str, block_invites: bool, block_urls: bool):
+        super().__init__(punishment, min_length=4)
+        self.block_invites = block_invites
+        self.block_urls = block_urls
+
+    def check(self, ctx: MessageContext) -> Optional[Violation]:
+        links = ctx.links
+        if self.block_invites and any(link.is_invite for link in links):
+            return self.violation("Discord invite link detected")
+        if self.block_urls and any(link.scheme in ("http", "https") for link in links):
+            return self.violation("URL detected")
+        return None
+
+class LinkFilterRule(Rule):
+    """Blocked, untrusted and suspicious links; applies to everyone including admins"""
+
+    key = "link_filter"
+    name = "Link Filter"
+    requires = HAS_DOT
+    skip_whitelisted = False
+    uses_links = True
+
+    def __init__(self, punishment: str, verdict: Callable[[Link], str], allow_trusted_only: bool):
+        super().__init__(punishment, min_length=4)
+        self.verdict = verdict
+        self.allow_trusted_only = allow_trusted_only
+
+    def check(self, ctx: MessageContext) -> Optional[Violation]:
+        for link in ctx.links:
+            # Skip if it's a Discord invite
+            if link.is_invite:
+                continue
+            verdict = self.verdict(link)
+            if verdict == "trusted":
+                continue
+            if verdict == "blocked":
+                logger.info(f"Blocking blocked domain: {link.url}")
+                return self.violation(f"Blocked domain detected: {link.url}")
+            if self.allow_trusted_only:
+                logger.info(f"Blocking untrusted domain: {link.url}")
+                return self.violation(f"Untrusted domain detected: {link.url}")
+            if verdict == "suspicious":
+                logger.info(f"Blocking suspicious link: {link.url}")
+                return self.violation(f"Suspicious link detected: {link.url}")
+        return None
+
+class TextFilterRule(Rule):
+    key = "text_filter"
+    name = "Text Filter"
+
+    def __init__(self, punishment: str, matcher: BannedWordMatcher):
+        # Nothing shorter than the shortest banned word can contain one
+        super().__init__(punishment, min_length=max(1, matcher.min_length))
+        self.matcher = matcher
+
+    def check(self, ctx: MessageContext) -> Optional[Violation]:
+        word = self.matcher.find(ctx.content)
+        return self.violation(f"Banned word detected: {word}") if word else None
+
+class CapsRule(Rule):
+    key = "caps"
+    name = "Excessive Caps"
+    requires = HAS_UPPER
+
+    def __init__(self, punishment: str, min_length: int, threshold: float):
+        super().__init__(punishment, min_length=max(1, min_length))
+        self.threshold = threshold
+
+    def check(self, ctx: MessageContext) -> Optional[Violation]:
+        content = ctx.content
+        caps_count = sum(1 for c in content if c.isupper())
+        if caps_count / len(content) >= self.threshold:
+            return self.violation(f"Message contains {caps_count}/{len(content)} uppercase characters")
+        return None
+
+class EmojiSpamRule(Rule):
+    key = "emoji_spam"
+    name = "Emoji Spam"
+    requires = HAS_ANGLE
+
+    def __init__(self, punishment: str, max_emojis: int):
+        # Too short to hold more than max_emojis custom emojis
+        super().__init__(punishment, min_length=(max_emojis + 1) * MIN_EMOJI_LENGTH)
+        self.max_emojis = max_emojis
+
+    def check(self, ctx: MessageContext) -> Optional[Violation]:
+        emoji_count = len(EMOJI_PATTERN.findall(ctx.content))
+        if emoji_count > self.max_emojis:
+            return self.violation(f"Message contains {emoji_count} emojis")
+        return None
+
+def resolve_rule_order(order: Iterable[str]) -> List[str]:
+    """A configured rule order with unknown keys dropped and missing rules appended"""
+    resolved = [key for key in dict.fromkeys(order) if key in DEFAULT_RULE_ORDER]
+    return resolved + [key for key in DEFAULT_RULE_ORDER if key not in resolved]
+
+class RulePipeline:
+    """A compiled snapshot of the automod settings: enabled rules in evaluation order
+
+    Rules run in order and evaluation stops at the first violation, so cheap
+    or high-hit rules belong at the front. Each rule's counters survive
+    recompiling when the previous counters are passed back in.
+    """
+
+    def __init__(self, rules: List[Rule], whitelist_roles: Iterable[int] = (),
+                 whitelist_channels: Iterable[int] = (), counters: Optional[Dict[str, RuleCounters]] = None):
+        self.rules = rules
+        self.whitelist_roles: FrozenSet[int] = frozenset(whitelist_roles)
+        self.whitelist_channels: FrozenSet[int] = frozenset(whitelist_channels)
+        self.counters: Dict[str, RuleCounters] = counters if counters is not None else {}
+        for rule in rules:
+            rule.counters = self.counters.setdefault(rule.key, rule.counters)
+
+    def is_whitelisted(self, role_ids: Iterable[int], channel_id: int) -> bool:
+        if channel_id in self.whitelist_channels:
+            return True
+        return bool(self.whitelist_roles) and any(role_id in self.whitelist_roles for role_id in role_ids)
+
+    def link_rule(self, ctx: MessageContext) -> Optional[Rule]:
+        """The first rule in order that would tokenize this message's links, or None"""
+        for rule in self.rules:
+            if rule.uses_links and not (ctx.whitelisted and rule.skip_whitelisted) and rule.prefilter(ctx):
+                return rule
+        return None
+
+    def evaluate(self, ctx: MessageContext) -> Optional[Violation]:
+        """The first violation in rule order, or None"""
+        for rule in self.rules:
+            if ctx.whitelisted and rule.skip_whitelisted:
+                continue
+            counters = rule.counters
+            if not rule.prefilter(ctx):
+                counters.skipped += 1
+                continue
+            start = time.perf_counter_ns()
+            violation = rule.check(ctx)
+            counters.nanoseconds += time.perf_counter_ns() - start
+            counters.evaluations += 1
+            if violation is not None:
+                counters.hits += 1
+                return violation
+        return None
@@ -0,0 +1,89 @@
+from typing import Dict, List
+
+import numpy as np
+
+from utils.level_curve import LevelCurve
+from utils.user_record import UserRecord
+
+class XPTable:
+    """Column arrays of the users table for whole-table XP operations
+
+    Each user is one row across ``ids``, ``total_xp``, ``level``, ``xp`` and
+    ``last_active``, so a bulk change is a handful of array expressions
+    instead of a Python loop per user.
+    """
+
+    def __init__(self, users: Dict[int, UserRecord]):
+        count = len(users)
+        self.ids = np.fromiter(users.keys(), dtype=np.int64, count=count)
+        records = list(users.values())
+        self.total_xp = np.fromiter((r.total_xp for r in records), dtype=np.int64, count=count)
+        self.level = np.fromiter((r.level for r in records), dtype=np.int64, count=count)
+        self.xp = np.fromiter((r.xp for r in records), dtype=np.int64, count=count)
+        self.last_active = np.fromiter((r.last_active or 0 for r in records), dtype=np.float64, count=count)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+class BulkPlan:
+    """New ``total_xp``/``level``/``xp`` columns for a table, computed but not yet applied"""
+
+    def __init__(self, table: XPTable, curve: LevelCurve, total_xp: np.ndarray):
+        self.table = table
+        self.total_xp = total_xp
+        self.level, self.xp = progress(curve, total_xp)
+        self.changed = (
+            (total_xp != table.total_xp) | (self.level != table.level) | (self.xp != table.xp)
+        )
+
+    def summary(self) -> Dict[str, int]:
+        """Counts for a dry-run preview"""
+        level_delta = self.level - self.table.level
+        return {
+            "users": len(self.table),
+            "changed": int(np.count_nonzero(self.changed)),
+            "level_changed": int(np.count_nonzero(level_delta)),
+            "level_up": int(np.count_nonzero(level_delta > 0)),
+            "level_down": int(np.count_nonzero(level_delta < 0)),
+            "xp_removed": int(np.clip(self.table.total_xp - self.total_xp, 0, None).sum())
+        }
+
+    def apply(self, users: Dict[int, UserRecord]) -> List[int]:
+        """Write the new columns back into the records and return the changed user IDs"""
+        rows = np.flatnonzero(self.changed)
+        user_ids = self.table.ids[rows].tolist()
+        for user_id, total_xp, level, xp in zip(
+            user_ids,
+            self.total_xp[rows].tolist(),
+            self.level[rows].tolist(),
+            self.xp[rows].tolist()
+        ):
+            user_data = users.get(user_id)
+            if user_data is None:
+                continue
+            user_data.total_xp = total_xp
+            user_data.level = level
+            user_data.xp = xp
+        return user_ids
+
+def progress(curve: LevelCurve, total_xp):
+    """Vectorized ``LevelCurve.progress``: ``(levels, xp into each level)``"""
+    total_xp = np.asarray(total_xp, dtype=np.int64)
+    cumulative = np.frombuffer(curve.cumulative, dtype=np.int64)
+    level = np.searchsorted(cumulative, total_xp, side="right") - 1
+    return level, total_xp - cumulative[level]
+
+def plan_recalculate(table: XPTable, curve: LevelCurve) -> BulkPlan:
+    """Recompute every level and XP from total XP, e.g. after the curve or level cap changed"""
+    return BulkPlan(table, curve, table.total_xp.copy())
+
+def plan_seasonal_reset(table: XPTable, curve: LevelCurve, keep_percent: float = 0) -> BulkPlan:
+    """Reset everyone's total XP, carrying over ``keep_percent`` of it into the new season"""
+    kept = np.floor(table.total_xp * (keep_percent / 100)).astype(np.int64)
+    return BulkPlan(table, curve, kept)
+
+def plan_decay(table: XPTable, curve: LevelCurve, percent: float, inactive_days: float, now: float) -> BulkPlan:
+    """Take ``percent`` of total XP from users who haven't earned message or voice XP in ``inactive_days``"""
+    inactive = table.last_active < now - inactive_days * 86400
+    decayed = np.floor(table.total_xp * (1 - percent / 100)).astype(np.int64)
+    return BulkPlan(table, curve, np.where(inactive, decayed, table.total_xp))
@@ -0,0 +1,64 @@
+from typing import Iterable, List, Optional, Set, Tuple
+
+# Single-label entries that only their owners can register under; any other
+# bare TLD such as "com" would trust (or block) half the internet
+RESTRICTED_TLDS = {"gov", "mil", "edu"}
+
+def normalize_domain(domain: str) -> str:
+    """Lowercase a domain and strip schemes, paths, ports and a leading ``www.``"""
+    domain = domain.strip().lower()
+    if "://" in domain:
+        domain = domain.split("://", 1)[1]
+    domain = domain.split("/", 1)[0].split(":", 1)[0].strip(".")
+    if domain.startswith("www."):
+        domain = domain[4:]
+    return domain
+
+def split_overbroad(domains: Iterable[str]) -> Tuple[Set[str], List[str]]:
+    """Normalized domains, minus bare TLDs that would match every site under them"""
+    kept, dropped = set(), []
+    for domain in domains:
+        domain = normalize_domain(domain)
+        if not domain:
+            continue
+        if "." not in domain and domain not in RESTRICTED_TLDS:
+            dropped.append(domain)
+        else:
+            kept.add(domain)
+    return kept, sorted(set(dropped))
+
+class DomainRuleSet:
+    """Allow and deny rules matched on whole domain suffixes
+
+    A rule for ``example.com`` covers ``example.com`` and every subdomain of
+    it, but not ``badexample.com`` or ``example.com.evil.net``. Lookups walk
+    the host's labels from the right, one set lookup per label, so their cost
+    depends on the host and not on how many rules there are. The most
+    specific matching rule wins, and deny wins over allow for the same
+    domain.
+    """
+
+    def __init__(self, allow: Iterable[str] = (), deny: Iterable[str] = ()):
+        self.allow: Set[str] = {normalize_domain(domain) for domain in allow} - {""}
+        self.deny: Set[str] = {normalize_domain(domain) for domain in deny} - {""}
+
+    def __len__(self) -> int:
+        return len(self.allow) + len(self.deny)
+
+    def match(self, host: str) -> Optional[Tuple[bool, str]]:
+        """``(allowed, rule)`` for the most specific rule covering ``host``, or None"""
+        labels = host.lower().rstrip(".").split(".")
+        verdict = None
+        suffix = ""
+        for label in reversed(labels):
+            suffix = f"{label}.{suffix}" if suffix else label
+            if suffix in self.deny:
+                verdict = (False, suffix)
+            elif suffix in self.allow:
+                verdict = (True, suffix)
+        return verdict
+
+    def verdict(self, host: str) -> Optional[bool]:
+        """True if allowed, False if denied, None if no rule covers ``host``"""
+        match = self.match(host)
+        return match[0] if match else None
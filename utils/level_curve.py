@@ -0,0 +1,48 @@
+from array import array
+from bisect import bisect_right
+from typing import Callable, Tuple
+
+class LevelCurve:
+    """Precomputed XP thresholds for every level up to the level cap
+
+    ``per_level[n]`` is the XP needed to go from level ``n`` to ``n + 1`` and
+    ``cumulative[n]`` is the total XP needed to reach level ``n``, so turning a
+    running XP total into a level is a single bisect instead of a loop over
+    the formula.
+    """
+
+    def __init__(self, formula: Callable[[int], int], max_level: int):
+        self.formula = formula
+        self.max_level = max_level
+        self.per_level = array('q', (formula(level) for level in range(max_level + 1)))
+        self.cumulative = array('q', [0])
+        for needed in self.per_level[:max_level]:
+            self.cumulative.append(self.cumulative[-1] + needed)
+
+    def xp_for_level(self, level: int) -> int:
+        """XP needed to advance from ``level`` to the next one"""
+        if 0 <= level <= self.max_level:
+            return self.per_level[level]
+        # Rows from before the cap was lowered can sit above it
+        return self.formula(level)
+
+    def threshold(self, level: int) -> int:
+        """Total XP needed to reach ``level`` (clamped to the cap)"""
+        return self.cumulative[max(0, min(level, self.max_level))]
+
+    def level_for_total(self, total: int) -> int:
+        """Highest level reachable with ``total`` XP, never above the cap"""
+        return bisect_right(self.cumulative, total) - 1
+
+    def progress(self, total: int) -> Tuple[int, int]:
+        """Split a running XP total into ``(level, xp into that level)``"""
+        level = self.level_for_total(total)
+        return level, total - self.cumulative[level]
+
+    def position(self, level: int, xp: int) -> int:
+        """Running XP total for a user stored as ``level`` plus ``xp`` into it"""
+        return self.threshold(level) + xp
+
+    def xp_until(self, level: int, xp: int, target_level: int) -> int:
+        """XP still needed for a user at ``level`` + ``xp`` to reach ``target_level``"""
+        return max(0, self.threshold(target_level) - self.position(level, xp))
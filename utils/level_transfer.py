@@ -0,0 +1,190 @@
+import codecs
+import csv
+import json
+import sys
+import zlib
+from typing import IO, Iterable, List, Optional, Tuple
+
+from utils.level_curve import LevelCurve
+
+EXPORT_COLUMNS = ("user_id", "total_xp", "level", "xp", "streak")
+
+# Header names other level bots use for the columns we read
+COLUMN_ALIASES = {
+    "user_id": ("user_id", "userid", "id", "user", "member_id"),
+    "total_xp": ("total_xp", "totalxp", "experience", "exp"),
+    "level": ("level", "lvl"),
+    "streak": ("streak",)
+}
+# "xp" is XP into the current level in our own export, so it only stands
+# for total XP in files with no total XP or level column
+TOTAL_XP_FALLBACK = "xp"
+
+# Largest value the XP arrays and the SQLite backend can hold
+MAX_STORED_INT = (1 << 63) - 1
+
+def detect_format(filename: str) -> Tuple[Optional[str], bool]:
+    """``(format, gzipped)`` from a file name such as ``levels.csv.gz``"""
+    name = filename.lower()
+    compressed = name.endswith(".gz")
+    if compressed:
+        name = name[:-3]
+    if name.endswith(".csv"):
+        return "csv", compressed
+    if name.endswith((".ndjson", ".jsonl", ".json")):
+        return "ndjson", compressed
+    return None, compressed
+
+def _to_int(value) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        if value is None or value == "":
+            return None
+        return int(float(value))
+
+class ParsedChunk:
+    """Import rows parsed from one chunk of lines, as parallel lists"""
+
+    __slots__ = ("user_ids", "total_xp", "streaks", "skipped")
+
+    def __init__(self):
+        self.user_ids: List[int] = []
+        self.total_xp: List[int] = []
+        self.streaks: List[Optional[int]] = []
+        self.skipped = 0
+
+    def __len__(self) -> int:
+        return len(self.user_ids)
+
+class ImportReader:
+    """Turns a downloaded byte stream into chunks of parsed rows
+
+    Bytes are fed in as they arrive; only the current partial line and the
+    lines of the chunk being parsed are held in memory. Parsing is plain
+    Python with no event loop access, so callers run ``parse`` in a worker
+    thread.
+    """
+
+    def __init__(self, fmt: str, compressed: bool, curve: LevelCurve):
+        self.fmt = fmt
+        self.curve = curve
+        self._inflater = zlib.decompressobj(wbits=31) if compressed else None
+        self._decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+        self._tail = ""
+        self._columns: Optional[Tuple[int, int, int, int]] = None
+
+    def feed(self, data: bytes) -> List[str]:
+        """Complete lines contained in ``data`` plus the carried-over partial line"""
+        if self._inflater:
+            data = self._inflater.decompress(data)
+        text = self._tail + self._decoder.decode(data)
+        lines = text.split("\n")
+        self._tail = lines.pop()
+        return lines
+
+    def finish(self) -> List[str]:
+        """Whatever is left once the stream has ended"""
+        data = self._inflater.flush() if self._inflater else b""
+        text = self._tail + self._decoder.decode(data, final=True)
+        self._tail = ""
+        return text.split("\n")
+
+    def parse(self, lines: List[str]) -> ParsedChunk:
+        """Parse a chunk of lines; rows without a usable user ID or XP are counted as skipped"""
+        chunk = ParsedChunk()
+        rows = self._csv_rows(lines) if self.fmt == "csv" else self._ndjson_rows(lines)
+        threshold = self.curve.threshold
+        user_ids, totals, streaks = chunk.user_ids, chunk.total_xp, chunk.streaks
+
+        for user_id, total_xp, level, streak in rows:
+            try:
+                user_id = _to_int(user_id)
+                total_xp = _to_int(total_xp)
+                if total_xp is None:
+                    # Only a level to go on; start the user at that level's threshold
+                    level = _to_int(level)
+                    total_xp = threshold(level) if level is not None else None
+                streak = _to_int(streak)
+            except (TypeError, ValueError, OverflowError):
+                # OverflowError: inf, or a float too large for int()
+                chunk.skipped += 1
+                continue
+            if (not user_id or not 0 < user_id <= MAX_STORED_INT
+                    or total_xp is None or not 0 <= total_xp <= MAX_STORED_INT):
+                chunk.skipped += 1
+                continue
+            user_ids.append(user_id)
+            totals.append(total_xp)
+            streaks.append(streak if streak is None else min(max(streak, 0), MAX_STORED_INT))
+        return chunk
+
+    def _csv_rows(self, lines: List[str]) -> Iterable[tuple]:
+        for fields in csv.reader(line for line in lines if line.strip()):
+            if self._columns is None:
+                self._columns, is_header = self._csv_columns(fields)
+                if is_header:
+                    continue
+            user_id, total_xp, level, streak = self._columns
+            count = len(fields)
+            yield (
+                fields[user_id] if user_id < count else None,
+                fields[total_xp] if total_xp < count else None,
+                fields[level] if level < count else None,
+                fields[streak] if streak < count else None
+            )
+
+    @staticmethod
+    def _csv_columns(fields: List[str]) -> Tuple[Tuple[int, int, int, int], bool]:
+        """Column index for each of ``COLUMN_ALIASES`` and whether ``fields`` is a header row
+
+        Columns the file doesn't have get an index past the end of any row.
+        """
+        header = [field.strip().lower() for field in fields]
+        missing = sys.maxsize
+        columns = tuple(
+            next((header.index(alias) for alias in aliases if alias in header), missing)
+            for aliases in COLUMN_ALIASES.values()
+        )
+        if columns[1] == missing and columns[2] == missing and TOTAL_XP_FALLBACK in header:
+            columns = (columns[0], header.index(TOTAL_XP_FALLBACK)) + columns[2:]
+        if columns[0] != missing:
+            return columns, True
+        # No header row: the export column order
+        return tuple(EXPORT_COLUMNS.index(name) for name in COLUMN_ALIASES), False
+
+    @staticmethod
+    def _ndjson_rows(lines: List[str]) -> Iterable[tuple]:
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                data = json.loads(line)
+            except json.JSONDecodeError:
+                data = None
+            if not isinstance(data, dict):
+                # Counted as skipped by parse
+                yield None, None, None, None
+                continue
+            lowered = {str(key).lower(): value for key, value in data.items()}
+            user_id, total_xp, level, streak = (
+                next((lowered[alias] for alias in aliases if alias in lowered), None)
+                for aliases in COLUMN_ALIASES.values()
+            )
+            if total_xp is None and level is None:
+                total_xp = lowered.get(TOTAL_XP_FALLBACK)
+            yield user_id, total_xp, level, streak
+
+def write_export_rows(f: IO[str], fmt: str, rows: List[tuple], header: bool = False) -> None:
+    """Append ``EXPORT_COLUMNS`` rows to an open export file (runs in a worker thread)"""
+    if fmt == "csv":
+        writer = csv.writer(f, lineterminator="\n")
+        if header:
+            writer.writerow(EXPORT_COLUMNS)
+        writer.writerows(rows)
+    else:
+        f.write("".join(
+            json.dumps(dict(zip(EXPORT_COLUMNS, row)), separators=(",", ":")) + "\n"
+            for row in rows
+        ))
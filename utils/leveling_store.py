@@ -0,0 +1,445 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+class JournalBackend:
+    """Append-only NDJSON journal of changed user rows
+
+    The full users table still lives in the leveling settings file. The journal
+    only holds rows that changed since that file was last written and is
+    replayed over it on startup.
+    """
+
+    # Full snapshots of the settings file carry the users table
+    snapshot_includes_users = True
+
+    def __init__(self, path: str = 'data/leveling_users.journal', compact_after: int = 50000):
+        self.path = path
+        self.compact_after = compact_after
+        self.rows_since_snapshot = 0
+
+    def load_into(self, users: Dict[int, Any], factory: Callable[[dict], Any] = dict) -> int:
+        """Replay journal rows over the users loaded from the snapshot"""
+        replayed = 0
+        # A rotated journal only survives if the process died mid-snapshot
+        for path in (f"{self.path}.old", self.path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        line = line.strip()
+                        if not line:
+                            continue
+                        try:
+                            entry = json.loads(line)
+                        except ValueError:
+                            # A torn final line from a crash mid-append; everything before it is intact
+                            logger.warning(f"Skipping corrupt leveling journal line in {path}")
+                            continue
+                        users[int(entry["id"])] = factory(entry["row"])
+                        replayed += 1
+            except FileNotFoundError:
+                pass
+        self.rows_since_snapshot = replayed
+        return replayed
+
+    def write_rows(self, rows: List[Tuple[int, dict]]) -> None:
+        """Append changed rows to the journal (runs in a worker thread)"""
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(''.join(
+                json.dumps({"id": user_id, "row": row}, separators=(',', ':')) + '\n'
+                for user_id, row in rows
+            ))
+        self.rows_since_snapshot += len(rows)
+
+    def rotate(self) -> None:
+        """Move the journal aside when a snapshot starts so new rows land in a fresh file"""
+        rotated_path = f"{self.path}.old"
+        try:
+            if os.path.exists(rotated_path):
+                # An earlier snapshot is still being written; keep both sets of rows
+                with open(self.path, 'r', encoding='utf-8') as src, \
+                        open(rotated_path, 'a', encoding='utf-8') as dst:
+                    dst.write(src.read())
+                os.remove(self.path)
+            else:
+                os.replace(self.path, rotated_path)
+        except FileNotFoundError:
+            pass
+        self.rows_since_snapshot = 0
+
+    def discard_rotated(self) -> None:
+        """Drop the rotated journal once the snapshot covering it is on disk"""
+        try:
+            os.remove(f"{self.path}.old")
+        except FileNotFoundError:
+            pass
+
+    def needs_compaction(self) -> bool:
+        return self.rows_since_snapshot >= self.compact_after
+
+    def close(self) -> None:
+        pass
+
+class SqliteBackend:
+    """User rows kept in a SQLite database in WAL mode
+
+    Only dirty rows are upserted. Writes come from the flusher's worker
+    thread on their own connection, reads from the event loop on another,
+    so readers never wait on a flush.
+    """
+
+    snapshot_includes_users = False
+
+    COLUMNS = (
+        "user_id, xp, level, total_xp, last_xp_gain, streak, "
+        "last_streak_date, highest_streak, active_multiplier, last_active"
+    )
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS users (
+            user_id INTEGER PRIMARY KEY,
+            xp INTEGER NOT NULL DEFAULT 0,
+            level INTEGER NOT NULL DEFAULT 0,
+            total_xp INTEGER NOT NULL DEFAULT 0,
+            last_xp_gain REAL NOT NULL DEFAULT 0,
+            streak INTEGER NOT NULL DEFAULT 0,
+            last_streak_date REAL,
+            highest_streak INTEGER NOT NULL DEFAULT 0,
+            active_multiplier TEXT,
+            last_active REAL NOT NULL DEFAULT 0
+        );
+        -- Leaderboard pages and ranks come from the cog's in-memory rank index,
+        -- so these older indexes would only slow down every upsert
+        DROP INDEX IF EXISTS idx_users_level_total_xp;
+        DROP INDEX IF EXISTS idx_users_total_xp;
+    """
+
+    UPSERT = """
+        INSERT INTO users ({columns})
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(user_id) DO UPDATE SET
+            xp = excluded.xp,
+            level = excluded.level,
+            total_xp = excluded.total_xp,
+            last_xp_gain = excluded.last_xp_gain,
+            streak = excluded.streak,
+            last_streak_date = excluded.last_streak_date,
+            highest_streak = excluded.highest_streak,
+            active_multiplier = excluded.active_multiplier,
+            last_active = excluded.last_active
+    """.format(columns=COLUMNS)
+
+    def __init__(self, path: str = 'data/leveling.db'):
+        self.path = path
+        self.rows_since_snapshot = 0
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._write_conn = self._connect()
+        self._write_conn.executescript(self.SCHEMA)
+        self._migrate()
+        self._read_conn = self._connect()
+
+    def _migrate(self) -> None:
+        """Add columns that databases created by older versions lack"""
+        columns = {row[1] for row in self._write_conn.execute("PRAGMA table_info(users)")}
+        if "last_active" not in columns:
+            with self._write_conn:
+                self._write_conn.execute("ALTER TABLE users ADD COLUMN last_active REAL NOT NULL DEFAULT 0")
+                self._write_conn.execute("UPDATE users SET last_active = last_xp_gain")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @staticmethod
+    def _to_params(user_id: int, row: dict) -> tuple:
+        multiplier = row.get("active_multiplier")
+        return (
+            int(user_id),
+            row.get("xp", 0),
+            row.get("level", 0),
+            row.get("total_xp", 0),
+            row.get("last_xp_gain", 0),
+            row.get("streak", 0),
+            row.get("last_streak_date"),
+            row.get("highest_streak", 0),
+            json.dumps(multiplier) if multiplier else None,
+            row.get("last_active", row.get("last_xp_gain", 0))
+        )
+
+    @staticmethod
+    def _to_row(record: tuple) -> Tuple[int, dict]:
+        (user_id, xp, level, total_xp, last_xp_gain, streak,
+         last_streak_date, highest_streak, multiplier, last_active) = record
+        row = {
+            "xp": xp,
+            "level": level,
+            "last_xp_gain": last_xp_gain,
+            "streak": streak,
+            "last_streak_date": last_streak_date,
+            "highest_streak": highest_streak,
+            "total_xp": total_xp,
+            "last_active": last_active
+        }
+        if multiplier:
+            row["active_multiplier"] = json.loads(multiplier)
+        return user_id, row
+
+    def load_into(self, users: Dict[int, Any], factory: Callable[[dict], Any] = dict) -> int:
+        """Load every user row from the database"""
+        loaded = 0
+        for record in self._read_conn.execute(f"SELECT {self.COLUMNS} FROM users"):
+            user_id, row = self._to_row(record)
+            users[user_id] = factory(row)
+            loaded += 1
+        return loaded
+
+    def write_rows(self, rows: List[Tuple[int, dict]]) -> None:
+        """Upsert changed rows in one transaction (runs in a worker thread)"""
+        with self._write_conn:
+            self._write_conn.executemany(
+                self.UPSERT,
+                (self._to_params(user_id, row) for user_id, row in rows)
+            )
+
+    def rotate(self) -> None:
+        pass
+
+    def discard_rotated(self) -> None:
+        pass
+
+    def needs_compaction(self) -> bool:
+        return False
+
+    def count(self) -> int:
+        return self._read_conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+
+    def close(self) -> None:
+        self._read_conn.close()
+        self._write_conn.close()
+
+def migrate_json_to_sqlite(
+    json_path: str = 'data/leveling_settings.json',
+    db_path: str = 'data/leveling.db',
+    journal_path: Optional[str] = 'data/leveling_users.journal'
+) -> int:
+    """One-shot copy of every user row from the JSON settings file into SQLite"""
+    with open(json_path, 'r') as f:
+        users = {int(user_id): row for user_id, row in json.load(f).get('settings', {}).get('users', {}).items()}
+    if journal_path:
+        JournalBackend(journal_path).load_into(users)
+
+    backend = SqliteBackend(db_path)
+    try:
+        backend.write_rows(list(users.items()))
+    finally:
+        backend.close()
+    return len(users)
+
+class WriteBehindStore:
+    """Buffers user row changes in memory and persists only the dirty rows
+
+    Rows are marked dirty on the event loop. A background task flushes them to
+    the backend in a worker thread every ``flush_interval`` seconds, or sooner
+    once ``flush_threshold`` rows are waiting.
+    """
+
+    def __init__(
+        self,
+        backend: JournalBackend,
+        get_row: Callable[[int], Optional[dict]],
+        flush_interval: float = 10.0,
+        flush_threshold: int = 500
+    ):
+        self.backend = backend
+        self._get_row = get_row
+        self.flush_interval = flush_interval
+        self.flush_threshold = flush_threshold
+
+        self._dirty: Set[int] = set()
+        self._lock = threading.Lock()
+        self._snapshot_lock = threading.Lock()
+        self._generation = 0
+        self._snapshot_generation = 0
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._compact_callback: Optional[Callable] = None
+
+        # Counters
+        self.flush_count = 0
+        self.rows_flushed = 0
+        self.failed_flushes = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self.total_flush_ms = 0.0
+        self.max_queue_depth = 0
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of rows waiting to be written"""
+        return len(self._dirty)
+
+    def mark_dirty(self, user_id: int) -> None:
+        """Record that a user row changed and needs to be persisted"""
+        self._dirty.add(user_id)
+        depth = len(self._dirty)
+        if depth > self.max_queue_depth:
+            self.max_queue_depth = depth
+        if depth >= self.flush_threshold and self._wakeup is not None:
+            self._wakeup.set()
+
+    def mark_dirty_many(self, user_ids: Iterable[int]) -> None:
+        """Record that many user rows changed at once"""
+        self._dirty.update(user_ids)
+        depth = len(self._dirty)
+        if depth > self.max_queue_depth:
+            self.max_queue_depth = depth
+        if depth >= self.flush_threshold and self._wakeup is not None:
+            self._wakeup.set()
+
+    def start(self, compact_callback: Optional[Callable] = None) -> None:
+        """Start the background flusher"""
+        self._compact_callback = compact_callback
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the background flusher and write anything still pending"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                await self.flush()
+                if self._compact_callback and self.backend.needs_compaction():
+                    await self._compact_callback()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Error in leveling write-behind flusher: {e}")
+                await asyncio.sleep(self.flush_interval)
+
+    async def flush(self) -> int:
+        """Write all dirty rows to the backend and return how many were written"""
+        if not self._dirty:
+            return 0
+
+        dirty, self._dirty = self._dirty, set()
+        # get_row serializes on the loop so the worker thread never sees a row mid-update
+        rows = []
+        for user_id in dirty:
+            row = self._get_row(user_id)
+            if row is not None:
+                rows.append((user_id, row))
+        generation = self._generation
+
+        start = time.perf_counter()
+        try:
+            await asyncio.to_thread(self._write_rows, rows, generation)
+        except Exception as e:
+            logger.error(f"Error flushing {len(rows)} leveling rows: {e}")
+            self._dirty |= dirty
+            self.failed_flushes += 1
+            return 0
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self.flush_count += 1
+        self.rows_flushed += len(rows)
+        self.last_flush_ms = elapsed_ms
+        self.total_flush_ms += elapsed_ms
+        self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+        return len(rows)
+
+    def _write_rows(self, rows: List[Tuple[int, dict]], generation: int) -> None:
+        with self._lock:
+            # A snapshot written since these rows were copied already contains them
+            if generation != self._generation:
+                return
+            self.backend.write_rows(rows)
+
+    def _begin_snapshot(self) -> int:
+        # Called on the loop right after the snapshot data was built, so every
+        # row dirtied so far is in it
+        with self._lock:
+            if self.backend.snapshot_includes_users:
+                self._generation += 1
+                self._dirty = set()
+                self.backend.rotate()
+            return self._generation
+
+    def _write_snapshot_file(self, path: str, data: dict, generation: int) -> None:
+        with self._snapshot_lock:
+            # Never let an older snapshot overwrite a newer one
+            if generation < self._snapshot_generation:
+                return
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(data, f, indent=4)
+            os.replace(tmp_path, path)
+            self._snapshot_generation = generation
+            # A newer snapshot has rotated rows into the old journal that this one lacks
+            if generation == self._generation:
+                self.backend.discard_rotated()
+
+    def write_snapshot(self, path: str, data: dict) -> None:
+        """Atomically write a full snapshot and discard the now redundant journal
+
+        With a backend that keeps users outside the snapshot this only writes
+        the settings file and leaves dirty rows queued.
+        """
+        generation = self._begin_snapshot()
+        self._write_snapshot_file(path, data, generation)
+
+    async def write_snapshot_async(self, path: str, data: dict) -> None:
+        """Write a full snapshot from a worker thread
+
+        ``data`` must be a private copy built on the loop immediately before
+        this call. Rows dirtied while the file is written go to the new journal.
+        """
+        generation = self._begin_snapshot()
+        await asyncio.to_thread(self._write_snapshot_file, path, data, generation)
+
+    def stats(self) -> Dict[str, float]:
+        """Flush latency and queue depth counters"""
+        return {
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "flush_count": self.flush_count,
+            "rows_flushed": self.rows_flushed,
+            "failed_flushes": self.failed_flushes,
+            "last_flush_ms": self.last_flush_ms,
+            "avg_flush_ms": self.total_flush_ms / self.flush_count if self.flush_count else 0.0,
+            "max_flush_ms": self.max_flush_ms,
+            "journal_rows": self.backend.rows_since_snapshot
+        }
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) < 2 or sys.argv[1] != "migrate":
+        print("Usage: python -m utils.leveling_store migrate [json_path] [db_path]")
+        sys.exit(1)
+    migrated = migrate_json_to_sqlite(*sys.argv[2:4])
+    print(f"Migrated {migrated} leveling users to SQLite")
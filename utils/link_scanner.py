@@ -0,0 +1,121 @@
+import asyncio
+import logging
+import multiprocessing
+from typing import Callable, Dict, List, Optional
+
+from utils.link_tokenizer import Link, extract_links
+
+logger = logging.getLogger(__name__)
+
+def _process_context():
+    # Forking the bot would copy its threads and their held locks into the worker;
+    # a fork server starts from a clean process, with spawn as the portable fallback
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+class LinkScanner:
+    """Runs link extraction for large messages in a worker process with a deadline
+
+    Regular expressions hold the GIL for a whole match, so a scan that runs
+    long in a thread would still stall the event loop; a process can be
+    killed instead. A scan that misses its deadline returns None, and the
+    pool is terminated and replaced so a stuck worker can't hold up the
+    ones after it. Starting and stopping workers blocks, so both run in a
+    thread; call ``start`` before the first scan and ``close`` when done.
+    """
+
+    def __init__(self, timeout: float = 0.5, workers: int = 1,
+                 scan: Callable[[str], List[Link]] = extract_links):
+        self.timeout = timeout
+        self.workers = max(1, workers)
+        self.scan_function = scan
+        self._context = _process_context()
+        self._pool = None
+        self._starting: Optional[asyncio.Future] = None
+        self.scans = 0
+        self.timeouts = 0
+        self.errors = 0
+
+    def _start_pool(self, stuck=None) -> None:
+        if stuck is not None:
+            stuck.terminate()
+        pool = self._context.Pool(self.workers)
+        # New workers import their modules first; wait for that here rather than in a scan
+        pool.apply(self.scan_function, ("",))
+        self._pool = pool
+
+    def _launch(self, stuck=None) -> None:
+        # Starting and terminating pools join threads and processes, so keep them off the event loop
+        self._starting = asyncio.ensure_future(asyncio.to_thread(self._start_pool, stuck))
+        self._starting.add_done_callback(self._started)
+
+    @staticmethod
+    def _started(future: asyncio.Future) -> None:
+        if not future.cancelled() and future.exception() is not None:
+            logger.error(f"Error starting link scan workers: {future.exception()}")
+
+    async def start(self) -> None:
+        """Start the worker processes if they aren't running"""
+        if self._pool is not None:
+            return
+        if self._starting is None or self._starting.done():
+            self._launch()
+        # Shielded so a caller's deadline can't abandon a half-started pool
+        await asyncio.shield(self._starting)
+
+    async def scan(self, text: str) -> Optional[List[Link]]:
+        """Links in ``text``, or None if the scan failed or missed its deadline"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.timeout
+        future = loop.create_future()
+
+        def resolve(result=None, error=None):
+            # Called on the pool's result thread; the future may already have timed out
+            if future.done():
+                return
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+        self.scans += 1
+        pool = None
+        try:
+            if self._pool is None:
+                # Being replaced after a timeout; waiting for it counts against the deadline
+                await asyncio.wait_for(self.start(), self.timeout)
+            pool = self._pool
+            pool.apply_async(
+                self.scan_function, (text,),
+                callback=lambda result: loop.call_soon_threadsafe(resolve, result),
+                error_callback=lambda error: loop.call_soon_threadsafe(resolve, None, error)
+            )
+            return await asyncio.wait_for(future, max(0.0, deadline - loop.time()))
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            logger.warning(f"Link scan of a {len(text)} character message missed its {self.timeout}s deadline")
+            if pool is not None:
+                self._restart(pool)
+            return None
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Error scanning links in a worker process: {e}")
+            return None
+
+    def _restart(self, pool) -> None:
+        """Replace a pool with a stuck worker in the background, unless another scan already has"""
+        if self._pool is not pool:
+            return
+        self._pool = None
+        self._launch(stuck=pool)
+
+    async def close(self) -> None:
+        """Stop the worker processes"""
+        if self._starting is not None and not self._starting.done():
+            await asyncio.shield(self._starting)
+        pool, self._pool = self._pool, None
+        if pool is not None:
+            await asyncio.to_thread(pool.terminate)
+
+    def stats(self) -> Dict[str, int]:
+        return {"scans": self.scans, "timeouts": self.timeouts, "errors": self.errors}
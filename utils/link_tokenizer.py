@@ -0,0 +1,92 @@
+import re
+from typing import Iterator, List, NamedTuple
+
+# Second-level labels under which ccTLDs sell registrations (bbc.co.uk, abc.net.au);
+# a stand-in for the full public suffix list, which isn't a dependency here
+SECOND_LEVEL_LABELS = {
+    "ac", "co", "com", "edu", "gov", "go", "ltd", "mil", "ne", "net", "nic", "or", "org", "plc", "sch"
+}
+
+# Longest host name DNS allows; anything longer isn't a real link
+MAX_HOST_LENGTH = 253
+
+INVITE_HOSTS = {"discord.gg"}
+INVITE_PATH_HOSTS = {"discord.com", "discordapp.com"}
+
+# A match can't start anywhere a valid host could continue from the left, so
+# no two attempts scan the same labels and scanning stays linear in the length
+# of the text; junk such as "..", "-" or "_" in front of a host doesn't hide it
+_LINK = re.compile(r"""
+    (?<![^\W_])(?<!@)                               # not part of a longer word or an email
+    (?<![^\W_]\.)                                   # not a later label of a longer host
+    (?<![^\W_]-|--)                                 # not the middle of a hyphenated label
+    -*                                              # dashes in front, which no host starts with
+    (?:(?P<scheme>[a-z][a-z0-9+.-]{0,15})://
+       (?:[^\s/?#@]+@)?)?                           # userinfo, only after a scheme
+    (?P<host>
+        (?:\d{1,3}\.){3}\d{1,3}
+      | (?:[a-z0-9](?:[a-z0-9-]{0,61}[a-z0-9])?\.)+
+        (?:[a-z]{2,63}|xn--[a-z0-9-]{1,59})
+    )
+    (?![^\W_]|-|\.[^\W_])                           # the whole host, not a prefix of it
+    (?::\d{1,5})?
+    (?P<path>[/?#][^\s<>]*)?
+""", re.IGNORECASE | re.VERBOSE)
+
+# Sentence punctuation after a link isn't part of it
+_TRAILING = ".,;:!?'\")"
+
+class Link(NamedTuple):
+    """A link found in message text, normalized"""
+
+    scheme: str
+    host: str
+    registrable_domain: str
+    path: str
+
+    @property
+    def url(self) -> str:
+        return f"{self.scheme}://{self.host}{self.path}" if self.scheme else f"{self.host}{self.path}"
+
+    @property
+    def is_invite(self) -> bool:
+        """Whether the link is a Discord server invite"""
+        if self.host in INVITE_HOSTS:
+            return len(self.path) > 1
+        return self.host in INVITE_PATH_HOSTS and self.path.startswith("/invite/")
+
+def registrable_domain(host: str) -> str:
+    """The part of ``host`` someone registered: ``news.bbc.co.uk`` -> ``bbc.co.uk``"""
+    if host[-1].isdigit():
+        # IPv4 address
+        return host
+    labels = host.split(".")
+    if len(labels) > 2 and len(labels[-1]) == 2 and labels[-2] in SECOND_LEVEL_LABELS:
+        return ".".join(labels[-3:])
+    return ".".join(labels[-2:])
+
+def iter_links(text: str) -> Iterator[Link]:
+    """Walk ``text`` once and yield every link in it, with or without a scheme"""
+    if "." not in text:
+        # Every link has a dot in its host
+        return
+    # Links never contain whitespace, so the pattern only runs over words with a dot
+    # instead of being tried at every position of the message
+    for word in text.split():
+        if "." not in word:
+            continue
+        for match in _LINK.finditer(word):
+            scheme, host, path = match.group("scheme", "host", "path")
+            if len(host) > MAX_HOST_LENGTH:
+                continue
+            host = host.lower()
+            yield Link(
+                scheme.lower() if scheme else "",
+                host,
+                registrable_domain(host),
+                path.rstrip(_TRAILING) if path else ""
+            )
+
+def extract_links(text: str) -> List[Link]:
+    """Distinct links in ``text``, in the order they first appear"""
+    return list(dict.fromkeys(iter_links(text)))
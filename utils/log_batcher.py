@@ -0,0 +1,150 @@
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Discord's limits for one message
+MAX_EMBEDS_PER_MESSAGE = 10
+MAX_EMBED_CHARACTERS = 6000
+
+class LogEntry(NamedTuple):
+    """One routine log line: its embed, plus what a summary row needs"""
+    embed: Any
+    user_id: int
+    user: str
+    rule: str
+    action: str
+    channel: str
+    details: str
+
+class LogBatcher:
+    """Queues log embeds and sends them in as few messages as possible
+
+    Routine entries collect for ``interval`` seconds and then go out up to
+    ten embeds per message; a channel with more than ``summary_threshold``
+    queued entries gets the ``summarize`` embeds instead. Priority entries
+    (ban logs) are sent as soon as they arrive, ahead of any routine
+    entries still waiting, so a flood of violations can't hold them up.
+    """
+
+    def __init__(self, send: Callable[[int, List[Any]], Awaitable[None]],
+                 summarize: Callable[[List[LogEntry]], List[Any]],
+                 interval: float = 2.0, summary_threshold: int = 10):
+        self.send = send
+        self.summarize = summarize
+        self.interval = interval
+        self.summary_threshold = summary_threshold
+        # (channel_id, embed)
+        self._priority: Deque[Tuple[int, Any]] = deque()
+        # channel_id -> entries, oldest first
+        self._routine: Dict[int, List[LogEntry]] = {}
+        # Created on first use so they belong to the running loop
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self.entries = 0
+        self.messages = 0
+        self.summaries = 0
+
+    def add(self, channel_id: int, entry: LogEntry) -> None:
+        """Queue a routine entry for the next flush"""
+        self._routine.setdefault(channel_id, []).append(entry)
+        self.entries += 1
+        self._start()
+
+    def add_priority(self, channel_id: int, embed: Any) -> None:
+        """Queue an embed to go out ahead of everything routine"""
+        self._priority.append((channel_id, embed))
+        self.entries += 1
+        self._start()
+
+    def _start(self) -> None:
+        if self._wake is None:
+            self._wake = asyncio.Event()
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        self._wake.set()
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._wake.wait()
+            self._wake.clear()
+            await self._send_priority()
+            if not self._routine:
+                continue
+            # Let the burst collect, still sending ban logs the moment they arrive
+            deadline = loop.time() + self.interval
+            while (remaining := deadline - loop.time()) > 0:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), remaining)
+                except asyncio.TimeoutError:
+                    break
+                self._wake.clear()
+                await self._send_priority()
+            await self._flush_routine()
+
+    async def _send_priority(self) -> None:
+        while self._priority:
+            channel_id = self._priority[0][0]
+            # Consecutive ban logs for the same channel share a message
+            embeds = []
+            while self._priority and self._priority[0][0] == channel_id and len(embeds) < MAX_EMBEDS_PER_MESSAGE:
+                embeds.append(self._priority.popleft()[1])
+            await self._send(channel_id, embeds)
+
+    async def _flush_routine(self) -> None:
+        batches, self._routine = self._routine, {}
+        for channel_id, entries in batches.items():
+            if len(entries) > self.summary_threshold:
+                embeds = self.summarize(entries)
+                self.summaries += 1
+            else:
+                embeds = [entry.embed for entry in entries]
+            for chunk in chunk_embeds(embeds):
+                await self._send_priority()
+                await self._send(channel_id, chunk)
+
+    async def _send(self, channel_id: int, embeds: List[Any]) -> None:
+        try:
+            await self.send(channel_id, embeds)
+            self.messages += 1
+        except Exception as e:
+            logger.error(f"Error sending {len(embeds)} log embeds to channel {channel_id}: {e}")
+
+    async def close(self) -> None:
+        """Stop the flusher and send whatever is still queued"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self._send_priority()
+        await self._flush_routine()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": self.entries,
+            "messages": self.messages,
+            "summaries": self.summaries,
+            "queued": len(self._priority) + sum(map(len, self._routine.values()))
+        }
+
+def chunk_embeds(embeds: List[Any]) -> List[List[Any]]:
+    """Split embeds into groups that fit in one message"""
+    chunks: List[List[Any]] = []
+    current: List[Any] = []
+    size = 0
+    for embed in embeds:
+        length = len(embed)
+        if current and (len(current) == MAX_EMBEDS_PER_MESSAGE or size + length > MAX_EMBED_CHARACTERS):
+            chunks.append(current)
+            current, size = [], 0
+        current.append(embed)
+        size += length
+    if current:
+        chunks.append(current)
+    return chunks
@@ -0,0 +1,225 @@
+from bisect import bisect_left, insort
+from typing import Dict, List, Optional, Tuple
+
+class FenwickTree:
+    """Binary indexed tree of counts with O(log n) prefix sums and rank search"""
+
+    def __init__(self, counts: List[int]):
+        self._tree = [0] + list(counts)
+        for i in range(1, len(self._tree)):
+            parent = i + (i & -i)
+            if parent < len(self._tree):
+                self._tree[parent] += self._tree[i]
+
+    def add(self, index: int, delta: int) -> None:
+        """Add ``delta`` to the count at 0-based ``index``"""
+        i = index + 1
+        while i < len(self._tree):
+            self._tree[i] += delta
+            i += i & -i
+
+    def prefix_sum(self, index: int) -> int:
+        """Sum of the counts before 0-based ``index``"""
+        total = 0
+        i = index
+        while i > 0:
+            total += self._tree[i]
+            i -= i & -i
+        return total
+
+    def find(self, k: int) -> Tuple[int, int]:
+        """Locate the ``k``-th item (0-based) as ``(bucket, offset in bucket)``"""
+        pos = 0
+        step = 1 << (len(self._tree) - 1).bit_length()
+        while step:
+            nxt = pos + step
+            if nxt < len(self._tree) and self._tree[nxt] <= k:
+                pos = nxt
+                k -= self._tree[nxt]
+            step >>= 1
+        return pos, k
+
+class SortedKeyList:
+    """Sorted list split into bounded sublists
+
+    Inserts and removals bisect the sublist maxima and then touch a single
+    sublist of at most ``2 * load`` items, so updates stay O(log n) with a
+    small constant memmove instead of shifting one huge list. A Fenwick tree
+    over the sublist sizes turns positions into O(log n) lookups as well; it
+    is rebuilt lazily only when sublists are split or dropped.
+    """
+
+    def __init__(self, load: int = 500):
+        self._load = load
+        self._lists: List[list] = []
+        self._maxes: list = []
+        self._len = 0
+        self._sizes: Optional[FenwickTree] = None
+
+    def __len__(self) -> int:
+        return self._len
+
+    def clear(self) -> None:
+        self._lists = []
+        self._maxes = []
+        self._len = 0
+        self._sizes = None
+
+    def _size_tree(self) -> FenwickTree:
+        if self._sizes is None:
+            self._sizes = FenwickTree([len(sublist) for sublist in self._lists])
+        return self._sizes
+
+    def _resized(self, pos: int, delta: int) -> None:
+        if self._sizes is not None:
+            self._sizes.add(pos, delta)
+
+    def add(self, value) -> None:
+        """Insert a value keeping the list sorted"""
+        if not self._maxes:
+            self._lists.append([value])
+            self._maxes.append(value)
+            self._len = 1
+            self._sizes = None
+            return
+
+        pos = bisect_left(self._maxes, value)
+        if pos == len(self._maxes):
+            pos -= 1
+            self._lists[pos].append(value)
+            self._maxes[pos] = value
+        else:
+            insort(self._lists[pos], value)
+        self._len += 1
+        self._resized(pos, 1)
+
+        sublist = self._lists[pos]
+        if len(sublist) > self._load * 2:
+            # Split oversized sublists so every insert stays cheap
+            half = sublist[self._load:]
+            del sublist[self._load:]
+            self._maxes[pos] = sublist[-1]
+            self._lists.insert(pos + 1, half)
+            self._maxes.insert(pos + 1, half[-1])
+            self._sizes = None
+
+    def remove(self, value) -> None:
+        """Remove a value, raising ValueError if it is not present"""
+        pos = bisect_left(self._maxes, value)
+        if pos == len(self._maxes):
+            raise ValueError(f"{value!r} not in list")
+        sublist = self._lists[pos]
+        idx = bisect_left(sublist, value)
+        if idx == len(sublist) or sublist[idx] != value:
+            raise ValueError(f"{value!r} not in list")
+
+        del sublist[idx]
+        self._len -= 1
+        if not sublist:
+            del self._lists[pos]
+            del self._maxes[pos]
+            self._sizes = None
+        else:
+            self._maxes[pos] = sublist[-1]
+            self._resized(pos, -1)
+
+    def index(self, value) -> int:
+        """0-based position of a value, raising ValueError if it is not present"""
+        pos = bisect_left(self._maxes, value)
+        if pos == len(self._maxes):
+            raise ValueError(f"{value!r} not in list")
+        sublist = self._lists[pos]
+        idx = bisect_left(sublist, value)
+        if idx == len(sublist) or sublist[idx] != value:
+            raise ValueError(f"{value!r} not in list")
+        return self._size_tree().prefix_sum(pos) + idx
+
+    def __getitem__(self, index: int):
+        """Value at 0-based position ``index``"""
+        if not 0 <= index < self._len:
+            raise IndexError("index out of range")
+        pos, idx = self._size_tree().find(index)
+        return self._lists[pos][idx]
+
+    def slice(self, start: int, stop: int) -> list:
+        """Values from position ``start`` up to ``stop``"""
+        stop = min(stop, self._len)
+        if start >= stop:
+            return []
+        pos, idx = self._size_tree().find(start)
+        result = []
+        remaining = stop - start
+        for sublist in self._lists[pos:]:
+            chunk = sublist[idx:idx + remaining]
+            result.extend(chunk)
+            remaining -= len(chunk)
+            idx = 0
+            if remaining <= 0:
+                break
+        return result
+
+class LeaderboardIndex:
+    """Ranked user IDs for both leaderboard sort orders
+
+    Only users that should appear on the leaderboard (present guild members)
+    are indexed, so its length doubles as the O(1) page count source.
+    """
+
+    SORTS = ("level", "xp")
+
+    def __init__(self):
+        self._sorted = {sort_by: SortedKeyList() for sort_by in self.SORTS}
+        self._keys: Dict[int, Tuple[tuple, tuple]] = {}
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, user_id: int) -> bool:
+        return user_id in self._keys
+
+    @staticmethod
+    def _make_keys(user_id: int, level: int, total_xp: int) -> Tuple[tuple, tuple]:
+        # Negated so ascending order is the leaderboard order; the ID breaks ties
+        return (-level, -total_xp, user_id), (-total_xp, user_id)
+
+    def update(self, user_id: int, level: int, total_xp: int) -> None:
+        """Insert or reposition a user"""
+        keys = self._make_keys(user_id, level, total_xp)
+        old_keys = self._keys.get(user_id)
+        if old_keys == keys:
+            return
+        for sort_by, old_key, new_key in zip(self.SORTS, old_keys or (None, None), keys):
+            if old_key is not None:
+                self._sorted[sort_by].remove(old_key)
+            self._sorted[sort_by].add(new_key)
+        self._keys[user_id] = keys
+
+    def discard(self, user_id: int) -> None:
+        """Remove a user if they are indexed"""
+        old_keys = self._keys.pop(user_id, None)
+        if old_keys is None:
+            return
+        for sort_by, old_key in zip(self.SORTS, old_keys):
+            self._sorted[sort_by].remove(old_key)
+
+    def clear(self) -> None:
+        self._keys.clear()
+        for sorted_keys in self._sorted.values():
+            sorted_keys.clear()
+
+    def page(self, sort_by: str, start: int, count: int) -> List[int]:
+        """User IDs ranked ``start`` to ``start + count`` (0-based)"""
+        return [key[-1] for key in self._sorted[sort_by].slice(start, start + count)]
+
+    def at(self, sort_by: str, position: int) -> Optional[int]:
+        """User ID ranked at 0-based ``position``, or None past either end"""
+        if not 0 <= position < len(self):
+            return None
+        return self._sorted[sort_by][position][-1]
+
+    def position(self, user_id: int, sort_by: str = "level") -> Optional[int]:
+        """0-based rank of a user, or None if they are not indexed"""
+        keys = self._keys.get(user_id)
+        if keys is None:
+            return None
+        return self._sorted[sort_by].index(keys[self.SORTS.index(sort_by)])
@@ -0,0 +1,121 @@
+from collections import OrderedDict, deque
+from typing import Dict, List, Optional, Tuple
+
+class SpamHit:
+    """A window that filled up: which scope, and the messages inside it"""
+
+    __slots__ = ("scope", "count", "window", "messages", "complete")
+
+    def __init__(self, scope: str, window: float, messages: List[Tuple[int, int]], complete: bool = True):
+        self.scope = scope
+        self.count = len(messages)
+        self.window = window
+        # (channel_id, message_id), oldest first
+        self.messages = messages
+        # False when the tracker started inside the window, so earlier messages may be missing
+        self.complete = complete
+
+    @property
+    def channel_ids(self) -> List[int]:
+        return list(dict.fromkeys(channel_id for channel_id, _ in self.messages))
+
+    def by_channel(self) -> Dict[int, List[int]]:
+        """Message IDs in the window grouped by channel"""
+        grouped: Dict[int, List[int]] = {}
+        for channel_id, message_id in self.messages:
+            grouped.setdefault(channel_id, []).append(message_id)
+        return grouped
+
+class _AuthorWindows:
+    __slots__ = ("last_seen", "recent", "channels")
+
+    def __init__(self, recent_size: int):
+        self.last_seen = 0.0
+        # (timestamp, channel_id, message_id) across every channel
+        self.recent: deque = deque(maxlen=recent_size)
+        # channel_id -> (timestamp, message_id)
+        self.channels: Dict[int, deque] = {}
+
+class SpamTracker:
+    """Sliding-window message counters per author
+
+    Each author keeps a ring of their last ``max_messages`` message times per
+    channel and their last ``cross_messages`` across all channels, so a
+    check only compares the newest entry with the oldest one in the ring.
+    Timestamps come from a monotonic clock. Authors silent for longer than
+    the longest window can't fill one and are evicted, oldest first.
+    """
+
+    def __init__(self, max_messages: int = 5, time_window: float = 5,
+                 cross_messages: int = 8, cross_window: float = 10, started: float = 0.0):
+        self.max_messages = max(1, max_messages)
+        self.time_window = time_window
+        self.cross_messages = max(1, cross_messages)
+        self.cross_window = cross_window
+        self.idle_ttl = max(time_window, cross_window)
+        # Monotonic time tracking began; messages from before then were never seen
+        self.started = started
+        self._authors: "OrderedDict[int, _AuthorWindows]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._authors)
+
+    def record(self, author_id: int, channel_id: int, message_id: int, now: float) -> Optional[SpamHit]:
+        """Add a message and return a hit if it filled the channel or cross-channel window"""
+        self._evict(now)
+        windows = self._authors.get(author_id)
+        if windows is None:
+            windows = self._authors[author_id] = _AuthorWindows(self.cross_messages)
+        else:
+            self._authors.move_to_end(author_id)
+        windows.last_seen = now
+
+        channel = windows.channels.get(channel_id)
+        if channel is None:
+            # Only channels with a message still inside the window are worth keeping
+            cutoff = now - self.time_window
+            for stale in [key for key, ring in windows.channels.items() if ring[-1][0] < cutoff]:
+                del windows.channels[stale]
+            channel = windows.channels[channel_id] = deque(maxlen=self.max_messages)
+        channel.append((now, message_id))
+        windows.recent.append((now, channel_id, message_id))
+
+        if len(channel) == self.max_messages and now - channel[0][0] <= self.time_window:
+            return SpamHit(
+                "channel", self.time_window,
+                [(channel_id, message_id) for _, message_id in channel],
+                complete=self.started <= now - self.time_window
+            )
+
+        recent = windows.recent
+        if len(recent) == self.cross_messages and now - recent[0][0] <= self.cross_window:
+            messages = [(channel_id, message_id) for _, channel_id, message_id in recent]
+            # A burst in one channel is the channel window's business
+            if len({channel_id for channel_id, _ in messages}) > 1:
+                return SpamHit(
+                    "cross-channel", self.cross_window, messages,
+                    complete=self.started <= now - self.cross_window
+                )
+        return None
+
+    def clear(self, author_id: int, channel_id: Optional[int] = None) -> None:
+        """Forget an author's messages in one channel, or everywhere"""
+        windows = self._authors.get(author_id)
+        if windows is None:
+            return
+        if channel_id is None:
+            del self._authors[author_id]
+            return
+        windows.channels.pop(channel_id, None)
+        windows.recent = deque(
+            (entry for entry in windows.recent if entry[1] != channel_id), maxlen=self.cross_messages
+        )
+
+    def _evict(self, now: float) -> None:
+        cutoff = now - self.idle_ttl
+        authors = self._authors
+        while authors:
+            author_id, windows = next(iter(authors.items()))
+            if windows.last_seen >= cutoff:
+                break
+            del authors[author_id]
@@ -0,0 +1,64 @@
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+class TTLCache:
+    """Least-recently-used cache whose entries also expire after ``ttl`` seconds
+
+    Holds at most ``maxsize`` entries; adding one more drops the least
+    recently used. Callers pass the current monotonic time so the cache never
+    reads a clock itself.
+    """
+
+    def __init__(self, maxsize: int = 4096, ttl: float = 600):
+        self.maxsize = max(1, maxsize)
+        self.ttl = ttl
+        # key -> (expires_at, value)
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable, now: float) -> Optional[Any]:
+        """The cached value, or None if missing or expired"""
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        if entry[0] <= now:
+            del self._data[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key: Hashable, value: Any, now: float) -> None:
+        """Cache a value until ``now + ttl``"""
+        self._data[key] = (now + self.ttl, value)
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop every entry; the counters keep running"""
+        self._data.clear()
+
+    def stats(self) -> Dict[str, float]:
+        """Size, counters and hit ratio"""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_ratio": self.hits / lookups if lookups else 0.0
+        }
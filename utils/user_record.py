@@ -0,0 +1,124 @@
+import sys
+from itertools import islice
+from typing import Dict, NamedTuple, Optional
+
+class ActiveMultiplier(NamedTuple):
+    """A random XP multiplier a user rolled"""
+    amount: float
+    duration: str
+    expires_at: float
+
+class UserRecord:
+    """Leveling state for one user
+
+    Slots instead of a per-user dict keep each row to a fixed handful of
+    pointers; ``from_dict``/``to_dict`` convert to and from the JSON shape
+    stored on disk.
+    """
+
+    __slots__ = (
+        "xp", "level", "total_xp", "last_xp_gain", "streak",
+        "last_streak_date", "highest_streak", "active_multiplier", "last_active"
+    )
+
+    def __init__(
+        self,
+        xp: int = 0,
+        level: int = 0,
+        total_xp: int = 0,
+        last_xp_gain: float = 0,
+        streak: int = 0,
+        last_streak_date: Optional[float] = None,
+        highest_streak: int = 0,
+        active_multiplier: Optional[ActiveMultiplier] = None,
+        last_active: float = 0
+    ):
+        self.xp = xp
+        self.level = level
+        self.total_xp = total_xp
+        self.last_xp_gain = last_xp_gain
+        self.streak = streak
+        self.last_streak_date = last_streak_date
+        self.highest_streak = highest_streak
+        self.active_multiplier = active_multiplier
+        # Last message or voice XP; last_xp_gain only tracks the message cooldown
+        self.last_active = last_active
+
+    @classmethod
+    def from_dict(cls, row: dict) -> 'UserRecord':
+        """Build a record from a stored JSON row"""
+        multiplier = row.get("active_multiplier")
+        return cls(
+            xp=row.get("xp", 0),
+            level=row.get("level", 0),
+            total_xp=row.get("total_xp", 0),
+            last_xp_gain=row.get("last_xp_gain", 0),
+            streak=row.get("streak", 0),
+            last_streak_date=row.get("last_streak_date"),
+            highest_streak=row.get("highest_streak", 0),
+            active_multiplier=ActiveMultiplier(
+                multiplier["amount"], multiplier["duration"], multiplier["expires_at"]
+            ) if multiplier else None,
+            # Rows saved before last_active existed were only active through messages
+            last_active=row.get("last_active", row.get("last_xp_gain", 0))
+        )
+
+    def to_dict(self) -> dict:
+        """Convert back to the JSON row shape"""
+        row = {
+            "xp": self.xp,
+            "level": self.level,
+            "last_xp_gain": self.last_xp_gain,
+            "streak": self.streak,
+            "last_streak_date": self.last_streak_date,
+            "highest_streak": self.highest_streak,
+            "total_xp": self.total_xp,
+            "last_active": self.last_active
+        }
+        if self.active_multiplier:
+            row["active_multiplier"] = self.active_multiplier._asdict()
+        return row
+
+def _value_size(value) -> int:
+    # Small ints and None are shared singletons, everything else is owned by the row
+    if value is None or (isinstance(value, int) and -5 <= value <= 256):
+        return 0
+    return sys.getsizeof(value)
+
+def _dict_row_size(user_id: int, row: dict) -> int:
+    size = sys.getsizeof(str(user_id)) + sys.getsizeof(row)
+    for key, value in row.items():
+        if isinstance(value, dict):
+            size += sys.getsizeof(value) + sum(_value_size(v) for v in value.values())
+        else:
+            size += _value_size(value)
+    return size
+
+def _record_size(user_id: int, record: UserRecord) -> int:
+    size = sys.getsizeof(user_id) + sys.getsizeof(record)
+    for name in UserRecord.__slots__:
+        value = getattr(record, name)
+        if isinstance(value, tuple):
+            size += sys.getsizeof(value) + sum(_value_size(v) for v in value)
+        else:
+            size += _value_size(value)
+    return size
+
+def memory_report(users: Dict[int, UserRecord], sample_size: int = 1000) -> Dict[str, float]:
+    """Estimate bytes per user as slot records versus the old string-keyed dict rows"""
+    count = len(users)
+    if not count:
+        return {"users": 0, "dict_bytes_per_user": 0.0, "record_bytes_per_user": 0.0}
+
+    # Measure an evenly spread sample instead of walking every user
+    step = max(1, count // sample_size)
+    sample = list(islice(users.items(), 0, None, step))
+    sampled = len(sample)
+    table_overhead = sys.getsizeof(users) / count
+    dict_bytes = sum(_dict_row_size(user_id, record.to_dict()) for user_id, record in sample) / sampled
+    record_bytes = sum(_record_size(user_id, record) for user_id, record in sample) / sampled
+    return {
+        "users": count,
+        "dict_bytes_per_user": dict_bytes + table_overhead,
+        "record_bytes_per_user": record_bytes + table_overhead
+    }
@@ -0,0 +1,106 @@
+from collections import deque
+from typing import Dict, Iterable, List, Optional
+
+# Common character swaps used to dodge word filters; every swap is one
+# character for one so match positions line up with the original text
+LEETSPEAK = str.maketrans({
+    "0": "o", "1": "i", "3": "e", "4": "a", "5": "s", "7": "t", "8": "b", "9": "g",
+    "@": "a", "$": "s", "!": "i", "|": "l", "+": "t"
+})
+
+class BannedWordMatcher:
+    """Aho-Corasick automaton over a list of banned words
+
+    The automaton is built once from the word list, after which a message is
+    scanned in a single pass no matter how many words there are. Matching is
+    case-insensitive. With ``whole_word`` a match only counts when it isn't
+    part of a longer word; with ``leetspeak`` digits and symbols such as
+    ``0``, ``3`` and ``@`` are read as the letters they stand in for, in both
+    the words and the messages.
+    """
+
+    def __init__(self, words: Iterable[str], whole_word: bool = False, leetspeak: bool = False):
+        self.whole_word = whole_word
+        self.leetspeak = leetspeak
+        self.words: List[str] = []
+        # Node 0 is the root; each node has its transitions, failure link and the words ending there
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[int]] = [[]]
+
+        seen = set()
+        for word in words:
+            pattern = self.normalize(word.strip())
+            if not pattern or pattern in seen:
+                continue
+            seen.add(pattern)
+            self._insert(pattern, len(self.words))
+            self.words.append(word.strip())
+        self._lengths = [len(self.normalize(word)) for word in self.words]
+        self._link()
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    @property
+    def min_length(self) -> int:
+        """Length of the shortest banned word, or 0 with no words"""
+        return min(self._lengths, default=0)
+
+    def normalize(self, text: str) -> str:
+        """Lowercase (and de-leet) text the same way for words and messages"""
+        text = text.lower()
+        return text.translate(LEETSPEAK) if self.leetspeak else text
+
+    def _insert(self, pattern: str, index: int) -> None:
+        node = 0
+        for char in pattern:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto[node][char] = next_node
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            node = next_node
+        self._output[node].append(index)
+
+    def _link(self) -> None:
+        # Breadth-first so every failure target is finished before it is used
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                # Words ending at the failure target also end here
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    def find(self, text: str) -> Optional[str]:
+        """The first banned word in ``text`` (as it was configured), or None"""
+        if not self.words:
+            return None
+        # Word boundaries are judged before de-leeting so "bad!" still ends at the "!"
+        lowered = text.lower()
+        scanned = lowered.translate(LEETSPEAK) if self.leetspeak else lowered
+        goto, fail, output = self._goto, self._fail, self._output
+        node = 0
+        for end, char in enumerate(scanned):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if output[node]:
+                for index in output[node]:
+                    if not self.whole_word or self._is_whole_word(lowered, end - self._lengths[index] + 1, end):
+                        return self.words[index]
+        return None
+
+    @staticmethod
+    def _is_whole_word(text: str, start: int, end: int) -> bool:
+        before = text[start - 1] if start > 0 else ""
+        after = text[end + 1] if end + 1 < len(text) else ""
+        return not (before.isalnum() or before == "_") and not (after.isalnum() or after == "_")
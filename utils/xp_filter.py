@@ -0,0 +1,122 @@
+import math
+import string
+from collections import Counter, OrderedDict, deque
+from typing import Dict
+
+# Case, whitespace and ASCII punctuation don't make a message different
+_STRIP = str.maketrans("", "", string.whitespace + string.punctuation)
+
+# Only the start of a message is compared; farmed messages are short, and
+# this keeps the per-message cost flat however long a message is
+MAX_FILTERED_LENGTH = 500
+
+# Shorter messages ("gg", "lol", an emoji) are too short for their entropy
+# to say anything and are only checked for repeats
+MIN_ENTROPY_LENGTH = 6
+
+def normalize(text: str) -> str:
+    """Casefold and drop whitespace and punctuation"""
+    return text.casefold().translate(_STRIP)
+
+def entropy(text: str) -> float:
+    """Shannon entropy of the characters in ``text``, in bits per character"""
+    length = len(text)
+    if not length:
+        return 0.0
+    return -sum(count / length * math.log2(count / length) for count in Counter(text).values())
+
+def entropy_floor(length: int, distinct: int) -> float:
+    """Lowest possible entropy of ``length`` characters made of ``distinct`` different ones"""
+    if distinct <= 1:
+        return 0.0
+    # Lowest when one character takes every position the others don't need
+    common = (length - distinct + 1) / length
+    return -common * math.log2(common) + (distinct - 1) / length * math.log2(length)
+
+def fingerprint(normalized: str) -> int:
+    """Hash of the normalized text"""
+    return hash(normalized)
+
+class MessageFingerprintFilter:
+    """Rejects XP for repeated or low-effort messages
+
+    Each active user has a ring of their last ``ring_size`` message
+    fingerprints; a message whose fingerprint is already in the ring, or
+    whose normalized text is at least ``MIN_ENTROPY_LENGTH`` characters and
+    falls below ``min_entropy`` bits per character, earns nothing. Users are kept in least-recently-seen order so users idle
+    for longer than ``idle_ttl`` seconds are evicted from the front.
+    """
+
+    def __init__(self, ring_size: int = 8, min_entropy: float = 1.0, idle_ttl: float = 3600):
+        # user_id -> [last_seen, ring of fingerprints]
+        self._rings: "OrderedDict[int, list]" = OrderedDict()
+        self._ring_size = ring_size
+        self.min_entropy = min_entropy
+        self.idle_ttl = idle_ttl
+        self.duplicates_blocked = 0
+        self.low_entropy_blocked = 0
+
+    def __len__(self) -> int:
+        return len(self._rings)
+
+    @property
+    def ring_size(self) -> int:
+        return self._ring_size
+
+    @ring_size.setter
+    def ring_size(self, size: int) -> None:
+        if size == self._ring_size:
+            return
+        self._ring_size = size
+        # Resize the existing rings too, keeping each user's newest fingerprints
+        for entry in self._rings.values():
+            entry[1] = deque(entry[1], maxlen=size)
+
+    def allow(self, user_id: int, text: str, now: float) -> bool:
+        """Record a message and return whether it may earn XP"""
+        self._evict(now)
+        normalized = normalize(text[:MAX_FILTERED_LENGTH])
+        if not normalized:
+            # Attachments, stickers and embeds only; nothing to compare
+            return True
+
+        entry = self._rings.get(user_id)
+        if entry is None:
+            entry = self._rings[user_id] = [now, deque(maxlen=self._ring_size)]
+        else:
+            entry[0] = now
+            self._rings.move_to_end(user_id)
+
+        ring = entry[1]
+        value = fingerprint(normalized)
+        if value in ring:
+            self.duplicates_blocked += 1
+            return False
+        ring.append(value)
+
+        length = len(normalized)
+        if length < MIN_ENTROPY_LENGTH:
+            return True
+        # Counting characters is only needed when there are too few different ones to be sure
+        min_entropy = self.min_entropy
+        if entropy_floor(length, len(set(normalized))) < min_entropy and entropy(normalized) < min_entropy:
+            self.low_entropy_blocked += 1
+            return False
+        return True
+
+    def _evict(self, now: float) -> None:
+        cutoff = now - self.idle_ttl
+        rings = self._rings
+        while rings:
+            user_id, entry = next(iter(rings.items()))
+            if entry[0] >= cutoff:
+                break
+            del rings[user_id]
+
+    def stats(self) -> Dict[str, int]:
+        """Tracked users and how many messages were refused XP"""
+        return {
+            "tracked_users": len(self._rings),
+            "duplicates_blocked": self.duplicates_blocked,
+            "low_entropy_blocked": self.low_entropy_blocked
+        }
@@ -0,0 +1,135 @@
+import asyncio
+import heapq
+import inspect
+import itertools
+import logging
+import re
+import time
+from bisect import bisect_right
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DURATION_UNITS = {"m": 60, "h": 3600, "d": 86400}
+
+def parse_duration(label: str) -> int:
+    """Seconds in a duration label such as ``30m``, ``6h`` or ``1d``"""
+    match = re.fullmatch(r"(\d+)([mhd])", label.strip())
+    if not match:
+        raise ValueError(f"Invalid duration: {label!r}")
+    return int(match.group(1)) * DURATION_UNITS[match.group(2)]
+
+class RollTable:
+    """Cumulative-probability tables for random XP multiplier rolls
+
+    Built once from the ``multiplier_chances`` and ``duration_chances``
+    settings, so a roll is two bisects instead of re-walking the settings.
+    Each tier's chance is its own probability of being rolled, highest
+    multiplier first.
+    """
+
+    def __init__(self, multiplier_chances: Dict[str, float], duration_chances: Dict[str, float]):
+        tiers = sorted(
+            ((self._parse_amount(label), chance) for label, chance in multiplier_chances.items()),
+            reverse=True
+        )
+        self.tier_bounds: List[float] = list(itertools.accumulate(chance for _, chance in tiers))
+        self.tier_amounts: List[float] = [amount for amount, _ in tiers]
+
+        # Durations are picked relative to their total so an unnormalized table still always yields one
+        total = sum(duration_chances.values()) or 1.0
+        self.duration_bounds: List[float] = list(itertools.accumulate(
+            chance / total for chance in duration_chances.values()
+        ))
+        self.durations: List[Tuple[str, int]] = [
+            (label, parse_duration(label)) for label in duration_chances
+        ]
+
+    @staticmethod
+    def _parse_amount(label: str) -> float:
+        amount = float(label.rstrip("x"))
+        return int(amount) if amount.is_integer() else amount
+
+    def roll(self, tier_rand: float, duration_rand: float) -> Optional[Tuple[float, str, int]]:
+        """``(amount, duration label, seconds)`` for two uniform randoms, or None for no multiplier"""
+        tier = bisect_right(self.tier_bounds, tier_rand)
+        if tier >= len(self.tier_amounts) or not self.durations:
+            return None
+        index = min(bisect_right(self.duration_bounds, duration_rand), len(self.durations) - 1)
+        label, seconds = self.durations[index]
+        return self.tier_amounts[tier], label, seconds
+
+class ExpiryScheduler:
+    """Min-heap of timed callbacks drained by a single timer task
+
+    Callbacks may be plain functions or coroutines. Entries are cancelled
+    lazily: cancelling marks the entry and the timer skips it when it
+    reaches the top of the heap.
+    """
+
+    def __init__(self):
+        self._heap: List[list] = []
+        self._counter = itertools.count()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return sum(1 for entry in self._heap if entry[2] is not None)
+
+    def schedule(self, when: float, callback: Callable, *args) -> list:
+        """Run ``callback(*args)`` at epoch time ``when``; returns a handle for ``cancel``"""
+        entry = [when, next(self._counter), callback, args]
+        heapq.heappush(self._heap, entry)
+        # Wake the timer if this is now the earliest deadline
+        if self._wakeup is not None and self._heap[0] is entry:
+            self._wakeup.set()
+        return entry
+
+    @staticmethod
+    def cancel(handle: Optional[list]) -> None:
+        """Cancel a scheduled callback (no-op if it already ran)"""
+        if handle is not None:
+            handle[2] = None
+
+    def next_due(self) -> Optional[float]:
+        """Epoch time of the earliest pending callback"""
+        while self._heap and self._heap[0][2] is None:
+            heapq.heappop(self._heap)
+        return self._heap[0][0] if self._heap else None
+
+    def start(self) -> None:
+        """Start the timer task"""
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the timer task; pending callbacks stay in the heap"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                due = self.next_due()
+                timeout = None if due is None else max(0.0, due - time.time())
+                if timeout is None or timeout > 0:
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+                    except asyncio.TimeoutError:
+                        pass
+                    self._wakeup.clear()
+                    continue
+
+                _, _, callback, args = heapq.heappop(self._heap)
+                result = callback(*args)
+                if inspect.isawaitable(result):
+                    await result
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Error running scheduled multiplier callback: {e}")